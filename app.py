@@ -1,19 +1,18 @@
 import dash
 from dash import dcc, html, Output, Input, State
 import os
-import yaml
 import time
 import json
 import logging
 from data_generators import (
-    DimensionGenerator, 
-    FactGenerator, 
-    ChangeFeedGenerator, 
-    BaseGenerator,
-    WeatherGenerator
+    OUTPUT_FORMATS,
+    DEFAULT_OUTPUT_FORMAT,
+    get_output_format,
+    GenerationEngine,
+    GenerationWorker,
+    schema_registry
 )
 from dash.dependencies import ClientsideFunction
-from threading import Thread
 import threading
 from flask import jsonify
 import sys
@@ -79,15 +78,17 @@ STYLES = {
 }
 
 # Global state
-dimension_key_ranges = {}
 status = {
     "running": False,
     "industry": None,
-    "iteration_count": 0,
     "start_time": None,
     "dlt_code": None,
     "output_path": None,
-    "thread": None,
+    # Engine of the current run; progress is read from its snapshot, never under the lock
+    "engine": None,
+    # Host generation in a separate worker process (0 runs it on a thread in the web server)
+    "generation_process": os.environ.get("STREAMFORGE_GENERATION_PROCESS", "1") != "0",
+    # Guards short control transitions (start/stop, UI selections); generation never holds it
     "lock": threading.Lock(),
     "selected_language": None,
     "selected_industry": None,
@@ -95,6 +96,20 @@ status = {
     "selected_dlt_output": None,
     "selected_dlt_mode": None,
     "duration_hours": 8,  # Default to 8 hours
+    "selected_output_format": DEFAULT_OUTPUT_FORMAT,
+    # Worker processes for table generation; 1 keeps generation serial in the service thread
+    "generation_workers": int(os.environ.get("STREAMFORGE_GENERATION_WORKERS", "1")),
+    "upload_workers": int(os.environ.get("STREAMFORGE_UPLOAD_WORKERS", "4")),
+    # Run-level seed for reproducible output; schemas can override it with generator_config.seed
+    "seed": int(os.environ["STREAMFORGE_SEED"]) if os.environ.get("STREAMFORGE_SEED") else None,
+    # Multiplies every table's row counts; facts draw keys from the scaled dimensions
+    "scale_factor": float(os.environ.get("STREAMFORGE_SCALE_FACTOR", "1")),
+    # Seconds between iterations; iterations run on a fixed grid and tables can set generator_config.target_rate
+    "interval_seconds": float(os.environ.get("STREAMFORGE_INTERVAL_SECONDS", "15")),
+    # Shared pool that runs each table's batches on its own cadence after the first iteration
+    "table_workers": int(os.environ.get("STREAMFORGE_TABLE_WORKERS", "4")),
+    # Seconds between compaction passes over older small files; 0 leaves them as written
+    "compact_interval_seconds": float(os.environ.get("STREAMFORGE_COMPACT_INTERVAL_SECONDS", "0")),
     "resource_creation_status": None,
     "resource_cleanup_status": None,
     "warehouse_id": None,
@@ -114,68 +129,129 @@ app = dash.Dash(__name__)
 server = app.server
 
 
-def generation_service():
-    """Background service that runs file generation."""
-    while status["running"]:
-        try:
-            with status["lock"]:
-                if not status["running"]:
-                    break
-                generate_files_for_industry(status["industry"])
-        except Exception as e:
-            logger.error(f"Error in generation service: {str(e)}")
-            with status["lock"]:
-                status["running"] = False
-                status["thread"] = None
-            break
-        time.sleep(15)  # Wait 15 seconds between iterations
+def log_dlt_references(tables):
+    """Log DLT reference code for the tables saved in the first iteration."""
+    logger.info("\n=== DLT Reference Code ===")
+    for table, table_type, schema, result in tables:
+        logger.info(f"Generating DLT references for table: {table}")
+        references = generate_dlt_references(schema, result.path, table_type)
+        logger.info(f"\nTable: {table} ({table_type})")
+        logger.debug("\nSQL DLT Code:")
+        logger.debug(references['sql'])
+        logger.debug("\nPython DLT Code:")
+        logger.debug(references['python'])
+        logger.debug("\n" + "="*50)
+
+def create_generation_engine():
+    """Build the generation engine for the industry, path and settings currently in status.
+
+    By default it runs in a separate worker process so generation never competes
+    with the web server for the GIL; both kinds expose start/stop/snapshot.
+    """
+    engine_class = GenerationWorker if status["generation_process"] else GenerationEngine
+    return engine_class(
+        industry=status["industry"],
+        output_path=status["output_path"],
+        schema_base_path=SCHEMA_BASE_PATH,
+        output_format=status["selected_output_format"],
+        seed=status["seed"],
+        scale_factor=status["scale_factor"],
+        generation_workers=status["generation_workers"],
+        upload_workers=status["upload_workers"],
+        table_workers=status["table_workers"],
+        interval_seconds=status["interval_seconds"],
+        compact_interval_seconds=status["compact_interval_seconds"],
+        on_first_iteration=log_dlt_references,
+    )
+
+# Progress reported while nothing is running
+IDLE_PROGRESS = {
+    "running": False,
+    "iteration_count": 0,
+    "error": None,
+    "rate_report": None,
+    "schedule_report": None,
+    "compaction_report": None,
+    "event_time_report": None,
+}
+
+def generation_progress():
+    """Latest progress snapshot of the current engine; never waits on generation."""
+    engine = status["engine"]
+    return engine.snapshot() if engine is not None else IDLE_PROGRESS
+
+def generation_active():
+    """Whether a run was started and its engine is still generating."""
+    return status["running"] and generation_progress()["running"]
 
 def start_generation_thread():
-    """Start the generation thread if it's not already running."""
+    """Start the generation engine if it's not already running.
+
+    The engine is created under the lock but started after releasing it, since
+    spawning a worker process can take seconds and callbacks must not wait on
+    it. Raises RuntimeError, with the state reset, when the engine fails to start.
+    """
     with status["lock"]:
-        if status["thread"] is None:
-            status["running"] = True  # Set running state before starting thread
-            status["thread"] = Thread(target=generation_service)
-            status["thread"].start()
-            print("Started generation thread, running state:", status["running"])  # Debug log
+        if status["engine"] is not None:
+            return
+        status["running"] = True  # Set running state before starting the engine
+        engine = status["engine"] = create_generation_engine()
+    try:
+        engine.start()
+        error = None if engine.snapshot()["running"] else engine.snapshot()["error"] or "the engine stopped"
+    except Exception as e:
+        error = str(e)
+    if error is not None:
+        # A stop in the meantime has already reset the state and stopped this engine
+        if status["engine"] is engine:
+            stop_generation_thread()
+        raise RuntimeError(f"Generation engine failed to start: {error}")
+    logger.info(f"Started generation engine for {engine.snapshot()['industry']}")
 
 def stop_generation_thread():
-    """Stop the generation thread if it's running."""
+    """Stop the generation engine if it's running."""
     with status["lock"]:
-        if status["thread"]:
-            print("Stopping background thread...")
-            status["running"] = False
-            status["thread"].join(timeout=5)  # Wait up to 5 seconds for thread to finish
-            status["thread"] = None
-            # Reset all state
-            status["industry"] = None
-            status["iteration_count"] = 0
-            status["start_time"] = None
-            status["dlt_code"] = None
-            status["output_path"] = None
-            # Don't reset selected_language, selected_industry, path_input, and selected_dlt_output
-            # as they are UI state that should persist
-            print("Background thread stopped and state reset")
+        engine = status["engine"]
+        status["engine"] = None
+        status["running"] = False
+        # Reset all state
+        status["industry"] = None
+        status["start_time"] = None
+        status["dlt_code"] = None
+        status["output_path"] = None
+        # Don't reset selected_language, selected_industry, path_input, and selected_dlt_output
+        # as they are UI state that should persist
+    if engine is not None:
+        logger.info("Stopping generation engine...")
+        # Stopped outside the lock so callbacks never wait on in-flight generation
+        engine.stop(timeout=5)
+        logger.info("Generation engine stopped and state reset")
 
 # Add state endpoint
 @app.server.route('/api/state')
 def get_state():
     """Endpoint to check the current state."""
-    with status["lock"]:
-        state = {
-            "running": status["running"],
-            "industry": status["industry"],
-            "iteration_count": status["iteration_count"],
-            "dlt_code": status["dlt_code"],
-            "selected_language": status["selected_language"],
-            "selected_industry": status["selected_industry"],
-            "path_input": status["path_input"],
-            "selected_dlt_output": status["selected_dlt_output"],
-            "selected_dlt_mode": status["selected_dlt_mode"],
-            "duration_hours": status["duration_hours"]
-        }
-        print("Returning state:", state)  # Add debug logging
-        return jsonify(state)
+    progress = generation_progress()
+    state = {
+        "running": generation_active(),
+        "industry": status["industry"],
+        "iteration_count": progress["iteration_count"],
+        "dlt_code": status["dlt_code"],
+        "selected_language": status["selected_language"],
+        "selected_industry": status["selected_industry"],
+        "path_input": status["path_input"],
+        "selected_dlt_output": status["selected_dlt_output"],
+        "selected_dlt_mode": status["selected_dlt_mode"],
+        "duration_hours": status["duration_hours"],
+        "selected_output_format": status["selected_output_format"],
+        "error": progress["error"],
+        "rate_report": progress["rate_report"],
+        "schedule_report": progress["schedule_report"],
+        "compaction_report": progress["compaction_report"],
+        "event_time_report": progress["event_time_report"]
+    }
+    print("Returning state:", state)  # Add debug logging
+    return jsonify(state)
 
 # Add custom CSS for Inter font and Font Awesome
 app.index_string = '''
@@ -214,20 +290,33 @@ def list_industries():
     ]
 
 def load_all_schemas(industry):
-    """Load all schema files for an industry."""
-    industry_path = os.path.join(SCHEMA_BASE_PATH, industry)
-    schemas = []
-    for file in os.listdir(industry_path):
-        if file.endswith((".yml", ".yaml")):
-            with open(os.path.join(industry_path, file)) as f:
-                schema = yaml.safe_load(f)
-                schemas.append(schema)
-    return schemas
-
-def generate_dlt_references(schema, output_path, table_type):
+    """Load the compiled schemas for an industry (YAML is only re-parsed when a file changes)."""
+    return schema_registry.load_industry(SCHEMA_BASE_PATH, industry)
+
+# Reader options that Auto Loader expects under the cloudFiles. prefix
+CLOUD_FILES_OPTIONS = {'format', 'inferColumnTypes', 'schemaHints'}
+
+def format_read_files_options(reader_options):
+    """Render reader options as read_files() named arguments for SQL."""
+    return ", ".join(f'{key} => "{value}"' for key, value in reader_options.items())
+
+def format_cloud_files_options(reader_options):
+    """Render reader options as Auto Loader .option() calls for Python."""
+    lines = ['.format("cloudFiles")']
+    for key, value in reader_options.items():
+        option = f"cloudFiles.{key}" if key in CLOUD_FILES_OPTIONS else key
+        lines.append(f'.option("{option}", "{value}")')
+    return "\n        ".join(lines)
+
+def generate_dlt_references(schema, output_path, table_type, output_format=None):
     """Generate DLT reference code for a table in both SQL and Python."""
     table_name = schema["table"]
     
+    # Read the files back in the format they were written, with explicit column types where known
+    reader_options = get_output_format(output_format or status["selected_output_format"]).reader_options(schema)
+    sql_read_options = format_read_files_options(reader_options)
+    python_read_options = format_cloud_files_options(reader_options)
+    
     # Generate quality constraints only for fact and dimension tables
     quality_constraints = []
     if table_type in ['fact', 'dimension'] and 'data_quality_rules' in schema:
@@ -277,7 +366,7 @@ def generate_dlt_references(schema, output_path, table_type):
     if table_type == "change_feed":
         # Get DLT configuration from schema
         dlt_config = schema.get("change_feed_rules", {}).get("dlt_config", {})
-        keys = dlt_config.get("keys", ["key"])  # Default to ["key"] if not specified
+        keys = list(dlt_config.get("keys", ["key"]))  # Default to ["key"] if not specified
         sequence_by = dlt_config.get("sequence_by", "change_timestamp")  # Default to change_timestamp if not specified
         
         # SQL DLT code for change feed - using full catalog.schema format for change feeds
@@ -285,7 +374,7 @@ def generate_dlt_references(schema, output_path, table_type):
 -- Create streaming table for raw data
 CREATE OR REFRESH STREAMING TABLE bronze.{table_name}
 COMMENT '{get_table_comment("Bronze", table_name, "change feed")}'
-AS SELECT * FROM STREAM read_files("{output_path}/", format => "csv", inferColumnTypes => "true", multiLine => "true");
+AS SELECT * FROM STREAM read_files("{output_path}/", {sql_read_options});
 
 -- Create streaming table
 CREATE OR REFRESH STREAMING TABLE silver.{table_name}
@@ -303,10 +392,7 @@ STORED AS SCD TYPE {2 if status["selected_dlt_mode"] == "full_code" else "<CHANG
         python_code = f'''@dlt.table(name="bronze.{table_name}")
 def source():
     return (spark.readStream
-        .format("cloudFiles")
-        .option("cloudFiles.format", "csv")
-        .option("cloudFiles.inferColumnTypes", "true")
-        .option("multiLine", "true")
+        {python_read_options}
         .load("{output_path}/")
     )
 
@@ -330,16 +416,13 @@ dlt.apply_changes(
             sql_code = f'''
 CREATE OR REFRESH STREAMING TABLE bronze.{table_name}
 COMMENT '{get_table_comment("Bronze", table_name, table_type)}'
-AS SELECT * FROM STREAM read_files("{output_path}/", format => "csv", inferColumnTypes => "true", multiLine => "true")
+AS SELECT * FROM STREAM read_files("{output_path}/", {sql_read_options})
 '''
             # Python code for bronze only
             python_code = f'''@dlt.table(name="bronze.{table_name}")
 def {table_name}():
     return (spark.readStream
-        .format("cloudFiles")
-        .option("cloudFiles.format", "csv")
-        .option("cloudFiles.inferColumnTypes", "true")
-        .option("multiLine", "true")
+        {python_read_options}
         .load("{output_path}/")
     )
 '''
@@ -360,7 +443,7 @@ def {table_name}():
 -- Create bronze table
 CREATE OR REFRESH STREAMING TABLE bronze.{table_name}
 COMMENT '{get_table_comment("Bronze", table_name, table_type)}'
-AS SELECT * FROM STREAM read_files("{output_path}/", format => "csv", inferColumnTypes => "true", multiLine => "true");
+AS SELECT * FROM STREAM read_files("{output_path}/", {sql_read_options});
 
 -- Create silver table with constraints
 CREATE OR REFRESH STREAMING TABLE silver.{table_name}{constraints_sql}
@@ -381,10 +464,7 @@ AS SELECT * FROM STREAM(bronze.{table_name})
             python_code = f'''@dlt.table(name="bronze.{table_name}")
 def {table_name}_bronze():
     return (spark.readStream
-        .format("cloudFiles")
-        .option("cloudFiles.format", "csv")
-        .option("cloudFiles.inferColumnTypes", "true")
-        .option("multiLine", "true")
+        {python_read_options}
         .load("{output_path}/")
     )
 
@@ -399,118 +479,6 @@ def {table_name}_silver():
         'python': python_code
     }
 
-def generate_files_for_industry(industry):
-    """Generate all data files for an industry."""
-    global dimension_key_ranges, status
-
-    current_iteration = status['iteration_count']
-    status['iteration_count'] += 1
-
-    logger.info(f"\nIteration {current_iteration} for industry {industry}")
-    logger.debug(f"Current dimension_key_ranges: {dimension_key_ranges}")
-
-    schemas = load_all_schemas(industry)
-    dlt_references = []
-
-    # Check and clean up output directory before starting
-    if current_iteration == 0:
-        output_dir = os.path.join(status['output_path'], industry)
-        # Create a temporary generator instance to handle directory cleanup
-        is_local = not status['output_path'].startswith('/Volumes/')
-        # Use DimensionGenerator since it's the simplest concrete implementation
-        temp_generator = DimensionGenerator(None, status['output_path'], is_local=is_local)
-        temp_generator._check_directory_empty(output_dir)
-
-    # Store dimension key ranges in first iteration
-    if current_iteration == 0:
-        for schema in schemas:
-            if schema.get("type", "fact") == "dimension":
-                for col in schema["columns"]:
-                    if col.endswith("_id"):
-                        dimension_key_ranges[col] = schema.get("num_rows", 10)
-                        logger.debug(f"Storing dimension key range for {col}: {dimension_key_ranges[col]}")
-
-    # Process all tables
-    for schema in schemas:
-        # Handle both table and table_name keys for backward compatibility
-        table = schema.get("table") or schema.get("table_name")
-        if not table:
-            logger.error(f"Schema missing both 'table' and 'table_name' keys: {schema}")
-            continue
-
-        table_type = schema.get("type", "fact")
-        logger.info(f"\nProcessing table: {table} (type: {table_type})")
-
-        # Skip dimension tables after first iteration
-        if table_type == "dimension" and current_iteration > 0:
-            logger.info(f"Skipping dimension table {table} as iteration_count > 0")
-            continue
-
-        try:
-            schema_path = os.path.join(SCHEMA_BASE_PATH, industry, f"{table}.yml")
-            logger.info(f"Loading schema from: {schema_path}")
-            
-            # Determine if we're in a local environment based on the output path
-            is_local = not status['output_path'].startswith('/Volumes/')
-            
-            # Select appropriate generator based on table type and generator class
-            generator = None
-            try:
-                # Check for explicit generator class first
-                generator_class = schema.get('generator_class')
-                if generator_class == 'WeatherGenerator':
-                    generator = WeatherGenerator(schema_path, status['output_path'], is_local=is_local)
-                elif table_type == "dimension":
-                    generator = DimensionGenerator(schema_path, status['output_path'], is_local=is_local)
-                elif table_type == "fact":
-                    generator = FactGenerator(schema_path, status['output_path'], dimension_key_ranges, is_local=is_local)
-                elif table_type == "change_feed":
-                    generator = ChangeFeedGenerator(schema_path, status['output_path'], is_local=is_local)
-                else:
-                    logger.warning(f"Unknown table type or generator class: {table_type}, {generator_class}")
-                    continue
-            except Exception as e:
-                logger.error(f"Error creating generator for table {table}: {str(e)}")
-                raise
-
-            if not generator:
-                logger.warning(f"No suitable generator found for table {table}")
-                continue
-
-            # Generate and save data
-            logger.info(f"Generating data for table: {table}")
-            df = generator.generate_data()
-            logger.info(f"Saving data for table: {table}")
-            output_path = generator.save_data(df, table)
-            logger.info(f"Data saved to: {output_path}")
-            
-            # Generate DLT references for first iteration
-            if current_iteration == 0:
-                logger.info(f"Generating DLT references for table: {table}")
-                dlt_refs = generate_dlt_references(schema, output_path, table_type)
-                dlt_references.append({
-                    "table": table,
-                    "type": table_type,
-                    "references": dlt_refs
-                })
-
-        except Exception as e:
-            logger.error(f"Error processing table {table}: {str(e)}")
-            raise
-
-    # Print DLT references after first iteration
-    if current_iteration == 0 and dlt_references:
-        logger.info("\n=== DLT Reference Code ===")
-        for ref in dlt_references:
-            logger.info(f"\nTable: {ref['table']} ({ref['type']})")
-            logger.debug("\nSQL DLT Code:")
-            logger.debug(ref['references']['sql'])
-            logger.debug("\nPython DLT Code:")
-            logger.debug(ref['references']['python'])
-            logger.debug("\n" + "="*50)
-
-    logger.info(f"\nCompleted iteration {current_iteration}")
-
 def create_dlt_code_display(dlt_codes, language):
     """Create the DLT code display component."""
     if not language:
@@ -780,8 +748,25 @@ def create_input_section():
                 ], style={
                     'display': 'inline-block',
                     'verticalAlign': 'middle',
-                    'textAlign': 'left'
+                    'textAlign': 'left',
+                    'marginRight': '12px'
                 }),
+                dcc.Dropdown(
+                    id='output-format-dropdown',
+                    options=[{"label": f.label, "value": f.name} for f in OUTPUT_FORMATS.values()],
+                    value=DEFAULT_OUTPUT_FORMAT,
+                    clearable=False,
+                    placeholder="Choose File Format",
+                    style={
+                        'border': f'1px solid {DB_COLORS["border"]}',
+                        'borderRadius': '4px',
+                        'fontSize': '14px',
+                        'width': '180px',
+                        'display': 'inline-block',
+                        'verticalAlign': 'middle',
+                        'textAlign': 'left'
+                    }
+                ),
             ], style={'marginBottom': '20px', 'textAlign': 'center'}),
         ], style={'marginBottom': '20px'}),
 
@@ -1037,33 +1022,40 @@ app.layout = html.Div([
     prevent_initial_call=True
 )
 def update_countdown(n_intervals):
-    with status["lock"]:
-        if not status["running"] or not status["start_time"]:
-            return dash.no_update, True
-        
-        # Calculate remaining time
-        duration_seconds = status["duration_hours"] * 3600
-        elapsed_time = time.time() - status['start_time']
-        remaining_seconds = duration_seconds - elapsed_time
-        
-        if remaining_seconds <= 0:
-            stop_generation_thread()
-            return f"Generation stopped after {status['duration_hours']} hours.", True
-        
-        # Calculate remaining time in hours, minutes, and seconds
-        remaining_hours = int(remaining_seconds // 3600)
-        remaining_minutes = int((remaining_seconds % 3600) // 60)
-        remaining_secs = int(remaining_seconds % 60)
-        
-        # Format the remaining time message
-        time_message = f"Generating files for '{status['industry']}'... (Time remaining: "
-        if remaining_hours > 0:
-            time_message += f"{remaining_hours}h "
-        if remaining_minutes > 0 or remaining_hours > 0:
-            time_message += f"{remaining_minutes}m "
-        time_message += f"{remaining_secs}s)"
-        
-        return time_message, False
+    # Reads plain status values and the engine snapshot only, so it never waits on generation
+    start_time = status["start_time"]
+    if not status["running"] or not start_time:
+        return dash.no_update, True
+    
+    error = generation_progress()["error"]
+    if error:
+        stop_generation_thread()
+        return f"Generation stopped: {error}", True
+    
+    # Calculate remaining time
+    duration_hours = status["duration_hours"]
+    duration_seconds = duration_hours * 3600
+    elapsed_time = time.time() - start_time
+    remaining_seconds = duration_seconds - elapsed_time
+    
+    if remaining_seconds <= 0:
+        stop_generation_thread()
+        return f"Generation stopped after {duration_hours} hours.", True
+    
+    # Calculate remaining time in hours, minutes, and seconds
+    remaining_hours = int(remaining_seconds // 3600)
+    remaining_minutes = int((remaining_seconds % 3600) // 60)
+    remaining_secs = int(remaining_seconds % 60)
+    
+    # Format the remaining time message
+    time_message = f"Generating files for '{status['industry']}'... (Time remaining: "
+    if remaining_hours > 0:
+        time_message += f"{remaining_hours}h "
+    if remaining_minutes > 0 or remaining_hours > 0:
+        time_message += f"{remaining_minutes}m "
+    time_message += f"{remaining_secs}s)"
+    
+    return time_message, False
 
 # Update the control generation callback to handle interval timer
 @app.callback(
@@ -1084,12 +1076,13 @@ def update_countdown(n_intervals):
      State('dlt-output-dropdown', 'value'),
      State('dlt-mode-dropdown', 'value'),
      State('duration-input', 'value'),
+     State('output-format-dropdown', 'value'),
      State('dlt-code-section', 'style'),
      State('dlt-code-display', 'children')],
     prevent_initial_call=True
 )
-def control_generation(button_clicks, n_intervals, selected_language, selected_industry, path_input, selected_dlt_output, selected_dlt_mode, duration_hours, current_section_style, current_display):
-    global dimension_key_ranges, status
+def control_generation(button_clicks, n_intervals, selected_language, selected_industry, path_input, selected_dlt_output, selected_dlt_mode, duration_hours, selected_output_format, current_section_style, current_display):
+    global status
     
     ctx = dash.callback_context
     if not ctx.triggered:
@@ -1097,7 +1090,7 @@ def control_generation(button_clicks, n_intervals, selected_language, selected_i
 
     trigger = ctx.triggered[0]['prop_id'].split('.')[0]
     print(f"\nTrigger: {trigger}")
-    print(f"Current iteration: {status['iteration_count']}")
+    print(f"Current iteration: {generation_progress()['iteration_count']}")
     print(f"Current DLT code: {status['dlt_code'] is not None}")
 
     # Update UI state
@@ -1114,6 +1107,8 @@ def control_generation(button_clicks, n_intervals, selected_language, selected_i
             status["selected_dlt_mode"] = selected_dlt_mode
         if duration_hours:
             status["duration_hours"] = duration_hours
+        if selected_output_format:
+            status["selected_output_format"] = selected_output_format
 
     # Default section style
     section_style = current_section_style if current_section_style else {**STYLES['container'], 'display': 'none'}
@@ -1173,11 +1168,9 @@ def control_generation(button_clicks, n_intervals, selected_language, selected_i
             try:
                 print("\nStarting generation...")
                 with status["lock"]:
-                    status['iteration_count'] = 0
                     status['start_time'] = time.time()
                     status['dlt_code'] = None
                     status['output_path'] = path_input
-                    dimension_key_ranges = {}
                     status["running"] = True
                     status["industry"] = selected_industry
                 
@@ -1193,20 +1186,8 @@ def control_generation(button_clicks, n_intervals, selected_language, selected_i
                 ], style={'padding': '12px'}), "Start", start_style, False, None, section_style, export_button_style, True
         else:  # Stop button was clicked
             print("\nStopping generation...")
-            # Disable button immediately and update UI
-            with status["lock"]:
-                status["running"] = False
-                status["thread"] = None
-                status["industry"] = None
-                status["iteration_count"] = 0
-                status["start_time"] = None
-                status["dlt_code"] = None
-                status["output_path"] = None
-            
-            # Stop the background thread
-            print("Stopping background thread...")
+            # Reset state and stop the engine; the lock is only held for the reset
             stop_generation_thread()
-            print("Background thread stopped and state reset")
             
             # Reset UI state
             section_style['display'] = 'none'
@@ -1215,47 +1196,47 @@ def control_generation(button_clicks, n_intervals, selected_language, selected_i
             return True, "Stopped.", "Start", start_style, False, None, section_style, export_button_style, True
 
     elif trigger == 'interval-timer':
-        with status["lock"]:
-            if not status["running"]:
-                # If generation is not running, disable the interval timer and reset state
-                stop_generation_thread()  # Ensure thread is stopped
-                return True, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, True
-            
-            # Check if DLT code needs to be generated
-            if status['dlt_code'] is None:
-                print("\nGenerating DLT code...")
-                try:
-                    schemas = load_all_schemas(status["industry"])
-                    dlt_codes = []
-                    for schema in schemas:
-                        table_type = schema.get("type", "fact")
-                        if table_type in ["dimension", "fact", "change_feed"]:
-                            table = schema["table"]
-                            output_path = os.path.join(status['output_path'], status["industry"], table)
-                            code = generate_dlt_references(schema, output_path, table_type)
-                            print(f"Generated code for table: {table} (type: {table_type})")
-                            dlt_codes.append({
-                                "table": table,
-                                "code": code
-                            })
-                    
-                    status['dlt_code'] = dlt_codes
-                    print(f"Stored DLT code: {status['dlt_code'] is not None}")
-                    section_style['display'] = 'block'
-                    export_button_style['display'] = 'block'
-                    return False, dash.no_update, "Stop", stop_style, False, create_dlt_code_display(dlt_codes, selected_language), section_style, export_button_style, False
-                except Exception as e:
-                    print(f"Error generating DLT code: {str(e)}")
-                    section_style['display'] = 'block'
-                    export_button_style['display'] = 'none'
-                    return False, dash.no_update, "Stop", stop_style, False, loading_message, section_style, export_button_style, False
-            
-            print("\nSubsequent iteration - using stored code")
-            section_style['display'] = 'block'
-            export_button_style['display'] = 'block'
-            if status['dlt_code'] is None:
+        # Only reads status and the engine snapshot, so it never waits on generation
+        if not generation_active():
+            # If generation is not running (stopped or failed), disable the interval timer and reset state
+            stop_generation_thread()  # Ensure the engine is stopped
+            return True, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, True
+        
+        # Check if DLT code needs to be generated
+        if status['dlt_code'] is None:
+            print("\nGenerating DLT code...")
+            try:
+                schemas = load_all_schemas(status["industry"])
+                dlt_codes = []
+                for schema in schemas:
+                    table_type = schema.get("type", "fact")
+                    if table_type in ["dimension", "fact", "change_feed"]:
+                        table = schema["table"]
+                        output_path = os.path.join(status['output_path'], status["industry"], table)
+                        code = generate_dlt_references(schema, output_path, table_type)
+                        print(f"Generated code for table: {table} (type: {table_type})")
+                        dlt_codes.append({
+                            "table": table,
+                            "code": code
+                        })
+                
+                status['dlt_code'] = dlt_codes
+                print(f"Stored DLT code: {status['dlt_code'] is not None}")
+                section_style['display'] = 'block'
+                export_button_style['display'] = 'block'
+                return False, dash.no_update, "Stop", stop_style, False, create_dlt_code_display(dlt_codes, selected_language), section_style, export_button_style, False
+            except Exception as e:
+                print(f"Error generating DLT code: {str(e)}")
+                section_style['display'] = 'block'
+                export_button_style['display'] = 'none'
                 return False, dash.no_update, "Stop", stop_style, False, loading_message, section_style, export_button_style, False
-            return False, dash.no_update, "Stop", stop_style, False, create_dlt_code_display(status['dlt_code'], selected_language), section_style, export_button_style, False
+        
+        print("\nSubsequent iteration - using stored code")
+        section_style['display'] = 'block'
+        export_button_style['display'] = 'block'
+        if status['dlt_code'] is None:
+            return False, dash.no_update, "Stop", stop_style, False, loading_message, section_style, export_button_style, False
+        return False, dash.no_update, "Stop", stop_style, False, create_dlt_code_display(status['dlt_code'], selected_language), section_style, export_button_style, False
 
     raise dash.exceptions.PreventUpdate
 
@@ -1298,7 +1279,8 @@ def update_export_button(code_display):
      Output('path-input', 'value'),
      Output('dlt-output-dropdown', 'value'),
      Output('dlt-mode-dropdown', 'value'),
-     Output('duration-input', 'value')],
+     Output('duration-input', 'value'),
+     Output('output-format-dropdown', 'value')],
     Input('initial-state-trigger', 'children'),
     prevent_initial_call=False  # Allow initial call
 )
@@ -1313,9 +1295,10 @@ def trigger_initial_state_check(_):
                 status["path_input"],
                 status["selected_dlt_output"],
                 status["selected_dlt_mode"],
-                status["duration_hours"]
+                status["duration_hours"],
+                status["selected_output_format"]
             ]
-        return ['triggered', '', '', '', '', '', 8]  # Default duration to 8 hours
+        return ['triggered', '', '', '', '', '', 8, DEFAULT_OUTPUT_FORMAT]  # Default duration to 8 hours
 
 # Add UI state sync callback
 @app.callback(
@@ -0,0 +1,154 @@
+"""Compare row-wise and columnar FactGenerator throughput.
+
+Usage:
+    python benchmarks/bench_fact_generator.py [--schema PATH] [--rows N] [--skew S]
+"""
+import argparse
+import os
+import sys
+import time
+from collections.abc import Mapping
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_generators import FactGenerator, KeyIndex, schema_registry
+from data_generators.key_index import column_reference
+
+DEFAULT_SCHEMA = os.path.join("schema", "Gas_Emissions", "sensor_emissions.yml")
+KEY_INDEX = KeyIndex.from_ranges({"asset.asset_id": 200, "site_info.site_id": 20, "inspectors.inspector_id": 50})
+
+
+class RowFactGenerator(FactGenerator):
+    """FactGenerator with the original row-at-a-time loop, kept only as the benchmark baseline.
+
+    It reproduces the old output path as it was, including drawing quality-rule
+    columns twice per value, and ignores distributions and event time.
+    """
+
+    def _generate_value(self, col, col_def):
+        """Generate a value based on column definition."""
+        # Check if there are data quality rules for this column
+        if 'data_quality_rules' in self.schema and col in self.schema['data_quality_rules']:
+            rules = self.schema['data_quality_rules'][col]
+            min_value = rules.get('min_value')
+            max_value = rules.get('max_value')
+            anomaly_percentage = rules.get('anomaly_percentage', 0)
+
+            # Randomly decide if this value should be an anomaly
+            if self.random.random() < anomaly_percentage:
+                # Generate an anomalous value outside the normal range
+                if self.random.random() < 0.5:  # 50% chance of being below min
+                    value = min_value - self.random.uniform(0.1, 0.3)  # 10-30% below min
+                else:  # 50% chance of being above max
+                    value = max_value + self.random.uniform(0.1, 0.3)  # 10-30% above max
+            else:
+                # Generate a normal value within the range
+                value = self.random.uniform(min_value, max_value)
+
+            # Round to 2 decimal places for float values
+            if isinstance(value, float):
+                value = round(value, 2)
+
+            return value
+
+        # Special handling for datetime fields
+        if isinstance(col_def, Mapping) and col_def.get('type') == 'datetime':
+            return self.fake.date_time_between(
+                start_date=self.start_date,
+                end_date=self.end_date
+            ).isoformat()
+
+        # Use base implementation for all other types
+        return super()._generate_value(col, col_def)
+
+    def _generate_value_with_quality_rules(self, col, col_def):
+        """Generate a value considering data quality rules if they exist."""
+        value = self._generate_value(col, col_def)
+
+        # Check if there are data quality rules for this column
+        if 'data_quality_rules' in self.schema and col in self.schema['data_quality_rules']:
+            rules = self.schema['data_quality_rules'][col]
+            min_value = rules.get('min_value')
+            max_value = rules.get('max_value')
+            anomaly_percentage = rules.get('anomaly_percentage', 0)
+
+            # Randomly decide if this value should be an anomaly
+            if self.random.random() < anomaly_percentage:
+                # Generate an anomalous value outside the normal range
+                if self.random.random() < 0.5:  # 50% chance of being below min
+                    value = min_value - self.random.uniform(0.1, 0.3)  # 10-30% below min
+                else:  # 50% chance of being above max
+                    value = max_value + self.random.uniform(0.1, 0.3)  # 10-30% above max
+            else:
+                # Generate a normal value within the range
+                value = self.random.uniform(min_value, max_value)
+
+            # Round to 2 decimal places for float values
+            if isinstance(value, float):
+                value = round(value, 2)
+
+        return value
+
+    def generate_rows(self):
+        """Generate fact table data one row at a time."""
+        rows = []
+        num_rows = self.schema.get('num_rows', 10)
+
+        foreign_keys = {}
+        for col, col_def in self.schema['columns'].items():
+            target = self.key_index.resolve(col, column_reference(col_def)) if self.key_index else None
+            if target is not None:
+                foreign_keys[col] = self.key_index.keys[target]
+
+        for _ in range(num_rows):
+            row = {}
+            for col, col_def in self.schema['columns'].items():
+                if col in foreign_keys:
+                    # Draw foreign keys from the keys the dimension actually wrote
+                    row[col] = int(self.random.choice(foreign_keys[col]))
+                elif 'data_quality_rules' in self.schema and col in self.schema['data_quality_rules']:
+                    # Use quality rules if they exist for this column
+                    row[col] = self._generate_value_with_quality_rules(col, col_def)
+                else:
+                    # Use standard value generation if no quality rules
+                    row[col] = self._generate_value(col, col_def)
+            rows.append(row)
+
+        return pd.DataFrame(rows)
+
+
+def time_call(fn):
+    start = time.perf_counter()
+    df = fn()
+    return df, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--schema", default=DEFAULT_SCHEMA)
+    parser.add_argument("--rows", type=int, default=None, help="Override num_rows from the schema")
+    parser.add_argument("--skew", type=float, default=None, help="Draw foreign keys zipf-skewed with this exponent")
+    args = parser.parse_args()
+
+    schema = schema_registry.get(args.schema)
+    if args.rows:
+        schema = schema.with_overrides(num_rows=args.rows)
+    if args.skew:
+        columns = schema.to_dict()["columns"]
+        for _, column in KEY_INDEX.owners.values():
+            if column in columns:
+                columns[column] = {"type": "int", "skew": args.skew}
+        schema = schema.with_overrides(columns=columns)
+    generator = RowFactGenerator(schema, "/tmp/streamforge-bench", KEY_INDEX)
+    num_rows = generator.schema.get("num_rows", 10)
+
+    print(f"{'engine':<10} {'rows':>10} {'seconds':>10} {'rows/sec':>12}")
+    for name, fn in (("row", generator.generate_rows), ("columnar", generator.generate_data)):
+        df, elapsed = time_call(fn)
+        print(f"{name:<10} {len(df):>10} {elapsed:>10.3f} {num_rows / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
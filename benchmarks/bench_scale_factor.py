@@ -0,0 +1,57 @@
+"""Measure first-iteration generation time and output size of an industry at several scale factors.
+
+Usage:
+    python benchmarks/bench_scale_factor.py [--industry NAME] [--scale-factors 0.1,1,10] [--format csv] [--workers N]
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_generators import GenerationEngine
+
+SEED = 42
+
+
+def run_scale_factor(industry, scale_factor, output_format, workers):
+    """Generate one full iteration into a temp directory; returns (seconds, rows, bytes, files, key counts)."""
+    output_path = tempfile.mkdtemp(prefix="streamforge-sf-")
+    try:
+        engine = GenerationEngine(industry, output_path, output_format=output_format, seed=SEED,
+                                  generation_workers=workers, scale_factor=scale_factor)
+        start = time.perf_counter()
+        results = engine.generate_iteration()
+        elapsed = time.perf_counter() - start
+        engine.shutdown_table_runner()
+        saved = [result for result in results.values() if result is not None]
+        return (elapsed, sum(result.rows for result in saved), sum(result.bytes for result in saved),
+                sum(result.files for result in saved), engine.key_index.sizes())
+    finally:
+        shutil.rmtree(output_path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--industry", default="Gas_Emissions")
+    parser.add_argument("--scale-factors", default="0.1,1,10")
+    parser.add_argument("--format", default="csv")
+    parser.add_argument("--workers", type=int, default=1, help="Generation worker processes")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'SF':>6} {'rows':>12} {'files':>6} {'MB':>10} {'seconds':>9} {'rows/sec':>12}  keys")
+    for scale_factor in (float(value) for value in args.scale_factors.split(",")):
+        elapsed, rows, size, files, key_counts = run_scale_factor(args.industry, scale_factor, args.format,
+                                                                  args.workers)
+        keys = ", ".join(f"{key}={count}" for key, count in sorted(key_counts.items()))
+        print(f"{scale_factor:>6g} {rows:>12,} {files:>6} {size / 1e6:>10.1f} {elapsed:>9.2f} "
+              f"{rows / elapsed:>12,.0f}  {keys}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Compare temp-file and streaming UC volume uploads against a fake Files API.
+
+Each mode runs in a fresh subprocess so peak RSS is measured in isolation.
+
+Usage:
+    python benchmarks/bench_upload.py [--rows N] [--format csv|csv_gzip|parquet_snappy|parquet_zstd|jsonl]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_generators import FactGenerator, KeyIndex, schema_registry
+
+SCHEMA = os.path.join("schema", "Gas_Emissions", "sensor_emissions.yml")
+KEY_INDEX = KeyIndex.from_ranges({"asset.asset_id": 200, "site_info.site_id": 20, "inspectors.inspector_id": 50})
+READ_CHUNK = 1024 * 1024
+
+
+class FakeFilesAPI:
+    """Stands in for WorkspaceClient.files: consumes uploads and counts bytes."""
+
+    def __init__(self):
+        self.uploaded = {}
+
+    def upload(self, file_path, contents, overwrite=False):
+        if isinstance(contents, bytes):
+            self.uploaded[file_path] = len(contents)
+            return
+        total = 0
+        while True:
+            chunk = contents.read(READ_CHUNK)
+            if not chunk:
+                break
+            total += len(chunk)
+        self.uploaded[file_path] = total
+
+
+class FakeWorkspaceClient:
+    def __init__(self):
+        self.files = FakeFilesAPI()
+
+
+def current_rss():
+    """Current resident set size in bytes (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class PeakRSS:
+    """Sample RSS on a background thread to find the peak during a block."""
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(0.002):
+            self.peak = max(self.peak, current_rss())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def upload_via_tempfile(generator, workspace, df, output_path):
+    """The previous implementation: write a temp file, read it back, upload the bytes."""
+    with tempfile.NamedTemporaryFile(mode="w", suffix=generator.output_format.extension, delete=False) as temp_file:
+        generator.output_format.write(df, temp_file.name, generator.schema)
+        with open(temp_file.name, "rb") as f:
+            workspace.files.upload(file_path=output_path, contents=f.read(), overwrite=True)
+        os.unlink(temp_file.name)
+
+
+def run_mode(mode, rows, output_format):
+    workspace = FakeWorkspaceClient()
+    schema = schema_registry.get(SCHEMA).with_overrides(num_rows=rows)
+    generator = FactGenerator(schema, "/Volumes/bench/stream", KEY_INDEX,
+                              is_local=False, output_format=output_format)
+    generator._get_workspace_client = lambda: workspace
+    df = generator.generate_data()
+    output_path = f"/Volumes/bench/stream/data{generator.output_format.extension}"
+
+    baseline = current_rss()
+    start = time.perf_counter()
+    with PeakRSS() as rss:
+        if mode == "tempfile":
+            upload_via_tempfile(generator, workspace, df, output_path)
+        else:
+            generator._save_to_databricks(df, output_path)
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "seconds": elapsed,
+        "bytes": workspace.files.uploaded[output_path],
+        "peak_rss_delta_mb": (rss.peak - baseline) / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--format", default="csv")
+    parser.add_argument("--mode", choices=["tempfile", "stream"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.rows, args.format)))
+        return
+
+    print(f"{'mode':<10} {'bytes':>12} {'seconds':>10} {'peak RSS +MB':>14}")
+    for mode in ("tempfile", "stream"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--rows", str(args.rows), "--format", args.format],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<10} {result['bytes']:>12,} {result['seconds']:>10.3f} {result['peak_rss_delta_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,37 @@
-from .base_generator import BaseGenerator
+from .base_generator import BaseGenerator, SaveResult
 from .dimension_generator import DimensionGenerator
 from .fact_generator import FactGenerator
 from .change_feed_generator import ChangeFeedGenerator
 from .weather_generator import WeatherGenerator
+from .state_store import StateStore
+from .key_state import KeyStateStore
+from .output_formats import OUTPUT_FORMATS, DEFAULT_OUTPUT_FORMAT, get_output_format
+from .workspace_pool import WorkspaceClientPool, workspace_client_pool, get_workspace_client
+from .generator_factory import create_generator
+from .table_runner import TableRunner
+from .value_pools import ValuePool, ValuePoolCache, value_pool_cache, get_value_pool
+from .format_templates import FormatTemplate, compile_format
+from .seeding import KeyedRandom
+from .rate_controller import RateController, get_target_rate
+from .table_scheduler import TableScheduler, get_cadence
+from .compactor import Compactor, CompactionResult
+from .key_index import KeyIndex
+from .distributions import Distribution, compile_distribution
+from .event_time import EventTime, EventTimeTracker, compile_event_time
+from .volume_cleanup import VolumeCleaner, LocalFilesAPI, CleanupResult, CleanupError
+from .generation_engine import GenerationEngine, generate_and_save_table, scale_schema
+from .generation_worker import GenerationWorker
+from .cli import run_generation
+from .schema_registry import SchemaError, ColumnSpec, CompiledSchema, SchemaRegistry, schema_registry
 
-__all__ = ['BaseGenerator', 'DimensionGenerator', 'FactGenerator', 'ChangeFeedGenerator', 'WeatherGenerator'] 
\ No newline at end of file
+__all__ = ['BaseGenerator', 'SaveResult', 'DimensionGenerator', 'FactGenerator', 'ChangeFeedGenerator', 'WeatherGenerator', 'StateStore', 'KeyStateStore',
+           'OUTPUT_FORMATS', 'DEFAULT_OUTPUT_FORMAT', 'get_output_format',
+           'WorkspaceClientPool', 'workspace_client_pool', 'get_workspace_client',
+           'create_generator', 'TableRunner',
+           'ValuePool', 'ValuePoolCache', 'value_pool_cache', 'get_value_pool',
+           'FormatTemplate', 'compile_format',
+           'KeyedRandom', 'RateController', 'get_target_rate', 'TableScheduler', 'get_cadence',
+           'Compactor', 'CompactionResult', 'KeyIndex', 'Distribution', 'compile_distribution',
+           'EventTime', 'EventTimeTracker', 'compile_event_time', 'VolumeCleaner', 'LocalFilesAPI', 'CleanupResult', 'CleanupError',
+           'GenerationEngine', 'generate_and_save_table', 'scale_schema', 'GenerationWorker', 'run_generation',
+           'SchemaError', 'ColumnSpec', 'CompiledSchema', 'SchemaRegistry', 'schema_registry'] 
\ No newline at end of file
@@ -2,46 +2,146 @@ from abc import ABC, abstractmethod
 import pandas as pd
 import os
 from datetime import datetime
-import tempfile
 import logging
 import random
+import itertools
+import time
+import uuid
+from collections import namedtuple
+from collections.abc import Mapping
+
+import numpy as np
+from faker import Faker
+
+from .state_store import StateStore
+from .output_formats import get_output_format, pipe_serialized
+from .workspace_pool import get_workspace_client
+from .seeding import resolve_seed, derive_seed_sequence
+from .value_pools import DEFAULT_POOL_SIZE, faker_provider_for, get_value_pool
+from .format_templates import compile_format
+from .schema_registry import CompiledSchema, schema_registry
+from .volume_cleanup import VolumeCleaner
+from .event_time import event_time_stats
 
 logger = logging.getLogger(__name__)
 
+# Rows per generated chunk; larger tables are written as rolling part files
+DEFAULT_CHUNK_ROWS = int(os.environ.get('STREAMFORGE_CHUNK_ROWS', '1000000'))
+
+# Identifies this process in file names, so concurrent writers into one table directory never collide
+WRITER_ID = f"{os.getpid()}{uuid.uuid4().hex[:6]}"
+# Monotonic per-process file sequence; next() on a count is atomic under the GIL
+_file_sequence = itertools.count(1)
+
+
+def unique_file_stem(prefix='data'):
+    """Unique file name stem: prefix, microsecond timestamp, writer id and sequence number."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return f"{prefix}_{timestamp}_{WRITER_ID}_{next(_file_sequence):06d}"
+
+# What one save produced: the first file's path plus totals across its files, for
+# dimensions the {column: array} of key values written, and for event-time facts
+# the lag and lateness of the event times written (see event_time.py)
+SaveResult = namedtuple('SaveResult', ['path', 'rows', 'files', 'bytes', 'keys', 'event_time'],
+                        defaults=(None, None))
+
 class BaseGenerator(ABC):
-    def __init__(self, schema_path, output_base_path, is_local=True):
-        self.schema_path = schema_path
+    def __init__(self, schema, output_base_path, is_local=True, output_format=None, seed=None, iteration=0):
         self.output_base_path = output_base_path
         self.is_local = is_local
-        self.schema = self._load_schema()
+        self.output_format = get_output_format(output_format)
+        # State produced by generate_data, persisted only once save_data succeeds
+        self._pending_state = None
+        # Rows, files and bytes written by this generator, for rate reporting
+        self.write_stats = {'rows': 0, 'files': 0, 'bytes': 0}
+        # Columns whose written values are collected for the key index (a dimension's own keys)
+        self.key_columns = ()
+        self._written_keys = {}
+        # Column whose written values are measured for event-time lag and lateness
+        self.event_time_column = None
+        self._event_time_stats = None
+        # A CompiledSchema from the registry; a YAML path is resolved through the registry cache
+        self.schema = self._load_schema(schema)
+        self.schema_path = self.schema.path
+        self.iteration = iteration
+        self._init_random(seed)
         
+    def _init_random(self, run_seed):
+        """Set up this table's NumPy, stdlib and Faker random streams.
+
+        All three are derived from one SeedSequence per table and iteration, so a
+        seeded run is reproducible regardless of which tables run where.
+        """
+        self.seed = resolve_seed(run_seed, self.schema)
+        self.seed_sequence = derive_seed_sequence(self.seed, self.schema.get('table'), self.iteration)
+        self.rng = np.random.default_rng(self.seed_sequence)
+        random_seed, faker_seed = self.seed_sequence.generate_state(2)
+        self.random = random.Random(int(random_seed))
+        self.fake = Faker()
+        if self.seed is not None:
+            self.fake.seed_instance(int(faker_seed))
+    
+    def _partition_rng(self, partition):
+        """Return an independent NumPy generator for one partition of this table's output."""
+        return np.random.default_rng(
+            derive_seed_sequence(self.seed, self.schema.get('table'), self.iteration, partition)
+        )
+    
+    def _now(self):
+        """Current time, pinned to midnight in seeded runs so 'now' end dates are reproducible."""
+        now = datetime.now()
+        if self.seed is not None:
+            return datetime.combine(now.date(), datetime.min.time())
+        return now
+    
+    def _value_pool(self, provider, cardinality=None):
+        """Return the shared pre-generated value pool for a Faker provider."""
+        return get_value_pool(provider, size=max(DEFAULT_POOL_SIZE, cardinality or 0), seed=self.seed)
+    
     def _is_local_env(self):
         """Check if running in local environment."""
         return self.is_local
         
-    def _load_schema(self):
-        """Load schema from YAML file."""
-        import yaml
-        logger.info(f"Loading schema from: {self.schema_path}")
-        
-        # If schema_path is None, return an empty schema (used for cleanup operations)
-        if self.schema_path is None:
-            return {"table": "temp", "columns": []}
+    def _load_schema(self, schema):
+        """Return the compiled schema for a CompiledSchema or YAML path."""
+        # If schema is None, return an empty schema (used for cleanup operations)
+        if schema is None:
+            return CompiledSchema(None, {"table": "temp", "columns": []})
+        if isinstance(schema, CompiledSchema):
+            return schema
             
         try:
-            with open(self.schema_path) as f:
-                return yaml.safe_load(f)
+            return schema_registry.get(schema)
         except Exception as e:
             logger.error(f"Error loading schema from file: {str(e)}")
             raise
     
-    def _get_output_path(self, table_name):
-        """Generate output path for the generated data."""
+    def _get_industry(self):
+        """Industry name, taken from the schema's parent directory."""
+        return self.schema.industry
+    
+    def _load_state(self):
+        """Load this table's persisted cross-iteration state."""
+        return StateStore(self.output_base_path).load(self._get_industry(), self.schema['table'])
+    
+    def _save_state(self, state):
+        """Persist this table's cross-iteration state."""
+        StateStore(self.output_base_path).save(self._get_industry(), self.schema['table'], state)
+    
+    def _get_output_path(self, table_name, part=None, stem=None):
+        """Generate output path for the generated data.
+
+        Names are data_<timestamp>_<writer>_<sequence>, unique even for many
+        files per second from several processes. part numbers the files of a
+        table written in several parts (<stem>_part-0001.csv, ...); all parts
+        share one stem.
+        """
+        stem = stem or unique_file_stem()
+        suffix = f"_part-{part:04d}" if part is not None else ""
         if self._is_local_env():
             # Local environment: use standard path joining
-            table_dir = os.path.join(self.output_base_path, os.path.basename(os.path.dirname(self.schema_path)), table_name)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            return os.path.join(table_dir, f"data_{timestamp}.csv")
+            table_dir = os.path.join(self.output_base_path, self._get_industry(), table_name)
+            return os.path.join(table_dir, f"{stem}{suffix}{self.output_format.extension}")
         else:
             # Databricks environment: ensure path starts with /Volumes/
             if not self.output_base_path.startswith('/Volumes/'):
@@ -49,9 +149,8 @@ class BaseGenerator(ABC):
                 self.output_base_path = f"/Volumes/{self.output_base_path.lstrip('/')}"
             
             # Use forward slashes for Databricks paths
-            table_dir = f"{self.output_base_path}/{os.path.basename(os.path.dirname(self.schema_path))}/{table_name}"
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            return f"{table_dir}/data_{timestamp}.csv"
+            table_dir = f"{self.output_base_path}/{self._get_industry()}/{table_name}"
+            return f"{table_dir}/{stem}{suffix}{self.output_format.extension}"
     
     def _check_directory_empty(self, directory):
         """Check if directory is empty and clean it up if needed."""
@@ -70,75 +169,39 @@ class BaseGenerator(ABC):
             else:
                 logger.info(f"Directory {directory} does not exist - will be created when needed")
         else:
-            # Databricks environment check and cleanup
-            from databricks.sdk import WorkspaceClient
-            workspace = WorkspaceClient()
-            
-            # Remove trailing slash for directory operations
-            directory = directory.rstrip('/')
-            
-            def delete_directory_recursive(dir_path):
-                """Recursively delete a directory and its contents."""
-                try:
-                    # List contents of the directory
-                    contents = list(workspace.files.list_directory_contents(dir_path))
-                    if contents:
-                        for item in contents:
-                            if item.is_directory:
-                                # Recursively delete subdirectories
-                                delete_directory_recursive(item.path)
-                            else:
-                                # Delete files
-                                workspace.files.delete(item.path)
-                        # Delete the empty directory
-                        workspace.files.delete_directory(dir_path)
-                        logger.info(f"Successfully cleaned up directory: {dir_path}")
-                except Exception as e:
-                    if "not found" not in str(e).lower():
-                        logger.error(f"Error cleaning up directory {dir_path}: {str(e)}")
-                        raise
-            
+            # Databricks environment: list the tree once, then delete concurrently with retries
+            cleaner = VolumeCleaner(self._get_workspace_client().files)
             try:
-                # Check if directory exists and has contents
-                contents = list(workspace.files.list_directory_contents(directory))
-                if contents:
-                    logger.info(f"Directory {directory} is not empty. Cleaning up...")
-                    delete_directory_recursive(directory)
+                result = cleaner.clean(directory)
             except Exception as e:
-                # If directory doesn't exist, that's fine - it will be created
-                if "not found" in str(e).lower():
-                    logger.info(f"Directory {directory} does not exist - will be created when needed")
-                else:
-                    logger.error(f"Unexpected error checking directory {directory}: {str(e)}")
-                    raise
+                logger.error(f"Error cleaning up directory {directory}: {str(e)}")
+                raise
+            if result is None:
+                logger.info(f"Directory {directory} does not exist - will be created when needed")
+            elif result.files:
+                logger.info(f"Successfully cleaned up directory: {directory}")
+    
+    def _get_workspace_client(self):
+        """Return the shared Databricks workspace client for UC volume operations."""
+        return get_workspace_client()
     
     def _save_to_databricks(self, df, output_path):
-        """Save data to Databricks UC volume using SDK."""
-        from databricks.sdk import WorkspaceClient
-        workspace = WorkspaceClient()
+        """Save data to Databricks UC volume using SDK. Returns the number of bytes uploaded."""
+        workspace = self._get_workspace_client()
         
-        print(f"DEBUG - Full output path being used: {output_path}")
+        logger.debug(f"Uploading to {output_path}")
         
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as temp_file:
-            df.to_csv(temp_file.name, index=False)
-            
-            # Use Databricks SDK to write to UC volume
-            with open(temp_file.name, 'rb') as f:
-                workspace.files.upload(
-                    file_path=output_path,
-                    contents=f.read(),
-                    overwrite=True
-                )
-            
-            # Clean up the temporary file
-            os.unlink(temp_file.name)
+        # Stream the serialized data straight into the upload instead of staging a temp file
+        return pipe_serialized(
+            df, self.output_format,
+            lambda contents: workspace.files.upload(file_path=output_path, contents=contents, overwrite=True),
+            self.schema
+        )
     
-    def save_data(self, df, table_name):
-        """Save generated data to CSV file."""
-        output_path = self._get_output_path(table_name)
+    def _write_file(self, df, output_path):
+        """Write one DataFrame to output_path, locally or to a UC volume."""
         output_dir = os.path.dirname(output_path)
         
-        logger.info(f"Saving data for table {table_name}")
         logger.info(f"Output directory: {output_dir}")
         logger.info(f"Full output path: {output_path}")
         logger.info(f"Environment: {'Local' if self._is_local_env() else 'Databricks'}")
@@ -150,7 +213,8 @@ class BaseGenerator(ABC):
                 logger.info(f"Creating directory: {output_dir}")
                 os.makedirs(output_dir, exist_ok=True)
                 logger.info(f"Writing data to: {output_path}")
-                df.to_csv(output_path, index=False)
+                self.output_format.write(df, output_path, self.schema)
+                size = os.path.getsize(output_path)
                 logger.info("Data saved successfully")
             except Exception as e:
                 logger.error(f"Error saving data locally: {str(e)}")
@@ -159,21 +223,124 @@ class BaseGenerator(ABC):
             # Databricks deployment: use SDK to write to UC volume
             logger.info("Databricks environment detected - using SDK")
             try:
-                self._save_to_databricks(df, output_path)
+                size = self._save_to_databricks(df, output_path)
                 logger.info("Data saved successfully via Databricks SDK")
             except Exception as e:
                 logger.error(f"Error saving data via Databricks SDK: {str(e)}")
                 raise
+        
+        self.write_stats['rows'] += len(df)
+        self.write_stats['files'] += 1
+        self.write_stats['bytes'] += size
+        for col in self.key_columns:
+            if col in df:
+                self._written_keys.setdefault(col, []).append(df[col].to_numpy())
+        if self.event_time_column in df:
+            self._event_time_stats = event_time_stats(df[self.event_time_column].to_numpy(), self._event_time_stats)
+    
+    def save_result(self, path):
+        """SaveResult for everything this generator has written so far."""
+        keys = {col: np.concatenate(parts) for col, parts in self._written_keys.items()} or None
+        return SaveResult(path, keys=keys, event_time=self._event_time_stats, **self.write_stats)
+    
+    def _commit_state(self):
+        """Persist state produced by generate_data now that its output is saved."""
+        if self._pending_state is not None:
+            self._save_state(self._pending_state)
+            self._pending_state = None
+    
+    def save_data(self, df, table_name):
+        """Save generated data in the configured output format."""
+        output_path = self._get_output_path(table_name)
+        
+        logger.info(f"Saving data for table {table_name}")
+        self._write_file(df, output_path)
+        self._commit_state()
             
         logger.info(f"Generated file: {output_path}")
         return output_path
     
+    def save_chunks(self, chunks, table_name, skip_empty=False):
+        """Save a stream of DataFrame chunks, holding at most two chunks in memory.
+
+        A single chunk is saved like save_data; more chunks are written as
+        rolling part files, one per chunk. Returns the first file's path, or
+        None if skip_empty is set and there were no rows.
+        """
+        chunks = iter(chunks)
+        first = next(chunks, None)
+        second = next(chunks, None)
+        if second is None:
+            if first is None or (skip_empty and first.empty):
+                return None
+            return self.save_data(first, table_name)
+        
+        stem = unique_file_stem()
+        first_path = None
+        part = 0
+        rows = 0
+        pending = [first, second]
+        while pending:
+            chunk = pending.pop(0)
+            part += 1
+            output_path = self._get_output_path(table_name, part=part, stem=stem)
+            first_path = first_path or output_path
+            logger.info(f"Saving part {part} ({len(chunk)} rows) for table {table_name}")
+            self._write_file(chunk, output_path)
+            rows += len(chunk)
+            # Drop the saved chunk before generating the next one
+            del chunk
+            next_chunk = next(chunks, None)
+            if next_chunk is not None:
+                pending.append(next_chunk)
+        self._commit_state()
+        
+        logger.info(f"Generated {part} part files ({rows} rows) for table {table_name}")
+        return first_path
+    
+    def micro_batch_config(self):
+        """(files_per_sec, rows_per_file) from generator_config.micro_batch, or None when not set."""
+        config = (self.schema.get('generator_config') or {}).get('micro_batch')
+        if not config:
+            return None
+        return float(config.get('files_per_sec', 10)), int(config.get('rows_per_file', 100))
+    
+    def save_micro_batches(self, df, table_name, files_per_sec, rows_per_file, clock=time.monotonic):
+        """Trickle a DataFrame out as many small files, paced at files_per_sec.
+
+        Each file holds up to rows_per_file rows and gets its own unique name,
+        so downstream streaming readers see a steady flow of small arrivals.
+        File i is written at start + i / files_per_sec. Returns the first
+        file's path, or None if there were no rows.
+        """
+        if df.empty:
+            return None
+        started = clock()
+        files_before, bytes_before = self.write_stats['files'], self.write_stats['bytes']
+        first_path = None
+        for index, offset in enumerate(range(0, len(df), rows_per_file)):
+            delay = started + index / files_per_sec - clock()
+            if delay > 0:
+                time.sleep(delay)
+            output_path = self._get_output_path(table_name)
+            first_path = first_path or output_path
+            self._write_file(df.iloc[offset:offset + rows_per_file], output_path)
+        self._commit_state()
+        
+        # Only this call's files, since write_stats also counts earlier saves
+        files = self.write_stats['files'] - files_before
+        written = self.write_stats['bytes'] - bytes_before
+        elapsed = max(clock() - started, 1e-9)
+        logger.info(f"Wrote {files} micro-batch files for table {table_name} "
+                    f"({files / elapsed:.1f} files/s, {written / elapsed:.0f} bytes/s)")
+        return first_path
+    
     def _generate_value(self, col, col_def):
         """Base method for generating values based on data type."""
         # Check for null probability first
-        if isinstance(col_def, dict):
+        if isinstance(col_def, Mapping):
             null_prob = col_def.get('null_probability', 0.0)
-            if random.random() < null_prob:
+            if self.random.random() < null_prob:
                 return None
             
             dtype = col_def.get('type', 'string')
@@ -183,53 +350,25 @@ class BaseGenerator(ABC):
             dtype = str(col_def).lower()  # Convert to lowercase string
             format_spec = None
             
-        col_lower = col.lower()
-        
         # Handle basic data types
         if dtype == 'int':
-            return random.randint(1, 9999)
+            return self.random.randint(1, 9999)
         elif dtype == 'float':
-            return round(random.uniform(0, 1000), 2)
+            return round(self.random.uniform(0, 1000), 2)
         elif dtype == 'bool':
-            return random.choice([True, False])
+            return self.random.choice([True, False])
         elif dtype == 'string':
             if format_spec:
-                if '|' in format_spec:
-                    # Handle pipe-separated formats (e.g., "RES|COM|IND")
-                    return random.choice(format_spec.split('|'))
-                elif '#' in format_spec:
-                    # Handle formats with hash symbols for random digits
-                    result = format_spec
-                    while '#' in result:
-                        result = result.replace('#', str(random.randint(0, 9)), 1)
-                    return result
-                elif '?' in format_spec:
-                    # Handle formats with question marks for random letters
-                    result = format_spec
-                    while '?' in result:
-                        result = result.replace('?', random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ'), 1)
-                    return result
-                else:
-                    # Simple catch-all: return format as-is
-                    return format_spec
-            elif 'name' in col_lower:
-                return self.fake.name()
-            elif 'email' in col_lower:
-                return self.fake.email()
-            elif 'address' in col_lower:
-                return self.fake.address()
-            elif 'city' in col_lower:
-                return self.fake.city()
-            elif 'state' in col_lower:
-                return self.fake.state()
-            elif 'zip' in col_lower:
-                return self.fake.zipcode()
-            elif ('contact' in col_lower or 'phone' in col_lower) and 'number' in col_lower:
-                return f"({self.fake.random_number(digits=3)}) {self.fake.random_number(digits=3)}-{self.fake.random_number(digits=4)}"
+                # Pipe choices ("RES|COM|IND"), '#' digits, '?' letters or a literal,
+                # parsed once per spec and cached
+                weights = col_def.get('weights') if isinstance(col_def, Mapping) else None
+                return compile_format(format_spec, weights).render_one(self.random)
             else:
-                return self.fake.word().title()
+                # Faker values (names, emails, addresses, ...) are sampled from a pre-generated pool
+                cardinality = col_def.get('cardinality') if isinstance(col_def, Mapping) else None
+                return self._value_pool(faker_provider_for(col), cardinality).pick(self.random, cardinality)
         elif dtype == 'datetime':
-            return self.fake.date_time().isoformat()
+            return self.fake.date_time(end_datetime=self._now()).isoformat()
             
         error_msg = f"Unsupported data type: {dtype}"
         if format_spec:
@@ -239,4 +378,17 @@ class BaseGenerator(ABC):
     @abstractmethod
     def generate_data(self):
         """Generate data based on schema. Must be implemented by subclasses."""
-        raise NotImplementedError("Subclasses must implement generate_data()") 
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement generate_data()")
+    
+    def _chunk_rows(self):
+        """Rows per chunk: generator_config.chunk_rows, else STREAMFORGE_CHUNK_ROWS."""
+        return int(self.schema.get('generator_config', {}).get('chunk_rows') or DEFAULT_CHUNK_ROWS)
+    
+    def generate_chunks(self):
+        """Yield the table's data as DataFrames of bounded size.
+
+        Generators that can produce rows incrementally override this so peak
+        memory depends on the chunk size, not the table size; by default the
+        whole table is a single chunk.
+        """
+        yield self.generate_data()
@@ -1,120 +1,325 @@
 from .base_generator import BaseGenerator
+from .column_engine import ColumnarEngine
+from .key_state import DELETED, LIVE, KeyStateStore
+from .seeding import KeyedRandom, derive_seed_sequence
+import numpy as np
 import pandas as pd
-from faker import Faker
-import random
-from datetime import datetime, timedelta
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+# Operation codes used while assembling the feed
+INSERT = 0
+UPDATE = 1
+DELETE = 2
+OPERATIONS = np.array(['INSERT', 'UPDATE', 'DELETE'], dtype=object)
+
+# Defaults for the stateful change_feed_rules
+DEFAULT_MUTATION_RATE = 0.1
+DEFAULT_REINSERT_PROBABILITY = 0.5
+
 
 class ChangeFeedGenerator(BaseGenerator):
-    def __init__(self, schema_path, output_base_path, is_local=True):
-        super().__init__(schema_path, output_base_path, is_local=is_local)
-        self.fake = Faker()
+    """Generates a CDC feed (INSERT, UPDATEs, optional DELETE per key) for APPLY CHANGES.
+
+    The feed is built in bulk: per-key change counts, gaps between changes and
+    updated field values are drawn as arrays over all rows at once. Rows are
+    grouped by key, and every key's change_timestamp values are strictly
+    increasing.
+
+    The first iteration inserts keys 1..num_rows within time_range. Later
+    iterations mutate those keys: a mutation_rate share of them gets UPDATEs
+    and possibly a DELETE (deleted keys may be re-INSERTed), sequenced after
+    each key's previous change. By default time_range's end is rolling, so
+    later changes run past end_date; with time_range.rolling: false they are
+    squeezed in before end_date, and keys with no room left stop changing.
+    Per-key versions and sequence values live in a KeyStateStore, and row
+    values are derived from (key, version) with KeyedRandom, so an UPDATE
+    carries the key's current values for every field it does not change
+    without any values being stored.
+    """
+
+    def __init__(self, schema, output_base_path, key_index=None, is_local=True, output_format=None,
+                 seed=None, iteration=0):
+        super().__init__(schema, output_base_path, is_local=is_local, output_format=output_format,
+                         seed=seed, iteration=iteration)
+        # Foreign keys other than the feed's own key are drawn from the dimension sizes, like a fact's
+        self.key_index = key_index
         self.rules = self.schema['change_feed_rules']
-        
-    def _generate_initial_row(self, customer_id):
-        """Generate the initial INSERT row for a customer."""
-        row = {'customer_id': customer_id, 'operation': 'INSERT'}
-        
-        # Generate values for all columns except operation and customer_id
-        for col, col_def in self.schema['columns'].items():
-            if col not in ['operation', 'customer_id', 'change_timestamp']:
-                row[col] = self._generate_value(col, col_def)
-        
-        return row
-
-    def _generate_value(self, col, col_def):
-        """Generate a value based on column name and data type."""
-        if isinstance(col_def, str):
-            dtype = col_def
-        else:
-            dtype = col_def.get('type', 'string')
-            
-        # Special handling for datetime in change feeds
-        if dtype == 'datetime':
-            return self.fake.date_time_between(
-                start_date=self.rules['time_range']['start_date'],
-                end_date=self.rules['time_range']['end_date']
-            ).isoformat()
-            
-        # Use base implementation for all other types
-        return super()._generate_value(col, col_def)
-
-    def _generate_update_row(self, base_row):
-        """Generate an UPDATE row based on the previous row."""
-        row = base_row.copy()
-        row['operation'] = 'UPDATE'
-        
-        # Update only the allowed fields
-        for field in self.rules['updatable_fields']:
-            if field in self.schema['columns']:
-                col_def = self.schema['columns'][field]
-                row[field] = self._generate_value(field, col_def)
-        
-        return row
-
-    def _generate_delete_row(self, base_row):
-        """Generate a DELETE row based on the previous row."""
-        row = base_row.copy()
-        row['operation'] = 'DELETE'
-        
-        # Null out the specified fields
-        for field in self.rules['delete_null_fields']:
-            row[field] = None
-            
-        return row
-
-    def _generate_timestamps(self, num_changes):
-        """Generate ordered timestamps for changes."""
-        start_date = datetime.strptime(self.rules['time_range']['start_date'], '%Y-%m-%d')
-        end_date = datetime.strptime(self.rules['time_range']['end_date'], '%Y-%m-%d')
-        
-        # Generate random timestamps within the range
-        timestamps = []
-        current_date = start_date
-        for _ in range(num_changes):
-            # Add random days between min and max
-            days_to_add = random.randint(
-                self.rules['time_between_changes']['min'],
-                self.rules['time_between_changes']['max']
-            )
-            current_date += timedelta(days=days_to_add)
-            if current_date > end_date:
-                break
-            timestamps.append(current_date)
-            
-        return sorted(timestamps)
+        self.key_column = self._get_key_column()
+        self.sequence_column = self.rules.get('dlt_config', {}).get('sequence_by', 'change_timestamp')
+        self.start_date = datetime.strptime(self.rules['time_range']['start_date'], '%Y-%m-%d')
+        self.end_date = datetime.strptime(self.rules['time_range']['end_date'], '%Y-%m-%d')
+        self.rolling = self.rules['time_range'].get('rolling', True)
+        self.stateful = self.rules.get('stateful', True)
+        self.key_engine = None
+        self.field_engines = None
+
+    def _get_key_column(self):
+        """The column identifying a row: the first DLT key, falling back to customer_id."""
+        keys = self.rules.get('dlt_config', {}).get('keys') or []
+        if keys and keys[0] in self.schema['columns']:
+            return keys[0]
+        return 'customer_id'
+
+    def _key_state(self):
+        return KeyStateStore(self.output_base_path, self._get_industry(), self.schema['table'])
+
+    def _build_engine(self, exclude):
+        """Compile the value columns, skipping the key, CDC metadata and any excluded columns."""
+        return ColumnarEngine(
+            self.schema,
+            key_index=self.key_index,
+            start_date=self.start_date,
+            end_date=self.end_date,
+            rng=self.rng,
+            seed=self.seed,
+            exclude={self.key_column, 'operation', self.sequence_column, *exclude}
+        )
+
+    def _build_engines(self):
+        """One engine for the columns fixed per key, and one per updatable column."""
+        columns = [col for col in self.schema['columns']
+                   if col not in (self.key_column, 'operation', self.sequence_column)]
+        updatable = [col for col in self.rules['updatable_fields'] if col in columns]
+        self.key_engine = self._build_engine(updatable)
+        self.field_engines = {
+            col: self._build_engine([other for other in columns if other != col])
+            for col in updatable
+        }
+
+    def _draw_change_counts(self, num_keys):
+        """Draw the number of UPDATEs and whether there is a DELETE for each key."""
+        distribution = self.rules['operation_distribution']
+        num_updates = self.rng.integers(0, distribution['UPDATE'] + 1, size=num_keys)
+        will_delete = self.rng.random(num_keys) < distribution['DELETE']
+        return num_updates, will_delete
+
+    def _group_offsets(self, changes, group_starts):
+        """Per-key running totals of gaps drawn from time_between_changes (seconds)."""
+        gap_rule = self.rules['time_between_changes']
+        gaps = self.rng.integers(gap_rule['min'] * SECONDS_PER_DAY, gap_rule['max'] * SECONDS_PER_DAY + 1,
+                                 size=int(changes.sum()))
+        cumulative = np.cumsum(gaps)
+        return cumulative - np.repeat(cumulative[group_starts] - gaps[group_starts], changes)
+
+    def _sequence_timestamps(self, batch, changes, group_starts, positions):
+        """Return strictly increasing epoch seconds for each key's changes.
+
+        Fresh keys are placed within time_range: when a key's changes would run
+        past end_date its offsets are scaled down to fit. Keys with earlier
+        changes continue after their last sequence value, past end_date too
+        unless time_range is not rolling. The position within the key is added
+        so no two changes of a key share a second.
+        """
+        offsets = self._group_offsets(changes, group_starts)
+        if batch['base_sequence'] is not None:
+            if not self.rolling:
+                room = int(self.end_date.timestamp()) - batch['base_sequence'] - changes
+                key_totals = offsets[group_starts + changes - 1]
+                scale = np.minimum(1.0, np.maximum(room, 0) / np.maximum(key_totals, 1))
+                offsets = np.floor(offsets * np.repeat(scale, changes)).astype(np.int64)
+            return np.repeat(batch['base_sequence'], changes) + offsets + positions + 1
+
+        start = int(self.start_date.timestamp())
+        span = int(self.end_date.timestamp()) - start - int(changes.max(initial=0))
+        key_totals = offsets[group_starts + changes - 1]
+        scale = np.minimum(1.0, max(span, 0) / np.maximum(key_totals, 1))
+        return start + np.floor(offsets * np.repeat(scale, changes)).astype(np.int64) + positions
+
+    def _field_versions(self, value_seed, col, keys, versions, insert_versions):
+        """Resolve the version each row's value of an updatable field was last changed at.
+
+        insert_versions is the version of each row's key's latest INSERT, which
+        sets every field, so values never reach back past a DELETE.
+        """
+        change_probability = self.rules.get('update_field_probability', 1.0)
+        field_versions = versions.copy()
+        if change_probability >= 1:
+            return field_versions
+        # Walk back from each version until one where the field changed or the key was INSERTed
+        pending = np.flatnonzero(field_versions > insert_versions)
+        while len(pending):
+            draws = KeyedRandom(value_seed, f"{col}:changed", keys[pending], field_versions[pending])
+            unchanged = draws.random(len(pending)) >= change_probability
+            pending = pending[unchanged]
+            field_versions[pending] -= 1
+            pending = pending[field_versions[pending] > insert_versions[pending]]
+        return field_versions
+
+    def _null_out(self, values, mask):
+        """Set values to null where mask is set, keeping numeric columns numeric."""
+        if values.dtype.kind in 'iub':
+            values = values.astype('Int64' if values.dtype.kind != 'b' else 'boolean')
+        elif values.dtype.kind != 'f':
+            values = values.astype(object)
+        return values.mask(mask, None if values.dtype == object else pd.NA)
+
+    def _initial_batch(self, num_keys, value_seed):
+        """Every key 1..num_keys is INSERTed, then UPDATEd and possibly DELETEd."""
+        num_updates, will_delete = self._draw_change_counts(num_keys)
+        return {
+            'keys': np.arange(1, num_keys + 1, dtype=np.int64),
+            'inserts': np.ones(num_keys, dtype=bool),
+            'num_updates': num_updates,
+            'will_delete': will_delete,
+            'base_version': np.full(num_keys, -1, dtype=np.int64),
+            'base_insert_version': np.zeros(num_keys, dtype=np.int64),
+            'base_sequence': None,
+            'num_keys': num_keys,
+            'value_seed': value_seed,
+            'watermark': None,
+            'reset': True,
+        }
+
+    def _mutation_batch(self, meta, key_state):
+        """Pick previously generated keys to UPDATE, DELETE or re-INSERT, plus any new keys."""
+        num_keys = meta['num_keys']
+        mutation_rate = self.rules.get('mutation_rate', DEFAULT_MUTATION_RATE)
+        reinsert_probability = self.rules.get('reinsert_probability', DEFAULT_REINSERT_PROBABILITY)
+        new_keys = int(self.rules.get('new_keys_per_iteration', 0))
+
+        touched = np.sort(self.rng.choice(num_keys, size=self.rng.binomial(num_keys, mutation_rate), replace=False))
+        status = np.asarray(key_state['status'][touched])
+        # Deleted keys come back with a re-INSERT or stay deleted
+        reinsert = (status == DELETED) & (self.rng.random(len(touched)) < reinsert_probability)
+        touched = touched[(status == LIVE) | reinsert]
+        inserts = reinsert[(status == LIVE) | reinsert]
+        # Live keys get at least one change; re-INSERTs follow the initial distribution
+        num_updates, will_delete = self._draw_change_counts(len(touched))
+        needs_change = ~inserts & (num_updates == 0) & ~will_delete
+        num_updates[needs_change] = 1
+
+        new_updates, new_deletes = self._draw_change_counts(new_keys)
+        watermark = meta['watermark'] if meta.get('watermark') is not None else int(self.start_date.timestamp())
+        batch = {
+            'keys': np.concatenate([touched + 1, np.arange(num_keys + 1, num_keys + new_keys + 1)]).astype(np.int64),
+            'inserts': np.concatenate([inserts, np.ones(new_keys, dtype=bool)]),
+            'num_updates': np.concatenate([num_updates, new_updates]),
+            'will_delete': np.concatenate([will_delete, new_deletes]),
+            'base_version': np.concatenate([
+                np.asarray(key_state['version'][touched], dtype=np.int64), np.full(new_keys, -1, dtype=np.int64)
+            ]),
+            'base_insert_version': np.concatenate([
+                np.asarray(key_state['insert_version'][touched], dtype=np.int64), np.zeros(new_keys, dtype=np.int64)
+            ]),
+            'base_sequence': np.concatenate([
+                np.asarray(key_state['last_sequence'][touched], dtype=np.int64), np.full(new_keys, watermark, dtype=np.int64)
+            ]),
+            'num_keys': num_keys + new_keys,
+            'value_seed': meta['value_seed'],
+            'watermark': watermark,
+            'reset': False,
+        }
+        return batch if self.rolling else self._within_time_range(batch, num_keys)
+
+    def _within_time_range(self, batch, num_keys):
+        """Drop the keys whose changes no longer fit before end_date; kept new keys stay numbered from num_keys + 1."""
+        changes = batch['inserts'] + batch['num_updates'] + batch['will_delete']
+        fits = batch['base_sequence'] + changes <= int(self.end_date.timestamp())
+        dropped = int((~fits).sum())
+        if not dropped:
+            return batch
+        logger.info(f"{dropped} keys of {self.schema['table']} have no room left before end_date - not changing them")
+        for name in ('keys', 'inserts', 'num_updates', 'will_delete', 'base_version', 'base_insert_version', 'base_sequence'):
+            batch[name] = batch[name][fits]
+        new = batch['base_version'] < 0
+        batch['keys'][new] = np.arange(num_keys + 1, num_keys + int(new.sum()) + 1)
+        batch['num_keys'] = num_keys + int(new.sum())
+        return batch
+
+    def _plan_batch(self):
+        """Continue from the saved key state when there is one, otherwise start from scratch."""
+        if self.stateful and self.iteration > 0:
+            meta = self._load_state()
+            key_state = self._key_state().load() if meta else None
+            if key_state is not None:
+                return self._mutation_batch(meta, key_state)
+            logger.info(f"No key state for {self.schema['table']} - generating the initial change feed")
+        value_seed = int(derive_seed_sequence(self.seed, f"{self.schema['table']}:values").generate_state(1, np.uint64)[0])
+        return self._initial_batch(self.schema['num_rows'], value_seed)
+
+    def _assemble(self, batch):
+        """Build the feed rows for a batch of keys; returns the DataFrame and the new key state."""
+        keys = batch['keys']
+        changes = batch['inserts'] + batch['num_updates'] + batch['will_delete']
+        total = int(changes.sum())
+        value_seed = batch['value_seed']
+
+        # Flat row layout: each key's changes are contiguous and in sequence order
+        group_starts = np.cumsum(changes) - changes
+        positions = np.arange(total) - np.repeat(group_starts, changes)
+        group_ends = group_starts + changes - 1
+        operations = np.full(total, UPDATE, dtype=np.int8)
+        operations[group_starts[batch['inserts']]] = INSERT
+        operations[group_ends[batch['will_delete']]] = DELETE
+        is_delete = operations == DELETE
+
+        # Every INSERT/UPDATE creates a new version; a DELETE keeps the version it deletes
+        versions = np.repeat(batch['base_version'], changes) + positions + 1
+        versions[is_delete] -= 1
+        row_keys = np.repeat(keys, changes)
+        insert_versions = np.where(batch['inserts'], batch['base_version'] + 1, batch['base_insert_version'])
+
+        # Fixed columns depend only on the key, updatable ones on the key and field version
+        fixed = KeyedRandom(value_seed, 'fixed', keys, np.zeros(len(keys), dtype=np.int64))
+        df = self.key_engine.generate(len(keys), rng=fixed).take(np.repeat(np.arange(len(keys)), changes))
+        df = df.reset_index(drop=True)
+        for col, engine in self.field_engines.items():
+            field_versions = self._field_versions(value_seed, col, row_keys, versions,
+                                                  np.repeat(insert_versions, changes))
+            draws = KeyedRandom(value_seed, col, row_keys, field_versions)
+            df[col] = engine.generate(total, rng=draws)[col]
+
+        if is_delete.any():
+            for field in self.rules['delete_null_fields']:
+                if field in df.columns:
+                    df[field] = self._null_out(df[field], is_delete)
+
+        seconds = self._sequence_timestamps(batch, changes, group_starts, positions)
+        df[self.key_column] = row_keys
+        df['operation'] = OPERATIONS[operations]
+        df[self.sequence_column] = np.datetime_as_string(seconds.astype('datetime64[s]'), unit='s').astype(object)
+        df = df[[col for col in self.schema['columns'] if col in df.columns]]
+
+        watermark = int(seconds.max()) if total else None
+        if batch['watermark'] is not None:
+            watermark = max(watermark or batch['watermark'], batch['watermark'])
+        state = {
+            'reset': batch['reset'],
+            'keys': keys,
+            'arrays': {
+                'version': versions[group_ends],
+                'status': np.where(batch['will_delete'], DELETED, LIVE),
+                'last_sequence': seconds[group_ends],
+                'insert_version': insert_versions,
+            },
+            'meta': {'num_keys': batch['num_keys'], 'value_seed': value_seed, 'watermark': watermark},
+        }
+        return df, state
 
     def generate_data(self):
-        """Generate all change feed data."""
-        all_rows = []
-        num_customers = self.schema['num_rows']
-        
-        for customer_id in range(1, num_customers + 1):
-            # Generate initial INSERT
-            base_row = self._generate_initial_row(customer_id)
-            
-            # Determine number of changes for this customer
-            num_updates = random.randint(0, self.rules['operation_distribution']['UPDATE'])
-            will_delete = random.random() < self.rules['operation_distribution']['DELETE']
-            
-            # Generate timestamps for all changes
-            num_changes = 1 + num_updates + (1 if will_delete else 0)  # INSERT + UPDATEs + (DELETE if any)
-            timestamps = self._generate_timestamps(num_changes)
-            
-            # Add INSERT with first timestamp
-            base_row['change_timestamp'] = timestamps[0].isoformat()
-            all_rows.append(base_row)
-            
-            # Add UPDATEs
-            current_row = base_row
-            for i in range(num_updates):
-                current_row = self._generate_update_row(current_row)
-                current_row['change_timestamp'] = timestamps[i + 1].isoformat()
-                all_rows.append(current_row)
-            
-            # Add DELETE if needed
-            if will_delete:
-                delete_row = self._generate_delete_row(current_row)
-                delete_row['change_timestamp'] = timestamps[-1].isoformat()
-                all_rows.append(delete_row)
-        
-        return pd.DataFrame(all_rows) 
\ No newline at end of file
+        """Generate the change feed rows for this iteration."""
+        if self.key_engine is None:
+            self._build_engines()
+
+        batch = self._plan_batch()
+        df, state = self._assemble(batch)
+        if self.stateful:
+            self._pending_state = state
+
+        operations = df['operation'].value_counts().to_dict()
+        logger.info(f"Generated {len(df)} change rows for {len(batch['keys'])} keys in {self.schema['table']}: {operations}")
+        return df
+
+    def _save_state(self, state):
+        """Commit the key arrays, then the table's JSON state."""
+        key_state = self._key_state()
+        if state['reset']:
+            key_state.clear()
+        if len(state['keys']):
+            key_state.apply(state['keys'], state['meta']['num_keys'], **state['arrays'])
+        super()._save_state(state['meta'])
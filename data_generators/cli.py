@@ -0,0 +1,126 @@
+"""Headless generation: run an industry's generators without the web app.
+
+Usage:
+    python -m data_generators --industry Gas_Emissions --output-path /tmp/streamforge [options]
+
+Only the data_generators package is imported, never Dash or Flask, so the
+runner starts quickly and many instances can run side by side on a batch
+host. Option defaults come from the same STREAMFORGE_* environment
+variables the app reads.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from .generation_engine import DEFAULT_SCHEMA_BASE_PATH, GenerationEngine
+from .output_formats import OUTPUT_FORMATS, DEFAULT_OUTPUT_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress log lines while a run is in progress
+DEFAULT_PROGRESS_SECONDS = 30.0
+
+
+def run_generation(industry, output_path, duration_seconds=None, progress_seconds=DEFAULT_PROGRESS_SECONDS,
+                   **engine_kwargs):
+    """Generate an industry's data on this thread until duration_seconds pass; returns the final snapshot.
+
+    engine_kwargs are passed to GenerationEngine (output_format, seed,
+    scale_factor, target_rate, generation_workers, ...). Without a duration the
+    run lasts until it fails or is interrupted; Ctrl-C stops it cleanly.
+    """
+    engine = GenerationEngine(industry, output_path, duration_seconds=duration_seconds, **engine_kwargs)
+    engine.start()
+    try:
+        while not engine.join(progress_seconds):
+            snapshot = engine.snapshot()
+            logger.info(f"{industry}: {snapshot['iteration_count']} batches in "
+                        f"{time.time() - snapshot['started_at']:.0f}s")
+    except KeyboardInterrupt:
+        logger.info("Interrupted; stopping generation")
+        engine.stop(timeout=5)
+    return dict(engine.snapshot())
+
+
+def _positive_float(value):
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"expected a positive number, got {value}")
+    return number
+
+
+def build_parser():
+    env = os.environ.get
+    parser = argparse.ArgumentParser(prog='python -m data_generators', description=__doc__.splitlines()[0])
+    parser.add_argument('--industry', required=True, help="Schema directory to generate, e.g. Gas_Emissions")
+    parser.add_argument('--output-path', required=True,
+                        help="Local directory, or a UC volume path starting with /Volumes/")
+    parser.add_argument('--output-format', default=DEFAULT_OUTPUT_FORMAT, choices=list(OUTPUT_FORMATS))
+    parser.add_argument('--schema-path', default=DEFAULT_SCHEMA_BASE_PATH,
+                        help="Directory holding one schema directory per industry")
+    parser.add_argument('--duration', type=_positive_float, default=None, metavar='SECONDS',
+                        help="Stop after this many seconds (default: run until interrupted)")
+    parser.add_argument('--scale-factor', type=_positive_float,
+                        default=float(env('STREAMFORGE_SCALE_FACTOR', '1')),
+                        help="Multiply every table's row counts, keeping references consistent (default 1)")
+    parser.add_argument('--rows-per-sec', type=_positive_float, help="Target rate for every fact table")
+    parser.add_argument('--files-per-min', type=_positive_float, help="Target rate for every fact table")
+    parser.add_argument('--bytes-per-sec', type=_positive_float, help="Target rate for every fact table")
+    parser.add_argument('--seed', type=int, default=int(env('STREAMFORGE_SEED')) if env('STREAMFORGE_SEED') else None)
+    parser.add_argument('--generation-workers', type=int, default=int(env('STREAMFORGE_GENERATION_WORKERS', '1')))
+    parser.add_argument('--upload-workers', type=int, default=int(env('STREAMFORGE_UPLOAD_WORKERS', '4')))
+    parser.add_argument('--table-workers', type=int, default=int(env('STREAMFORGE_TABLE_WORKERS', '4')))
+    parser.add_argument('--interval-seconds', type=_positive_float,
+                        default=float(env('STREAMFORGE_INTERVAL_SECONDS', '15')))
+    parser.add_argument('--compact-interval-seconds', type=float,
+                        default=float(env('STREAMFORGE_COMPACT_INTERVAL_SECONDS', '0')))
+    parser.add_argument('--progress-seconds', type=_positive_float, default=DEFAULT_PROGRESS_SECONDS)
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    return parser
+
+
+def main(argv=None):
+    """Command-line entry point; returns the process exit code."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not os.path.isdir(os.path.join(args.schema_path, args.industry)):
+        parser.error(f"no schemas for industry {args.industry} under {args.schema_path}")
+    logging.basicConfig(level=args.log_level)
+    target_rate = {
+        key: value for key, value in (
+            ('rows_per_sec', args.rows_per_sec),
+            ('files_per_min', args.files_per_min),
+            ('bytes_per_sec', args.bytes_per_sec),
+        ) if value is not None
+    }
+    snapshot = run_generation(
+        args.industry,
+        args.output_path,
+        duration_seconds=args.duration,
+        progress_seconds=args.progress_seconds,
+        schema_base_path=args.schema_path,
+        output_format=args.output_format,
+        seed=args.seed,
+        generation_workers=args.generation_workers,
+        upload_workers=args.upload_workers,
+        table_workers=args.table_workers,
+        interval_seconds=args.interval_seconds,
+        compact_interval_seconds=args.compact_interval_seconds,
+        scale_factor=args.scale_factor,
+        target_rate=target_rate or None,
+    )
+    logger.info(f"Generated {snapshot['iteration_count']} batches for {args.industry}")
+    if snapshot['rate_report']:
+        logger.info(f"Rate report: {snapshot['rate_report']}")
+    if snapshot['event_time_report']:
+        logger.info(f"Event time report: {snapshot['event_time_report']}")
+    if snapshot['error']:
+        logger.error(f"Generation failed: {snapshot['error']}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import logging
+from collections.abc import Mapping
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .value_pools import DEFAULT_POOL_SIZE, faker_provider_for, get_value_pool
+from .format_templates import compile_format
+from .schema_registry import DEFAULT_FLOAT_RANGE, DEFAULT_INT_RANGE, SUPPORTED_TYPES, CompiledSchema, compile_columns
+from .key_index import column_reference
+
+logger = logging.getLogger(__name__)
+
+# Column kinds produced by ColumnarEngine._compile_column
+FOREIGN_KEY = 'foreign_key'
+QUALITY = 'quality'
+INT = 'int'
+FLOAT = 'float'
+BOOL = 'bool'
+DATETIME = 'datetime'
+TEMPLATE = 'template'
+VALUE_POOL = 'value_pool'
+
+
+class ColumnPlan:
+    """Compiled generation plan for a single column."""
+
+    __slots__ = ('name', 'kind', 'null_probability', 'params')
+
+    def __init__(self, name, kind, null_probability=0.0, **params):
+        self.name = name
+        self.kind = kind
+        self.null_probability = null_probability
+        self.params = params
+
+    def __repr__(self):
+        return f"ColumnPlan({self.name!r}, {self.kind!r}, null_probability={self.null_probability})"
+
+
+class ColumnarEngine:
+    """Compiles a table schema once and generates whole columns as NumPy arrays.
+
+    Column and data quality definitions are resolved into ColumnPlan objects at
+    construction time, so generating a batch is a handful of vectorized draws
+    per column instead of one Python call per cell. Format strings render
+    through compiled FormatTemplates and Faker strings are index draws into
+    shared value pools.
+    """
+
+    def __init__(self, schema, key_index=None, start_date=None, end_date=None,
+                 rng=None, seed=None, exclude=()):
+        self.schema = schema
+        # Columns the caller fills in itself (e.g. keys and CDC metadata)
+        self.exclude = set(exclude)
+        # Foreign keys are drawn from the dimension keys recorded here
+        self.key_index = key_index
+        self.start_date = start_date or datetime(1970, 1, 1)
+        self.end_date = end_date or datetime.now()
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.seed = seed
+        self.plans = self._compile()
+
+    def _compile(self):
+        """Compile every schema column into a ColumnPlan."""
+        # Schemas from the registry carry pre-normalized column specs
+        specs = self.schema.columns if isinstance(self.schema, CompiledSchema) else compile_columns(self.schema)
+        plans = [self._compile_column(spec) for spec in specs if spec.name not in self.exclude]
+        logger.debug(f"Compiled {len(plans)} column plans for {self.schema.get('table', 'unknown')}")
+        return plans
+
+    def _compile_column(self, spec):
+        """Resolve a single ColumnSpec into a ColumnPlan."""
+        col = spec.name
+        null_prob = spec.null_probability
+        dtype = spec.dtype
+        format_spec = spec.format
+        quality_rules = spec.quality_rules
+        distribution = spec.distribution
+        definition = spec.definition if isinstance(spec.definition, Mapping) else {}
+
+        target = self.key_index.resolve(col, column_reference(spec.definition)) if self.key_index else None
+        if target is not None:
+            return ColumnPlan(col, FOREIGN_KEY, null_prob, target=target, distribution=distribution)
+
+        if quality_rules is not None:
+            return ColumnPlan(
+                col, QUALITY, null_prob,
+                min_value=quality_rules.get('min_value'),
+                max_value=quality_rules.get('max_value'),
+                anomaly_percentage=quality_rules.get('anomaly_percentage', 0),
+                distribution=distribution
+            )
+
+        if dtype not in SUPPORTED_TYPES:
+            error_msg = f"Unsupported data type: {dtype}"
+            if format_spec:
+                error_msg += f" with format: {format_spec}"
+            raise ValueError(error_msg)
+
+        if dtype == 'int':
+            low, high = (definition.get(bound, default) for bound, default in zip(('min', 'max'), DEFAULT_INT_RANGE))
+            return ColumnPlan(col, INT, null_prob, distribution=distribution, low=int(low), high=int(high))
+        if dtype == 'float':
+            low, high = (definition.get(bound, default) for bound, default in zip(('min', 'max'), DEFAULT_FLOAT_RANGE))
+            return ColumnPlan(col, FLOAT, null_prob, distribution=distribution, low=float(low), high=float(high))
+        if distribution is not None and (dtype in ('bool', 'datetime') or (format_spec and '|' not in format_spec)):
+            raise ValueError(f"Column {col}: a distribution applies to keys, numbers, choices and value pools, "
+                             f"not {dtype}{' with format ' + format_spec if format_spec else ''}")
+        if dtype == 'bool':
+            return ColumnPlan(col, BOOL, null_prob)
+        if dtype == 'datetime':
+            return ColumnPlan(col, DATETIME, null_prob)
+        if format_spec:
+            return ColumnPlan(col, TEMPLATE, null_prob, template=compile_format(format_spec, spec.weights),
+                              distribution=distribution)
+
+        cardinality = spec.cardinality
+        pool = get_value_pool(faker_provider_for(col), size=max(DEFAULT_POOL_SIZE, cardinality or 0), seed=self.seed)
+        return ColumnPlan(col, VALUE_POOL, null_prob, pool=pool, cardinality=cardinality, distribution=distribution)
+
+    def _render(self, plan, num_rows, rng):
+        """Generate the values for one column plan."""
+        if plan.kind == FOREIGN_KEY:
+            return self.key_index.sample(plan.params['target'], num_rows, rng, plan.params['distribution'])
+        distribution = plan.params.get('distribution')
+        if plan.kind == QUALITY:
+            min_value = plan.params['min_value']
+            max_value = plan.params['max_value']
+            if distribution is not None:
+                values = distribution.values(rng, num_rows, min_value, max_value)
+            else:
+                values = rng.uniform(min_value, max_value, size=num_rows)
+            anomalies = rng.random(num_rows) < plan.params['anomaly_percentage']
+            # Anomalies fall 0.1-0.3 outside the range, half below min and half above max.
+            # Drawn for every row so each row's value depends only on its own draws.
+            offsets = rng.uniform(0.1, 0.3, size=num_rows)
+            below = rng.random(num_rows) < 0.5
+            values = np.where(anomalies, np.where(below, min_value - offsets, max_value + offsets), values)
+            return np.round(values, 2)
+        if plan.kind == INT:
+            if distribution is not None:
+                return distribution.values(rng, num_rows, plan.params['low'], plan.params['high'], integer=True)
+            return rng.integers(plan.params['low'], plan.params['high'] + 1, size=num_rows)
+        if plan.kind == FLOAT:
+            if distribution is not None:
+                return np.round(distribution.values(rng, num_rows, plan.params['low'], plan.params['high']), 2)
+            return np.round(rng.uniform(plan.params['low'], plan.params['high'], size=num_rows), 2)
+        if plan.kind == BOOL:
+            return rng.random(num_rows) < 0.5
+        if plan.kind == DATETIME:
+            start = int(self.start_date.timestamp())
+            end = int(self.end_date.timestamp())
+            seconds = rng.integers(start, max(start, end) + 1, size=num_rows)
+            return np.datetime_as_string(seconds.astype('datetime64[s]'), unit='s').astype(object)
+        if plan.kind == TEMPLATE:
+            return plan.params['template'].render(rng, num_rows, distribution)
+        return plan.params['pool'].sample(rng, num_rows, plan.params['cardinality'], distribution)
+
+    def _apply_nulls(self, plan, values, num_rows, rng):
+        """Mask values with nulls according to the column's null_probability."""
+        if plan.null_probability <= 0:
+            return values
+        mask = rng.random(num_rows) < plan.null_probability
+        if not mask.any():
+            return values
+        if values.dtype.kind == 'f':
+            values = values.copy()
+            values[mask] = np.nan
+            return values
+        if values.dtype.kind in 'iu':
+            return pd.arrays.IntegerArray(values.astype('int64'), mask)
+        if values.dtype.kind == 'b':
+            return pd.arrays.BooleanArray(values, mask)
+        values = values.astype(object)
+        values[mask] = None
+        return values
+
+    def generate(self, num_rows, rng=None):
+        """Generate a DataFrame with num_rows rows from the compiled plans.
+
+        rng overrides the engine's generator for this call, e.g. with a KeyedRandom
+        so values are reproducible per key rather than per position.
+        """
+        rng = rng if rng is not None else self.rng
+        columns = {}
+        for plan in self.plans:
+            values = self._render(plan, num_rows, rng)
+            columns[plan.name] = self._apply_nulls(plan, values, num_rows, rng)
+        return pd.DataFrame(columns)
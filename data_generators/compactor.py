@@ -0,0 +1,153 @@
+import logging
+import os
+import time
+from collections import namedtuple
+
+from .base_generator import unique_file_stem
+from .output_formats import get_output_format, pipe_stream
+from .workspace_pool import get_workspace_client
+
+logger = logging.getLogger(__name__)
+
+# Files younger than this are left alone so streaming readers pick them up first
+DEFAULT_MIN_AGE_SECONDS = float(os.environ.get('STREAMFORGE_COMPACT_MIN_AGE_SECONDS', '300'))
+# Size a compacted file grows to before the next one is started
+DEFAULT_TARGET_FILE_BYTES = int(float(os.environ.get('STREAMFORGE_COMPACT_TARGET_MB', '128')) * 1024 * 1024)
+# A trailing group below the target size is only compacted once it has this many files
+DEFAULT_MIN_FILES = 20
+# Compacted files go to <industry>/_compacted/<table>, outside the directories the pipelines read
+COMPACTED_PREFIX = '_compacted'
+
+FileEntry = namedtuple('FileEntry', ['path', 'size', 'modified'])
+CompactionResult = namedtuple('CompactionResult', ['files_in', 'files_out', 'bytes'])
+
+
+class Compactor:
+    """Rolls older small files of each table up into larger files under a separate prefix.
+
+    Files older than min_age_seconds are merged in name (i.e. arrival) order
+    into files of about target_file_bytes each, written under
+    <industry>/_compacted/<table>/; the originals are deleted once their
+    merged file is written. Fresh files are never touched, so readers still
+    see every new arrival in the table directory first.
+    """
+
+    def __init__(self, output_base_path, industry, output_format=None, is_local=True,
+                 min_age_seconds=None, target_file_bytes=None, min_files=DEFAULT_MIN_FILES, clock=time.time,
+                 schemas=None):
+        self.output_base_path = output_base_path.rstrip('/')
+        self.industry = industry
+        self.output_format = get_output_format(output_format)
+        # {table: schema}, whose column types type the merged Parquet files
+        self.schemas = dict(schemas or {})
+        self.is_local = is_local
+        self.min_age_seconds = DEFAULT_MIN_AGE_SECONDS if min_age_seconds is None else min_age_seconds
+        self.target_file_bytes = target_file_bytes or DEFAULT_TARGET_FILE_BYTES
+        self.min_files = min_files
+        self.clock = clock
+        self.totals = {}
+
+    def _join(self, *parts):
+        if self.is_local:
+            return os.path.join(self.output_base_path, *parts)
+        return '/'.join((self.output_base_path,) + parts)
+
+    def _list_files(self, directory):
+        """Data files directly under directory, as FileEntry tuples sorted by name."""
+        extension = self.output_format.extension
+        entries = []
+        if self.is_local:
+            if not os.path.isdir(directory):
+                return []
+            with os.scandir(directory) as items:
+                for item in items:
+                    if item.is_file() and item.name.startswith('data_') and item.name.endswith(extension):
+                        stat = item.stat()
+                        entries.append(FileEntry(item.path, stat.st_size, stat.st_mtime))
+        else:
+            try:
+                for item in get_workspace_client().files.list_directory_contents(directory):
+                    if not item.is_directory and item.name.startswith('data_') and item.name.endswith(extension):
+                        entries.append(FileEntry(item.path, item.file_size or 0, (item.last_modified or 0) / 1000))
+            except Exception as e:
+                if "not found" in str(e).lower():
+                    return []
+                raise
+        return sorted(entries, key=lambda entry: os.path.basename(entry.path))
+
+    def _groups(self, entries):
+        """Split the files old enough to compact into groups of about target_file_bytes."""
+        cutoff = self.clock() - self.min_age_seconds
+        groups, group, size = [], [], 0
+        for entry in entries:
+            if entry.modified > cutoff:
+                continue
+            group.append(entry)
+            size += entry.size
+            if size >= self.target_file_bytes:
+                groups.append(group)
+                group, size = [], 0
+        # Leave a small trailing group to grow until a later pass
+        if len(group) >= max(self.min_files, 2):
+            groups.append(group)
+        return groups
+
+    def _open_sources(self, group):
+        """Open each file of a group in turn, so only one is open at a time."""
+        for entry in group:
+            if self.is_local:
+                with open(entry.path, 'rb') as source:
+                    yield source
+            else:
+                # Download streams cannot seek; OutputFormat.concat spools Parquet ones to reach the footer
+                with get_workspace_client().files.download(entry.path).contents as source:
+                    yield source
+
+    def _write_group(self, group, output_path, schema=None):
+        """Merge a group of files into output_path; returns the bytes written."""
+        produce = lambda sink: self.output_format.concat(self._open_sources(group), sink, schema)
+        if self.is_local:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            temp_path = f"{output_path}.tmp"
+            with open(temp_path, 'wb') as sink:
+                produce(sink)
+            os.replace(temp_path, output_path)
+            return os.path.getsize(output_path)
+        files = get_workspace_client().files
+        return pipe_stream(
+            produce, lambda contents: files.upload(file_path=output_path, contents=contents, overwrite=True),
+            name='compact-files'
+        )
+
+    def _delete(self, path):
+        if self.is_local:
+            os.remove(path)
+        else:
+            get_workspace_client().files.delete(path)
+
+    def compact_table(self, table):
+        """Compact one table's older files; returns a CompactionResult for this pass."""
+        entries = self._list_files(self._join(self.industry, table))
+        files_in = files_out = written = 0
+        for group in self._groups(entries):
+            output_path = self._join(self.industry, COMPACTED_PREFIX, table,
+                                     f"{unique_file_stem('compacted')}{self.output_format.extension}")
+            written += self._write_group(group, output_path, self.schemas.get(table))
+            # Originals go only after their merged file is complete
+            for entry in group:
+                self._delete(entry.path)
+            files_in += len(group)
+            files_out += 1
+            logger.info(f"Compacted {len(group)} files of {table} into {output_path}")
+        result = CompactionResult(files_in, files_out, written)
+        totals = self.totals.setdefault(table, CompactionResult(0, 0, 0))
+        self.totals[table] = CompactionResult(*(total + value for total, value in zip(totals, result)))
+        return result
+
+    def compact(self, tables):
+        """Compact each table; returns {table: CompactionResult} for this pass."""
+        return {table: self.compact_table(table) for table in tables}
+
+    def report(self):
+        """Files merged, files produced and bytes written per table since this compactor started."""
+        return {table: totals._asdict() for table, totals in self.totals.items()}
@@ -1,17 +1,33 @@
 from .base_generator import BaseGenerator
+from .key_index import column_reference, key_columns
 import pandas as pd
-from faker import Faker
-import random
 
 class DimensionGenerator(BaseGenerator):
-    def __init__(self, schema_path, output_base_path, is_local=True):
-        super().__init__(schema_path, output_base_path, is_local=is_local)
-        self.fake = Faker()
+    def __init__(self, schema, output_base_path, key_index=None, is_local=True, output_format=None, seed=None,
+                 iteration=0):
+        super().__init__(schema, output_base_path, is_local=is_local, output_format=output_format,
+                         seed=seed, iteration=iteration)
+        self.key_index = key_index
+        # Written values of these columns go into the key index for the tables that reference them
+        self.key_columns = tuple(key_columns(self.schema)) if schema is not None else ()
         
     def _generate_value(self, col, col_def):
         """Generate a value based on column definition."""
         return super()._generate_value(col, col_def)
         
+    def _foreign_keys(self):
+        """{column: (table, column)} for the *_id columns that reference another dimension's keys."""
+        if self.key_index is None:
+            return {}
+        foreign_keys = {}
+        for col, col_def in self.schema['columns'].items():
+            if col in self.key_columns or not col.endswith('_id'):
+                continue
+            target = self.key_index.resolve(col, column_reference(col_def))
+            if target is not None and target[0] != self.schema.table:
+                foreign_keys[col] = target
+        return foreign_keys
+        
     def generate_data(self):
         """Generate dimension table data."""
         rows = []
@@ -26,4 +42,9 @@ class DimensionGenerator(BaseGenerator):
                     row[col] = self._generate_value(col, col_def)
             rows.append(row)
             
-        return pd.DataFrame(rows) 
\ No newline at end of file
+        df = pd.DataFrame(rows)
+        # References to other dimensions draw from the keys those dimensions actually wrote
+        distributions = {spec.name: spec.distribution for spec in self.schema.columns or ()}
+        for col, target in self._foreign_keys().items():
+            df[col] = self.key_index.sample(target, num_rows, self.rng, distributions.get(col))
+        return df
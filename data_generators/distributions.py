@@ -0,0 +1,159 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+# Distribution kinds a column's `distribution` spec can name
+UNIFORM = 'uniform'
+ZIPF = 'zipf'
+HOT_KEY = 'hot_key'
+WEIGHTED = 'weighted'
+NORMAL = 'normal'
+EXPONENTIAL = 'exponential'
+DISTRIBUTION_KINDS = (UNIFORM, ZIPF, HOT_KEY, WEIGHTED, NORMAL, EXPONENTIAL)
+
+DEFAULT_ZIPF_S = 1.1
+DEFAULT_HOT_FRACTION = 0.01
+DEFAULT_HOT_SHARE = 0.5
+
+
+class Distribution:
+    """A compiled column distribution, sampled a whole batch at a time.
+
+    positions() draws indices into n ordered values (dimension keys, choices
+    of a format, value pool entries or an integer range); values() draws
+    numbers between low and high. Every sampler uses one draw of rng.random
+    (two for normal) per value, so it works with both a NumPy Generator and
+    a KeyedRandom.
+
+    - zipf: the i-th value is about i**-s as likely as the first
+    - hot_key: hot_share of the draws fall on the first hot_fraction of values
+    - weighted: value i is drawn in proportion to weights[i]
+    - normal: values around mean with stddev, clipped to [low, high]
+    - exponential: values above low with mean distance mean, clipped to high
+    """
+
+    def __init__(self, kind, s=DEFAULT_ZIPF_S, hot_fraction=DEFAULT_HOT_FRACTION, hot_share=DEFAULT_HOT_SHARE,
+                 weights=None, mean=None, stddev=None):
+        if kind not in DISTRIBUTION_KINDS:
+            raise ValueError(f"unknown distribution '{kind}'; expected one of {', '.join(DISTRIBUTION_KINDS)}")
+        self.kind = kind
+        self.s = float(s)
+        self.hot_fraction = float(hot_fraction)
+        self.hot_share = float(hot_share)
+        self.weights = None if weights is None else np.asarray(weights, dtype=float)
+        self.mean = mean
+        self.stddev = stddev
+        if kind == ZIPF and self.s <= 0:
+            raise ValueError("zipf needs s > 0")
+        if kind == HOT_KEY and not (0 < self.hot_fraction < 1 and 0 <= self.hot_share <= 1):
+            raise ValueError("hot_key needs 0 < hot_fraction < 1 and 0 <= hot_share <= 1")
+        if kind == WEIGHTED:
+            if self.weights is None or len(self.weights) == 0 or (self.weights < 0).any() or self.weights.sum() <= 0:
+                raise ValueError("weighted needs a non-empty list of non-negative weights")
+        if kind == NORMAL and stddev is not None and float(stddev) <= 0:
+            raise ValueError("normal needs stddev > 0")
+        if kind == EXPONENTIAL and mean is not None and float(mean) <= 0:
+            raise ValueError("exponential needs mean > 0")
+        # Cumulative probabilities per number of values, built on first use
+        self._cdfs = {}
+
+    def __repr__(self):
+        return f"Distribution({self.kind!r})"
+
+    def __reduce__(self):
+        return (_rebuild, (self.kind, self.s, self.hot_fraction, self.hot_share,
+                           None if self.weights is None else self.weights.tolist(), self.mean, self.stddev))
+
+    def _cdf(self, n):
+        cdf = self._cdfs.get(n)
+        if cdf is None:
+            if self.kind == ZIPF:
+                cdf = np.cumsum(np.arange(1, n + 1, dtype=np.float64) ** -self.s)
+            else:
+                if len(self.weights) != n:
+                    raise ValueError(f"weighted distribution has {len(self.weights)} weights for {n} values")
+                cdf = np.cumsum(self.weights)
+            cdf = cdf / cdf[-1]
+            self._cdfs[n] = cdf
+        return cdf
+
+    def positions(self, rng, n, size):
+        """Draw size indices in [0, n)."""
+        if n <= 0:
+            raise ValueError("cannot sample from zero values")
+        if self.kind == UNIFORM:
+            return rng.integers(0, n, size=size)
+        if self.kind in (ZIPF, WEIGHTED):
+            return np.minimum(np.searchsorted(self._cdf(n), rng.random(size), side='right'), n - 1)
+        if self.kind == HOT_KEY:
+            hot = min(max(1, int(round(n * self.hot_fraction))), n)
+            draws = rng.random(size)
+            # One draw picks both the group and the index inside it
+            in_hot = draws < self.hot_share
+            hot_positions = (draws / max(self.hot_share, 1e-12) * hot).astype(np.int64)
+            cold = n - hot
+            if cold == 0:
+                return np.minimum(hot_positions, n - 1)
+            cold_positions = hot + ((draws - self.hot_share) / max(1 - self.hot_share, 1e-12) * cold).astype(np.int64)
+            return np.where(in_hot, np.minimum(hot_positions, hot - 1), np.minimum(cold_positions, n - 1))
+        if self.kind == EXPONENTIAL:
+            return np.minimum(self._exponential(rng, size, n / 10), n - 1).astype(np.int64)
+        # normal over positions: centred on the middle value unless mean is set
+        return np.clip(np.rint(self._normal(rng, size, (n - 1) / 2, n / 6)), 0, n - 1).astype(np.int64)
+
+    def _normal(self, rng, size, default_mean, default_stddev):
+        mean = default_mean if self.mean is None else float(self.mean)
+        stddev = default_stddev if self.stddev is None else float(self.stddev)
+        # Box-Muller from two uniform draws
+        u1 = 1.0 - rng.random(size)
+        u2 = rng.random(size)
+        return mean + stddev * np.sqrt(-2.0 * np.log(u1)) * np.cos(2 * np.pi * u2)
+
+    def _exponential(self, rng, size, default_mean):
+        mean = default_mean if self.mean is None else float(self.mean)
+        # Inverse transform of one uniform draw
+        return -mean * np.log(1.0 - rng.random(size))
+
+    def values(self, rng, size, low, high, integer=False):
+        """Draw size numbers in [low, high]; integers when integer is set."""
+        if self.kind == EXPONENTIAL:
+            values = np.minimum(low + self._exponential(rng, size, (high - low) / 10), high)
+            return np.rint(values).astype(np.int64) if integer else values
+        if self.kind == NORMAL:
+            values = np.clip(self._normal(rng, size, (low + high) / 2, (high - low) / 6), low, high)
+            return np.rint(values).astype(np.int64) if integer else values
+        if integer:
+            return low + self.positions(rng, int(high - low + 1), size)
+        # Skewed floats: the value's slot of 10,000 buckets follows the distribution
+        buckets = 10000 if self.kind != WEIGHTED else len(self.weights)
+        return low + (self.positions(rng, buckets, size) + rng.random(size)) * (high - low) / buckets
+
+
+def _rebuild(kind, s, hot_fraction, hot_share, weights, mean, stddev):
+    return Distribution(kind, s, hot_fraction, hot_share, weights, mean, stddev)
+
+
+def compile_distribution(spec=None, skew=None):
+    """Compile a column's `distribution` spec (or its `skew` shorthand for zipf); None if neither is set.
+
+    spec is a kind name ("zipf") or a mapping such as {type: zipf, s: 1.2},
+    {type: hot_key, hot_fraction: 0.01, hot_share: 0.5}, {type: weighted,
+    weights: [...]}, {type: normal, mean: 50, stddev: 10} or {type: exponential,
+    mean: 30}.
+    """
+    if spec is None:
+        if not skew:
+            return None
+        return Distribution(ZIPF, s=skew)
+    if isinstance(spec, str):
+        return Distribution(spec)
+    if not isinstance(spec, Mapping):
+        raise ValueError(f"distribution must be a name or a mapping, got {spec!r}")
+    params = dict(spec)
+    kind = params.pop('type', None)
+    if kind is None:
+        raise ValueError("distribution needs a 'type'")
+    unknown = set(params) - {'s', 'hot_fraction', 'hot_share', 'weights', 'mean', 'stddev'}
+    if unknown:
+        raise ValueError(f"unknown distribution options {', '.join(sorted(unknown))}")
+    return Distribution(kind, **params)
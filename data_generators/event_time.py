@@ -0,0 +1,183 @@
+import threading
+import time
+from collections.abc import Mapping
+from datetime import datetime
+
+import numpy as np
+
+from .distributions import compile_distribution
+
+# Window of the first wall-clock batch when no start is configured
+DEFAULT_FIRST_WINDOW_SECONDS = 15.0
+# Late rows arrive up to this many seconds after their event time
+DEFAULT_MAX_DELAY_SECONDS = 300.0
+# Delay of late rows unless event_time.delay says otherwise
+DEFAULT_DELAY = {'type': 'exponential', 'mean': 30}
+
+EVENT_TIME_OPTIONS = {'column', 'start', 'seconds_per_batch', 'late_fraction', 'max_delay_seconds', 'delay'}
+
+
+def parse_timestamp(value):
+    """Epoch seconds of an ISO date or datetime string, date or datetime; naive times are UTC like written ones."""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.timestamp()
+    return np.datetime64(value, 'ms').astype(np.int64) / 1000.0
+
+
+def format_timestamps(seconds):
+    """ISO strings with millisecond precision for an array of epoch seconds."""
+    millis = np.floor(np.asarray(seconds, dtype=np.float64) * 1000).astype(np.int64)
+    return np.datetime_as_string(millis.astype('datetime64[ms]'), unit='ms').astype(object)
+
+
+class EventTime:
+    """A fact table's event-time clock, from generator_config.event_time.
+
+    Each batch covers the window from the persisted watermark to the next
+    one: with seconds_per_batch > 0 the simulated clock advances that many
+    seconds per batch, otherwise windows follow the wall clock. Rows arrive
+    in order through the window, and a late_fraction of them carry an event
+    time up to max_delay_seconds older, with the delay drawn from delay (any
+    column distribution; exponential by default), so they land out of order.
+    """
+
+    def __init__(self, column, start=None, seconds_per_batch=0.0, late_fraction=0.0,
+                 max_delay_seconds=DEFAULT_MAX_DELAY_SECONDS, delay=None):
+        self.column = column
+        self.start = None if start is None else parse_timestamp(start)
+        self.seconds_per_batch = float(seconds_per_batch)
+        self.late_fraction = float(late_fraction)
+        self.max_delay_seconds = float(max_delay_seconds)
+        self.delay = compile_distribution(DEFAULT_DELAY if delay is None else delay)
+        if self.seconds_per_batch < 0:
+            raise ValueError("seconds_per_batch must not be negative")
+        if not 0 <= self.late_fraction <= 1:
+            raise ValueError("late_fraction must be between 0 and 1")
+        if self.max_delay_seconds < 0:
+            raise ValueError("max_delay_seconds must not be negative")
+
+    def __repr__(self):
+        return f"EventTime({self.column!r}, seconds_per_batch={self.seconds_per_batch:g})"
+
+    def window(self, watermark, now):
+        """(start, end) epoch seconds of the next batch after watermark (None for the first batch)."""
+        if self.seconds_per_batch > 0:
+            start = watermark if watermark is not None else (self.start if self.start is not None else now)
+            return start, start + self.seconds_per_batch
+        if watermark is not None:
+            start = watermark
+        elif self.start is not None:
+            start = self.start
+        else:
+            start = now - DEFAULT_FIRST_WINDOW_SECONDS
+        return start, max(start, now)
+
+    def timestamps(self, rng, size, start, end):
+        """Event times of size rows arriving in order through [start, end), some of them late."""
+        arrivals = np.sort(rng.uniform(start, end, size=size)) if end > start else np.full(size, float(start))
+        if self.late_fraction > 0 and size:
+            late = rng.random(size) < self.late_fraction
+            count = int(late.sum())
+            if count:
+                arrivals[late] -= self.delay.values(rng, count, 0.0, self.max_delay_seconds)
+        return arrivals
+
+
+def compile_event_time(schema, columns):
+    """Compile a schema's generator_config.event_time; None when unset.
+
+    column defaults to the table's first datetime column.
+    """
+    spec = (schema.get('generator_config') or {}).get('event_time')
+    if not spec:
+        return None
+    if not isinstance(spec, Mapping):
+        raise ValueError(f"event_time must be a mapping, got {spec!r}")
+    unknown = set(spec) - EVENT_TIME_OPTIONS
+    if unknown:
+        raise ValueError(f"unknown event_time options {', '.join(sorted(unknown))}")
+    datetime_columns = [column.name for column in columns or () if column.dtype == 'datetime']
+    column = spec.get('column') or (datetime_columns[0] if datetime_columns else None)
+    if column not in datetime_columns:
+        raise ValueError(f"event_time column {column!r} is not a datetime column")
+    options = {key: value for key, value in spec.items() if key != 'column'}
+    return EventTime(column, **options)
+
+
+def event_time_stats(values, previous=None, now=None):
+    """Lag and lateness of a written file's event-time values, added to the previous files' stats.
+
+    A row is late when an earlier row (of this file or the previous ones)
+    had a later event time, which is what a streaming watermark sees;
+    lateness is by how much. Returns previous unchanged for a file without
+    event times.
+    """
+    times = np.asarray(values, dtype='datetime64[ms]')
+    times = times[~np.isnat(times)]
+    if times.size == 0:
+        return previous
+    seconds = times.astype(np.int64) / 1000.0
+    if previous is not None:
+        seconds = np.concatenate(([previous['max_event_time']], seconds))
+    lateness = np.maximum.accumulate(seconds) - seconds
+    stats = {
+        'rows': int(times.size),
+        'late_rows': int((lateness > 0).sum()),
+        'max_lateness_seconds': float(lateness.max()),
+        'min_event_time': float(seconds.min()),
+        'max_event_time': float(seconds.max()),
+        'lag_seconds': (time.time() if now is None else now) - float(seconds.max()),
+    }
+    return merge_event_time_stats(previous, stats)
+
+
+def merge_event_time_stats(total, stats):
+    """Combine the stats of two consecutive writes; either may be None."""
+    if total is None or stats is None:
+        return total or stats
+    return {
+        'rows': total['rows'] + stats['rows'],
+        'late_rows': total['late_rows'] + stats['late_rows'],
+        'max_lateness_seconds': max(total['max_lateness_seconds'], stats['max_lateness_seconds']),
+        'min_event_time': min(total['min_event_time'], stats['min_event_time']),
+        'max_event_time': max(total['max_event_time'], stats['max_event_time']),
+        'lag_seconds': stats['lag_seconds'],
+    }
+
+
+class EventTimeTracker:
+    """Running event-time lag and lateness per table, for the engine's event_time_report.
+
+    Lateness is counted within each save, so a batch's rows are not compared
+    with the previous batch's; lag is that of the latest save.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self._lock = threading.Lock()
+
+    def record(self, table, result):
+        """Add a SaveResult's event-time stats (tables without event time are ignored)."""
+        stats = getattr(result, 'event_time', None)
+        if not stats:
+            return
+        with self._lock:
+            self.tables[table] = merge_event_time_stats(self.tables.get(table), stats)
+
+    def report(self):
+        """{table: {watermark, lag_seconds, rows, late_rows, late_fraction, max_lateness_seconds}}, or None."""
+        with self._lock:
+            tables = dict(self.tables)
+        if not tables:
+            return None
+        return {
+            table: {
+                'watermark': format_timestamps([stats['max_event_time']])[0],
+                'lag_seconds': round(stats['lag_seconds'], 3),
+                'rows': stats['rows'],
+                'late_rows': stats['late_rows'],
+                'late_fraction': round(stats['late_rows'] / stats['rows'], 4) if stats['rows'] else 0.0,
+                'max_lateness_seconds': round(stats['max_lateness_seconds'], 3),
+            }
+            for table, stats in tables.items()
+        }
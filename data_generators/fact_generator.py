@@ -1,17 +1,24 @@
 from .base_generator import BaseGenerator
+from .column_engine import ColumnarEngine
+from .event_time import format_timestamps, parse_timestamp
 import pandas as pd
-from faker import Faker
-import random
 from datetime import datetime, timedelta
 import logging
+import math
+import time
 
 logger = logging.getLogger(__name__)
 
+# Rows per independently seeded partition of a batch; changing it changes seeded output
+DEFAULT_PARTITION_ROWS = 100000
+# Smallest partition a small chunk_rows shrinks partitions to
+MIN_PARTITION_ROWS = 10000
+
 class FactGenerator(BaseGenerator):
-    def __init__(self, schema_path, output_base_path, dimension_key_ranges, is_local=True):
-        super().__init__(schema_path, output_base_path, is_local=is_local)
-        self.fake = Faker()
-        self.dimension_key_ranges = dimension_key_ranges
+    def __init__(self, schema, output_base_path, key_index, is_local=True, output_format=None, seed=None, iteration=0):
+        super().__init__(schema, output_base_path, is_local=is_local, output_format=output_format,
+                         seed=seed, iteration=iteration)
+        self.key_index = key_index
         
         # Load date range from schema configuration
         config = self.schema.get('generator_config', {})
@@ -28,91 +35,113 @@ class FactGenerator(BaseGenerator):
         if end_date_str and end_date_str.lower() != 'now':
             self.end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
         else:
-            self.end_date = datetime.now()
+            self.end_date = self._now()
             
         logger.info(f"Configured date range for {self.schema.get('table', 'unknown')}: {self.start_date} to {self.end_date}")
+        self.engine = None
+        self._window = None
         
-    def _generate_value(self, col, col_def):
-        """Generate a value based on column definition."""
-        # Check if there are data quality rules for this column
-        if 'data_quality_rules' in self.schema and col in self.schema['data_quality_rules']:
-            rules = self.schema['data_quality_rules'][col]
-            min_value = rules.get('min_value')
-            max_value = rules.get('max_value')
-            anomaly_percentage = rules.get('anomaly_percentage', 0)
-            
-            # Randomly decide if this value should be an anomaly
-            if random.random() < anomaly_percentage:
-                # Generate an anomalous value outside the normal range
-                if random.random() < 0.5:  # 50% chance of being below min
-                    value = min_value - random.uniform(0.1, 0.3)  # 10-30% below min
-                else:  # 50% chance of being above max
-                    value = max_value + random.uniform(0.1, 0.3)  # 10-30% above max
-            else:
-                # Generate a normal value within the range
-                value = random.uniform(min_value, max_value)
-            
-            # Round to 2 decimal places for float values
-            if isinstance(value, float):
-                value = round(value, 2)
-                
-            return value
-            
-        # Special handling for datetime fields
-        if isinstance(col_def, dict) and col_def.get('type') == 'datetime':
-            return self.fake.date_time_between(
-                start_date=self.start_date,
-                end_date=self.end_date
-            ).isoformat()
-            
-        # Use base implementation for all other types
-        return super()._generate_value(col, col_def)
-
-    def _generate_value_with_quality_rules(self, col, col_def):
-        """Generate a value considering data quality rules if they exist."""
-        value = self._generate_value(col, col_def)
-        
-        # Check if there are data quality rules for this column
-        if 'data_quality_rules' in self.schema and col in self.schema['data_quality_rules']:
-            rules = self.schema['data_quality_rules'][col]
-            min_value = rules.get('min_value')
-            max_value = rules.get('max_value')
-            anomaly_percentage = rules.get('anomaly_percentage', 0)
-            
-            # Randomly decide if this value should be an anomaly
-            if random.random() < anomaly_percentage:
-                # Generate an anomalous value outside the normal range
-                if random.random() < 0.5:  # 50% chance of being below min
-                    value = min_value - random.uniform(0.1, 0.3)  # 10-30% below min
-                else:  # 50% chance of being above max
-                    value = max_value + random.uniform(0.1, 0.3)  # 10-30% above max
-            else:
-                # Generate a normal value within the range
-                value = random.uniform(min_value, max_value)
-            
-            # Round to 2 decimal places for float values
-            if isinstance(value, float):
-                value = round(value, 2)
-        
-        return value
+        # In event-time mode each batch covers the next window of the table's clock
+        # instead of scattering its event column over start_date..end_date
+        self.event_time = self.schema.event_time
+        if self.event_time is not None:
+            self.event_time_column = self.event_time.column
         
+    def _build_engine(self):
+        """Compile the schema into a columnar engine for this generator."""
+        return ColumnarEngine(
+            self.schema,
+            key_index=self.key_index,
+            start_date=self.start_date,
+            end_date=self.end_date,
+            rng=self.rng,
+            seed=self.seed
+        )
+
+    def _event_window(self):
+        """(start, end) epoch seconds of this batch's event-time window; the watermark moves on once saved."""
+        if self._window is not None:
+            return self._window
+        state = self._load_state()
+        watermark = state.get('event_time_watermark')
+        # A simulated clock starts from 'now' pinned like end dates, so seeded runs repeat;
+        # a wall-clock one always follows the real time
+        now = self._now().timestamp() if self.event_time.seconds_per_batch > 0 else time.time()
+        self._window = self.event_time.window(None if watermark is None else parse_timestamp(watermark), now)
+        self._pending_state = {**state, 'event_time_watermark': format_timestamps([self._window[1]])[0]}
+        logger.info(f"Event time window for {self.schema.table}: "
+                    f"{format_timestamps([self._window[0]])[0]} to {self._pending_state['event_time_watermark']}")
+        return self._window
+
+    def _with_event_times(self, df, offset, total, rng):
+        """Replace the event column of rows offset..offset+len(df) of total with their share of the window."""
+        start, end = self._event_window()
+        span = (end - start) / total if total else 0.0
+        times = self.event_time.timestamps(rng, len(df), start + offset * span, start + (offset + len(df)) * span)
+        df[self.event_time.column] = format_timestamps(times)
+        return df
+
+    def _partition_rows(self):
+        """Rows per partition: generator_config.partition_rows, else DEFAULT_PARTITION_ROWS.
+
+        Capped at max(chunk_rows, MIN_PARTITION_ROWS) so a chunked batch never
+        holds much more than a chunk; a chunk_rows in between therefore changes
+        the partitions, and with them the seeded output.
+        """
+        partition_rows = int(self.schema.get('generator_config', {}).get('partition_rows') or DEFAULT_PARTITION_ROWS)
+        return min(partition_rows, max(self._chunk_rows(), MIN_PARTITION_ROWS))
+
+    def num_partitions(self):
+        """Partitions of this batch; at least one, so even an empty batch has its columns."""
+        return max(1, math.ceil(self.schema.get('num_rows', 10) / self._partition_rows()))
+
+    def generate_partition(self, partition):
+        """Generate one partition of this batch from the partition's own random stream.
+
+        Partition p holds rows p * partition_rows up to the next partition, and
+        depends only on the seed, table, iteration and p, so partitions can be
+        generated alone, in any order or in different processes, and chunks
+        are cut from them without changing the batch.
+        """
+        if self.engine is None:
+            self.engine = self._build_engine()
+        num_rows = self.schema.get('num_rows', 10)
+        partition_rows = self._partition_rows()
+        offset = partition * partition_rows
+        rng = self._partition_rng(partition)
+        df = self.engine.generate(max(0, min(partition_rows, num_rows - offset)), rng=rng)
+        if self.event_time is not None:
+            # Partitions take consecutive slices of the window, so event time keeps moving forward
+            df = self._with_event_times(df, offset, num_rows, rng)
+        return df
+
     def generate_data(self):
         """Generate fact table data."""
-        rows = []
-        num_rows = self.schema.get('num_rows', 10)
-        
-        for _ in range(num_rows):
-            row = {}
-            for col, col_def in self.schema['columns'].items():
-                if col in self.dimension_key_ranges:
-                    # Use dimension key ranges for foreign keys
-                    row[col] = self.fake.random_int(min=1, max=self.dimension_key_ranges[col])
-                elif 'data_quality_rules' in self.schema and col in self.schema['data_quality_rules']:
-                    # Use quality rules if they exist for this column
-                    row[col] = self._generate_value_with_quality_rules(col, col_def)
-                else:
-                    # Use standard value generation if no quality rules
-                    row[col] = self._generate_value(col, col_def)
-            rows.append(row)
-            
-        return pd.DataFrame(rows) 
\ No newline at end of file
+        partitions = [self.generate_partition(partition) for partition in range(self.num_partitions())]
+        return partitions[0] if len(partitions) == 1 else pd.concat(partitions, ignore_index=True)
+
+    def generate_chunks(self):
+        """Yield fact table data in chunks of at most chunk_rows rows, cut from consecutive partitions."""
+        chunk_rows = self._chunk_rows()
+        # offset counts the rows of pending[0] already yielded
+        pending, offset, rows, yielded = [], 0, 0, False
+        for partition in range(self.num_partitions()):
+            pending.append(self.generate_partition(partition))
+            rows += len(pending[-1])
+            while rows >= chunk_rows:
+                pieces, needed = [], chunk_rows
+                while needed:
+                    piece = pending[0].iloc[offset:offset + needed]
+                    pieces.append(piece)
+                    needed -= len(piece)
+                    offset += len(piece)
+                    if offset == len(pending[0]):
+                        pending.pop(0)
+                        offset = 0
+                rows -= chunk_rows
+                yield pd.concat(pieces, ignore_index=True) if len(pieces) > 1 else pieces[0].reset_index(drop=True)
+                yielded = True
+        # Always yield at least one (possibly empty) chunk so the columns are known
+        if rows or not yielded:
+            pieces = [pending[0].iloc[offset:], *pending[1:]]
+            yield pd.concat(pieces, ignore_index=True) if len(pieces) > 1 else pieces[0].reset_index(drop=True)
@@ -0,0 +1,91 @@
+from functools import lru_cache
+
+import numpy as np
+
+DIGITS = '0123456789'
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Template kinds
+CHOICE = 'choice'
+PATTERN = 'pattern'
+LITERAL = 'literal'
+
+
+class FormatTemplate:
+    """A string format spec parsed once into a reusable template.
+
+    Supported specs, in order of precedence:
+      - ``"A|B|C"``: pick one of the pipe-separated choices, optionally weighted
+      - ``"ACC-####"``: each '#' becomes a random digit
+      - ``"PAY-??"``: each '?' becomes a random uppercase letter (only if there is no '#')
+      - anything else is returned as-is
+    """
+
+    def __init__(self, spec, weights=None):
+        self.spec = spec
+        self.choices = None
+        self.probabilities = None
+        self.placeholder = None
+        self.alphabet = None
+
+        if '|' in spec:
+            self.kind = CHOICE
+            self.choices = np.array(spec.split('|'), dtype=object)
+            if weights is not None:
+                if len(weights) != len(self.choices):
+                    raise ValueError(f"Format '{spec}' has {len(self.choices)} choices but {len(weights)} weights")
+                weights = np.asarray(weights, dtype=float)
+                self.probabilities = weights / weights.sum()
+        elif '#' in spec or '?' in spec:
+            self.kind = PATTERN
+            self.placeholder, self.alphabet = ('#', DIGITS) if '#' in spec else ('?', LETTERS)
+            # UCS-4 code points for the whole string, with the placeholder positions recorded
+            self._codes = np.array([ord(c) for c in spec], dtype=np.uint32)
+            self._slots = np.array([i for i, c in enumerate(spec) if c == self.placeholder], dtype=np.intp)
+            self._alphabet_codes = np.array([ord(c) for c in self.alphabet], dtype=np.uint32)
+        else:
+            self.kind = LITERAL
+
+    def __repr__(self):
+        return f"FormatTemplate({self.spec!r}, kind={self.kind!r})"
+
+    def render(self, rng, size, distribution=None):
+        """Render size values at once using a NumPy Generator; returns an object array.
+
+        A distribution (see distributions.py) picks the choices of a choice spec in place of its weights.
+        """
+        if self.kind == CHOICE:
+            if distribution is not None:
+                return self.choices[distribution.positions(rng, len(self.choices), size)]
+            if self.probabilities is not None:
+                return self.choices[rng.choice(len(self.choices), size=size, p=self.probabilities)]
+            return self.choices[rng.integers(0, len(self.choices), size=size)]
+        if self.kind == LITERAL:
+            return np.full(size, self.spec, dtype=object)
+        codes = np.tile(self._codes, (size, 1))
+        codes[:, self._slots] = self._alphabet_codes[rng.integers(0, len(self.alphabet), size=(size, len(self._slots)))]
+        # Reinterpret each row of code points as one fixed-width unicode string
+        return codes.view(f'<U{len(self.spec)}').ravel().astype(object)
+
+    def render_one(self, random):
+        """Render a single value using a random.Random instance."""
+        if self.kind == CHOICE:
+            if self.probabilities is not None:
+                return random.choices(self.choices, weights=self.probabilities)[0]
+            return self.choices[random.randrange(len(self.choices))]
+        if self.kind == LITERAL:
+            return self.spec
+        chars = list(self.spec)
+        for slot in self._slots:
+            chars[slot] = random.choice(self.alphabet)
+        return ''.join(chars)
+
+
+@lru_cache(maxsize=None)
+def _compile_format(spec, weights):
+    return FormatTemplate(spec, weights)
+
+
+def compile_format(spec, weights=None):
+    """Return the process-wide cached template for a format spec."""
+    return _compile_format(spec, tuple(weights) if weights is not None else None)
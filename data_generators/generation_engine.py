@@ -0,0 +1,431 @@
+import logging
+import math
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from .dimension_generator import DimensionGenerator
+from .state_store import StateStore
+from .generator_factory import create_generator
+from .table_runner import TableRunner
+from .rate_controller import RateController
+from .table_scheduler import TableScheduler, get_cadence
+from .compactor import Compactor
+from .key_index import KeyIndex, dimension_phases
+from .event_time import EventTimeTracker
+from .schema_registry import schema_registry
+from .workspace_pool import workspace_client_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCHEMA_BASE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'schema')
+
+
+def generate_and_save_table(table, generator_args, skip_empty=False, micro_batch=False):
+    """Generate and save one table in this process. Returns its SaveResult, or None if skipped.
+
+    With micro_batch set, a table with generator_config.micro_batch is written
+    as many small files paced at its files_per_sec.
+    """
+    try:
+        logger.info(f"Using schema: {generator_args['schema'].path}")
+        try:
+            generator = create_generator(**generator_args)
+        except Exception as e:
+            logger.error(f"Error creating generator for table {table}: {str(e)}")
+            raise
+
+        if not generator:
+            logger.warning(f"No suitable generator found for table {table}")
+            return None
+
+        logger.info(f"Generating and saving data for table: {table}")
+        micro_batch_config = generator.micro_batch_config() if micro_batch else None
+        if micro_batch_config:
+            output_path = generator.save_micro_batches(generator.generate_data(), table, *micro_batch_config)
+        else:
+            # Chunks are generated lazily while saving, so large tables never sit in memory whole
+            output_path = generator.save_chunks(generator.generate_chunks(), table, skip_empty=skip_empty)
+        if output_path is None:
+            logger.info(f"No new data for table {table} - skipping save")
+            return None
+        logger.info(f"Data saved to: {output_path}")
+        return generator.save_result(output_path)
+    except Exception as e:
+        logger.error(f"Error processing table {table}: {str(e)}")
+        raise
+
+
+def scale_schema(schema, scale_factor):
+    """Multiply a schema's row counts (num_rows and generator_config.rows_per_batch) by scale_factor.
+
+    Every table of a run is scaled by the same factor, and facts draw keys from
+    the scaled dimension sizes, so references stay consistent at any scale.
+    Tables without num_rows, such as weather, grow through the dimensions they
+    reference instead.
+    """
+    if scale_factor == 1:
+        return schema
+    overrides = {}
+    if "num_rows" in schema:
+        overrides["num_rows"] = max(1, round(schema["num_rows"] * scale_factor))
+    config = schema.get("generator_config") or {}
+    if config.get("rows_per_batch"):
+        overrides["generator_config"] = {
+            **config, "rows_per_batch": max(1, round(config["rows_per_batch"] * scale_factor))
+        }
+    return schema.with_overrides(**overrides) if overrides else schema
+
+
+def paced_schema(rate_controller, table, schema, horizon=None, interval_seconds=None):
+    """Apply the rate controller's rows/files for this batch to a fact schema; None to skip it."""
+    default_rows = schema.get("num_rows", 10)
+    rows, files = rate_controller.plan(table, schema, default_rows, horizon, interval_seconds)
+    if rows == 0:
+        return None
+    if rows == default_rows and files == 1:
+        return schema
+    # Several files per batch are written as part files of rows / files rows each
+    config = dict(schema.get("generator_config") or {})
+    config["chunk_rows"] = math.ceil(rows / files)
+    return schema.with_overrides(num_rows=rows, generator_config=config)
+
+
+class GenerationEngine:
+    """Generates an industry's tables continuously on a dedicated thread.
+
+    The first iteration cleans the output directory and generates every
+    table, dimensions included; after that each non-dimension table runs on
+    its own cadence from a shared worker pool, optionally with a background
+    compactor. The engine knows nothing about the UI: progress is published
+    as an immutable snapshot that is replaced wholesale, so readers such as
+    web callbacks take snapshot() without ever waiting on generation.
+    """
+
+    def __init__(self, industry, output_path, schema_base_path=None, output_format=None, seed=None,
+                 generation_workers=1, upload_workers=4, table_workers=4, interval_seconds=None,
+                 compact_interval_seconds=0, on_first_iteration=None, scale_factor=1.0, target_rate=None,
+                 duration_seconds=None):
+        self.industry = industry
+        self.output_path = output_path
+        self.schema_base_path = schema_base_path or DEFAULT_SCHEMA_BASE_PATH
+        self.output_format = output_format
+        self.seed = seed
+        self.generation_workers = generation_workers
+        self.upload_workers = upload_workers
+        self.table_workers = table_workers
+        self.interval_seconds = interval_seconds
+        self.compact_interval_seconds = compact_interval_seconds
+        # TPC-style scale factor applied to every table's row counts; see scale_schema()
+        self.scale_factor = scale_factor
+        # {rows_per_sec, files_per_min, bytes_per_sec} applied to every fact table in place of its own
+        self.target_rate = dict(target_rate) if target_rate else None
+        # Stop by itself this many seconds after starting; None runs until stop()
+        self.duration_seconds = duration_seconds
+        self._deadline = None
+        # Called with [(table, table_type, schema, SaveResult)] once the first iteration is saved
+        self.on_first_iteration = on_first_iteration
+        self.is_local = not output_path.startswith('/Volumes/')
+
+        # Keys written by the first iteration's dimensions, sampled by every table that references them
+        self.key_index = KeyIndex()
+        # Event-time lag and lateness of the fact tables generated in event-time mode
+        self.event_time_tracker = EventTimeTracker()
+        self.iteration_count = 0
+        self.table_runner = None
+        self.rate_controller = None
+        self._stop = threading.Event()
+        self._thread = None
+        # Writers serialize on this lock; readers only ever load the current reference
+        self._publish_lock = threading.Lock()
+        self._snapshot = MappingProxyType({
+            'running': False,
+            'industry': industry,
+            'iteration_count': 0,
+            'started_at': None,
+            'error': None,
+            'rate_report': None,
+            'schedule_report': None,
+            'compaction_report': None,
+            'event_time_report': None,
+        })
+
+    def snapshot(self):
+        """Latest published progress, as a read-only mapping."""
+        return self._snapshot
+
+    def _publish(self, **changes):
+        with self._publish_lock:
+            self._snapshot = MappingProxyType({**self._snapshot, **changes})
+
+    def load_schemas(self):
+        """The industry's compiled schemas (YAML is only re-parsed when a file changes)."""
+        schemas = schema_registry.load_industry(self.schema_base_path, self.industry)
+        if self.scale_factor == 1 and not self.target_rate:
+            return schemas
+        return [self.run_schema(schema) for schema in schemas]
+
+    def run_schema(self, schema):
+        """Apply the run's scale_factor and target_rate to one schema."""
+        schema = scale_schema(schema, self.scale_factor)
+        if self.target_rate and schema.table_type == "fact":
+            config = dict(schema.get("generator_config") or {})
+            config["target_rate"] = self.target_rate
+            schema = schema.with_overrides(generator_config=config)
+        return schema
+
+    def should_continue(self):
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            return False
+        return not self._stop.is_set()
+
+    def start(self):
+        """Run the engine on its own thread."""
+        self._publish(running=True, started_at=time.time())
+        if self.duration_seconds:
+            self._deadline = time.monotonic() + self.duration_seconds
+        self._thread = threading.Thread(target=self.run, name=f"generation-{self.industry}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Ask the engine to stop and wait up to timeout seconds for its thread.
+
+        Tables still generating in worker processes are terminated rather than awaited.
+        """
+        self._stop.set()
+        self.shutdown_table_runner(terminate=True)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout=None):
+        """Wait up to timeout seconds for the engine thread; returns True once it has finished."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.is_alive()
+
+    def run(self):
+        """Generate until stop() is called, duration_seconds pass or a batch fails."""
+        self._publish(running=True)
+        if self.duration_seconds and self._deadline is None:
+            self._deadline = time.monotonic() + self.duration_seconds
+        self.rate_controller = RateController(self.interval_seconds)
+        self.rate_controller.start()
+        try:
+            self.generate_iteration(self.rate_controller)
+            self._publish(iteration_count=self.iteration_count, rate_report=self.rate_controller.report(),
+                          event_time_report=self.event_time_tracker.report())
+            logger.info(f"Rate report: {self.snapshot()['rate_report']}")
+            if not self.should_continue():
+                return
+
+            scheduler = self.create_table_scheduler()
+            if self.compact_interval_seconds > 0:
+                threading.Thread(target=self.compaction_loop, args=(list(scheduler.cadences),),
+                                 name="compaction", daemon=True).start()
+            scheduler.run(self.should_continue)
+        except Exception as e:
+            if not self._stop.is_set():
+                logger.error(f"Error in generation service: {str(e)}")
+                self._publish(error=str(e))
+            else:
+                # Batches cut short by stop() (e.g. terminated table processes) are not errors
+                logger.info(f"Generation stopped during a batch: {str(e)}")
+        finally:
+            self._stop.set()
+            self.shutdown_table_runner()
+            self._publish(running=False)
+
+    def get_table_runner(self):
+        """Return the parallel table runner, creating it on first use."""
+        if self.table_runner is None:
+            self.table_runner = TableRunner(self.generation_workers, self.upload_workers)
+        return self.table_runner
+
+    def shutdown_table_runner(self, terminate=False):
+        """Shut down the parallel table runner if one was started."""
+        table_runner, self.table_runner = self.table_runner, None
+        if table_runner is not None:
+            table_runner.shutdown(terminate)
+
+    def table_generator_args(self, schema, iteration):
+        """Keyword arguments for create_generator() for one batch of a table."""
+        return {
+            "schema": schema,
+            "output_base_path": self.output_path,
+            "key_index": self.key_index,
+            "is_local": self.is_local,
+            "output_format": self.output_format,
+            "seed": self.seed,
+            "iteration": iteration
+        }
+
+    def generate_iteration(self, rate_controller=None):
+        """Generate all data files for the industry once; returns {table: SaveResult or None}.
+
+        With a rate controller, fact tables get the rows and files it plans for
+        this iteration and every saved table is recorded against its targets.
+        """
+        industry = self.industry
+        current_iteration = self.iteration_count
+        self.iteration_count += 1
+
+        logger.info(f"\nIteration {current_iteration} for industry {industry}")
+        logger.debug(f"Current key index: {self.key_index.sizes()}")
+
+        schemas = self.load_schemas()
+
+        # Check and clean up output directory before starting
+        if current_iteration == 0:
+            output_dir = os.path.join(self.output_path, industry)
+            # Use DimensionGenerator since it's the simplest concrete implementation
+            temp_generator = DimensionGenerator(None, self.output_path, is_local=self.is_local)
+            temp_generator._check_directory_empty(output_dir)
+            # Drop watermarks from previous runs since their output was just removed
+            StateStore(self.output_path).clear(industry)
+
+        # Dimension keys are indexed as the first iteration writes them
+        if current_iteration == 0:
+            self.key_index = KeyIndex.for_schemas(schemas)
+
+        # Collect the tables to process in this iteration
+        jobs = []
+        for schema in schemas:
+            # The registry has already validated the schema and resolved table/table_name
+            table = schema.table
+            table_type = schema.table_type
+
+            # Skip dimension tables after first iteration
+            if table_type == "dimension" and current_iteration > 0:
+                logger.info(f"Skipping dimension table {table} as iteration_count > 0")
+                continue
+
+            if rate_controller is not None and table_type == "fact":
+                # The first iteration covers one cadence of the table, where its scheduled batches continue
+                cadence = get_cadence(schema, rate_controller.interval_seconds)
+                schema = paced_schema(rate_controller, table, schema, horizon=cadence, interval_seconds=cadence)
+                if schema is None:
+                    logger.info(f"Skipping table {table}: nothing due under its target rate")
+                    continue
+
+            jobs.append((table, table_type, schema))
+
+        # Dimensions run first, each after the dimensions it references, and every
+        # phase's keys are indexed before the next phase builds its generator arguments
+        dimension_jobs = {table: (table, table_type, schema) for table, table_type, schema in jobs
+                          if table_type == "dimension"}
+        phases = [
+            [dimension_jobs[schema.table] for schema in phase]
+            for phase in dimension_phases([job[2] for job in dimension_jobs.values()], self.key_index)
+        ]
+        phases.append([job for job in jobs if job[1] != "dimension"])
+
+        # Generate and save data
+        results = {}
+        for phase in phases:
+            if not phase:
+                continue
+            phase_jobs = [(table, self.table_generator_args(schema, current_iteration)) for table, _, schema in phase]
+            if self.generation_workers > 1:
+                runner = self.get_table_runner()
+                logger.info(f"Generating {len(phase_jobs)} tables with {runner.generation_workers} workers")
+                phase_results = runner.run(phase_jobs, skip_empty=current_iteration > 0)
+            else:
+                phase_results = {}
+                for (table, table_type, _), (_, generator_args) in zip(phase, phase_jobs):
+                    logger.info(f"\nProcessing table: {table} (type: {table_type})")
+                    phase_results[table] = generate_and_save_table(table, generator_args,
+                                                                   skip_empty=current_iteration > 0)
+            for table, result in phase_results.items():
+                if result is not None and result.keys:
+                    for column, keys in result.keys.items():
+                        self.key_index.add(table, column, keys)
+            results.update(phase_results)
+
+        if rate_controller is not None:
+            for table, result in results.items():
+                rate_controller.record(table, result)
+        for table, result in results.items():
+            self.event_time_tracker.record(table, result)
+
+        if current_iteration == 0 and self.on_first_iteration is not None:
+            self.on_first_iteration([
+                (table, table_type, schema, results[table])
+                for table, table_type, schema in jobs if results.get(table) is not None
+            ])
+
+        if not self.is_local:
+            logger.info(f"Workspace client reuse: {workspace_client_pool.stats()}")
+
+        logger.info(f"\nCompleted iteration {current_iteration}")
+        return results
+
+    def create_table_scheduler(self):
+        """Schedule every non-dimension table on its generator_config.cadence."""
+        schemas = {schema.table: schema for schema in self.load_schemas() if schema.table_type != "dimension"}
+        scheduler = TableScheduler(
+            lambda table, batch: self.run_table_batch(schemas[table], batch, scheduler),
+            workers=self.table_workers,
+        )
+        for table, schema in schemas.items():
+            cadence = get_cadence(schema, self.rate_controller.interval_seconds)
+            # Batch n of a table is due n cadences after the first iteration started
+            scheduler.add(table, cadence, first_due=self.rate_controller.started + cadence)
+        logger.info(f"Scheduled {len(schemas)} tables on {scheduler.workers} workers: "
+                    f"{ {table: scheduler.cadences[table] for table in schemas} }")
+        return scheduler
+
+    def run_table_batch(self, schema, batch, scheduler):
+        """Generate and save one scheduled batch of a table, then publish the rate, schedule and event-time reports."""
+        table = schema.table
+        rate_controller = self.rate_controller
+        rate_controller.record_schedule_lag(table, scheduler.lag[table])
+        config = schema.get("generator_config") or {}
+        micro_batch = config.get("micro_batch")
+        if schema.table_type == "fact":
+            cadence = scheduler.cadences[table]
+            rows_per_batch = config.get("rows_per_batch")
+            if micro_batch:
+                # Enough small files to keep arriving at files_per_sec until the next batch is due
+                files = max(1, math.floor(float(micro_batch.get("files_per_sec", 10)) * cadence))
+                rows_per_batch = files * int(micro_batch.get("rows_per_file", 100))
+            if rows_per_batch:
+                schema = schema.with_overrides(num_rows=int(rows_per_batch))
+            schema = paced_schema(rate_controller, table, schema, horizon=(batch + 1) * cadence,
+                                  interval_seconds=cadence)
+            if schema is None:
+                logger.info(f"Skipping batch {batch} of {table}: nothing due under its target rate")
+                return None
+
+        generator_args = self.table_generator_args(schema, batch)
+        if self.generation_workers > 1 and not micro_batch:
+            result = self.get_table_runner().run([(table, generator_args)], skip_empty=True)[table]
+        else:
+            # Micro-batch tables are small and spend their batch waiting between files, so they stay on this thread
+            result = generate_and_save_table(table, generator_args, skip_empty=True, micro_batch=True)
+        rate_controller.record(table, result)
+        self.event_time_tracker.record(table, result)
+
+        with self._publish_lock:
+            self.iteration_count += 1
+        self._publish(iteration_count=self.iteration_count, rate_report=rate_controller.report(),
+                      schedule_report=scheduler.report(), event_time_report=self.event_time_tracker.report())
+        return result
+
+    def compaction_loop(self, tables):
+        """Roll older small files of each table up under the _compacted prefix until stopped."""
+        schemas = {schema.table: schema for schema in self.load_schemas()}
+        compactor = Compactor(self.output_path, self.industry, self.output_format, is_local=self.is_local,
+                              schemas=schemas)
+        while self.should_continue():
+            deadline = time.monotonic() + self.compact_interval_seconds
+            try:
+                compactor.compact(tables)
+                self._publish(compaction_report=compactor.report())
+            except Exception as e:
+                # A failed pass leaves the originals in place; the next pass retries them
+                logger.error(f"Error compacting files for {self.industry}: {str(e)}")
+            self._stop.wait(max(0.0, deadline - time.monotonic()))
@@ -0,0 +1,249 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+# Seconds a stop request waits for the engine to wind down before the process is terminated
+DEFAULT_STOP_GRACE_SECONDS = 1.0
+# How often the worker checks its engine for a new progress snapshot to push
+PROGRESS_POLL_SECONDS = 0.25
+# Seconds start() waits for a fresh worker to import the engine and start it
+START_TIMEOUT_SECONDS = 30.0
+COMMANDS = ('start', 'stop', 'status', 'metrics')
+
+
+def _process_metrics():
+    """CPU time and peak memory of the calling process."""
+    times = os.times()
+    metrics = {'pid': os.getpid(), 'cpu_seconds': round(times.user + times.system, 2)}
+    try:
+        import resource
+        metrics['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        pass
+    return metrics
+
+
+def worker_main(conn, log_level=logging.INFO):
+    """Worker process entry point: serve commands from conn until stopped or the parent goes away.
+
+    Messages are (kind, request_id, payload) tuples. Requests are 'start'
+    (payload: GenerationEngine keyword arguments), 'stop', 'status' and
+    'metrics'; each gets a ('reply', request_id, result) message. The worker
+    also pushes ('progress', None, snapshot) whenever the engine publishes new
+    progress and ('first_iteration', None, tables) once its first iteration
+    is saved.
+    """
+    # Imported here so the parent only loads the engine when it runs in-process
+    from .generation_engine import GenerationEngine
+
+    if hasattr(os, 'setpgrp'):
+        # Its own process group, so stop() can take the engine's table processes down with it
+        os.setpgrp()
+    logging.basicConfig(level=log_level)
+    send_lock = threading.Lock()
+    engine = None
+
+    def send(kind, request_id, payload):
+        with send_lock:
+            conn.send((kind, request_id, payload))
+
+    def exit_now(timeout=0):
+        """Stop the engine (terminating its table processes) and exit without joining busy threads."""
+        if engine is not None:
+            engine.stop(timeout=timeout)
+        logging.shutdown()
+        os._exit(0)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: exit_now())
+
+    last_snapshot = None
+    while True:
+        if engine is not None and engine.snapshot() is not last_snapshot:
+            last_snapshot = engine.snapshot()
+            send('progress', None, dict(last_snapshot))
+        try:
+            if not conn.poll(PROGRESS_POLL_SECONDS):
+                continue
+            command, request_id, payload = conn.recv()
+        except (EOFError, OSError):
+            # The parent is gone; nothing is left to report to
+            exit_now()
+
+        if command == 'start':
+            try:
+                if engine is None or not engine.is_alive():
+                    engine = GenerationEngine(
+                        on_first_iteration=lambda tables: send('first_iteration', None, tables), **payload
+                    )
+                    engine.start()
+                result = dict(engine.snapshot())
+            except Exception as e:
+                logger.error(f"Error starting generation engine: {str(e)}")
+                result = {'running': False, 'error': str(e)}
+        elif command == 'stop':
+            exit_now(payload)
+        elif command == 'status':
+            result = dict(engine.snapshot()) if engine is not None else None
+        elif command == 'metrics':
+            snapshot = engine.snapshot() if engine is not None else {}
+            result = {
+                'process': _process_metrics(),
+                'iteration_count': snapshot.get('iteration_count', 0),
+                'rate_report': snapshot.get('rate_report'),
+                'schedule_report': snapshot.get('schedule_report'),
+                'compaction_report': snapshot.get('compaction_report'),
+                'event_time_report': snapshot.get('event_time_report'),
+            }
+        else:
+            result = {'error': f"Unknown command {command}; expected one of {', '.join(COMMANDS)}"}
+        send('reply', request_id, result)
+
+
+class GenerationWorker:
+    """Hosts a GenerationEngine in a separate process, controlled over a pipe.
+
+    Generation is CPU-bound Python, so running it in its own process keeps the
+    web server's GIL free for requests. The worker pushes progress snapshots
+    as they change and a listener thread keeps the latest one, so snapshot()
+    is as cheap as on an in-process engine; status() and metrics() ask the
+    worker directly. stop() gives the engine a short grace period and then
+    terminates the process, so stopping never waits on a long batch.
+    """
+
+    def __init__(self, on_first_iteration=None, stop_grace_seconds=DEFAULT_STOP_GRACE_SECONDS,
+                 log_level=logging.INFO, **engine_kwargs):
+        self.engine_kwargs = engine_kwargs
+        # Runs in this process with [(table, table_type, schema, SaveResult)] from the worker
+        self.on_first_iteration = on_first_iteration
+        self.stop_grace_seconds = stop_grace_seconds
+        self.log_level = log_level
+        self.process = None
+        self._conn = None
+        self._listener = None
+        self._replies = {}
+        self._request_ids = itertools.count(1)
+        self._send_lock = threading.Lock()
+        self._snapshot = MappingProxyType({
+            'running': False,
+            'industry': engine_kwargs.get('industry'),
+            'iteration_count': 0,
+            'started_at': None,
+            'error': None,
+            'rate_report': None,
+            'schedule_report': None,
+            'compaction_report': None,
+            'event_time_report': None,
+        })
+
+    def snapshot(self):
+        """Latest progress pushed by the worker, as a read-only mapping."""
+        return self._snapshot
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def _listen(self):
+        """Route worker messages: progress into the snapshot, replies to their waiting request."""
+        while True:
+            try:
+                kind, request_id, payload = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            if kind == 'progress':
+                self._snapshot = MappingProxyType(payload)
+            elif kind == 'first_iteration':
+                if self.on_first_iteration is not None:
+                    try:
+                        self.on_first_iteration(payload)
+                    except Exception as e:
+                        logger.error(f"Error in first iteration hook: {str(e)}")
+            elif kind == 'reply':
+                reply = self._replies.get(request_id)
+                if reply is not None:
+                    reply.put(payload)
+        self._snapshot = MappingProxyType({**self._snapshot, 'running': False})
+
+    def request(self, command, payload=None, timeout=5.0):
+        """Send one command to the worker and wait up to timeout seconds for its reply."""
+        if not self.is_alive():
+            return None
+        request_id = next(self._request_ids)
+        reply = self._replies[request_id] = queue.Queue(maxsize=1)
+        try:
+            with self._send_lock:
+                self._conn.send((command, request_id, payload))
+            return reply.get(timeout=timeout)
+        except (queue.Empty, OSError, BrokenPipeError):
+            return None
+        finally:
+            self._replies.pop(request_id, None)
+
+    def start(self):
+        """Spawn the worker process and start generation in it.
+
+        Blocks until the worker answers the start request. When the engine
+        fails to start, or the worker does not answer in time, the worker is
+        stopped and the snapshot reports running=False with the error.
+        """
+        if self.is_alive():
+            return
+        # spawn avoids forking a multi-threaded web server process
+        context = multiprocessing.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        # Not a daemon, so the engine can start its own process pool; the worker
+        # stops by itself once this end of the pipe closes
+        self.process = context.Process(target=worker_main, args=(child_conn, self.log_level),
+                                       name='generation-worker')
+        self.process.start()
+        child_conn.close()
+        self._snapshot = MappingProxyType({**self._snapshot, 'running': True, 'started_at': time.time()})
+        self._listener = threading.Thread(target=self._listen, name='generation-worker-listener', daemon=True)
+        self._listener.start()
+        reply = self.request('start', self.engine_kwargs, timeout=START_TIMEOUT_SECONDS)
+        if reply is None or not reply.get('running'):
+            error = reply.get('error') if reply else None
+            self.stop(timeout=0)
+            self._snapshot = MappingProxyType({
+                **self._snapshot, 'running': False,
+                'error': error or "Generation worker did not answer the start request",
+            })
+
+    def status(self, timeout=1.0):
+        """The worker's current progress snapshot, or None if it does not answer in time."""
+        return self.request('status', timeout=timeout)
+
+    def metrics(self, timeout=1.0):
+        """Process CPU/memory plus the engine's rate, schedule and compaction reports."""
+        return self.request('metrics', timeout=timeout)
+
+    def stop(self, timeout=None):
+        """Stop generation; the process is terminated if it has not exited after the grace period."""
+        if self.process is None:
+            return
+        grace = self.stop_grace_seconds if timeout is None else min(timeout, self.stop_grace_seconds)
+        try:
+            with self._send_lock:
+                self._conn.send(('stop', None, grace))
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(grace)
+        if self.process.is_alive():
+            logger.info("Generation worker still busy after stop request; terminating it")
+            self.process.terminate()
+            self.process.join(1.0)
+        if hasattr(os, 'killpg'):
+            # Table processes the engine was still starting can outlive the worker itself
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        self._conn.close()
+        self._snapshot = MappingProxyType({**self._snapshot, 'running': False})
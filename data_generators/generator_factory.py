@@ -0,0 +1,30 @@
+import logging
+
+from .change_feed_generator import ChangeFeedGenerator
+from .dimension_generator import DimensionGenerator
+from .fact_generator import FactGenerator
+from .weather_generator import WeatherGenerator
+
+logger = logging.getLogger(__name__)
+
+
+def create_generator(schema, output_base_path, key_index=None, is_local=True,
+                     output_format=None, seed=None, iteration=0):
+    """Instantiate the generator for a compiled schema based on its generator_class and type.
+
+    Returns None for unknown table types.
+    """
+    options = {'is_local': is_local, 'output_format': output_format, 'seed': seed, 'iteration': iteration}
+    table_type = schema.get('type', 'fact')
+    # Check for explicit generator class first
+    generator_class = schema.get('generator_class')
+    if generator_class == 'WeatherGenerator':
+        return WeatherGenerator(schema, output_base_path, key_index, **options)
+    if table_type == 'dimension':
+        return DimensionGenerator(schema, output_base_path, key_index, **options)
+    if table_type == 'fact':
+        return FactGenerator(schema, output_base_path, key_index, **options)
+    if table_type == 'change_feed':
+        return ChangeFeedGenerator(schema, output_base_path, key_index, **options)
+    logger.warning(f"Unknown table type or generator class: {table_type}, {generator_class}")
+    return None
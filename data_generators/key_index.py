@@ -0,0 +1,166 @@
+import logging
+from collections.abc import Mapping
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def parse_reference(reference):
+    """A (table, column) pair from a "table.column" string or a {table, column} mapping; None if unset."""
+    if not reference:
+        return None
+    if isinstance(reference, Mapping):
+        return reference['table'], reference['column']
+    table, _, column = str(reference).rpartition('.')
+    if not table:
+        raise ValueError(f"Invalid reference {reference!r}; expected table.column")
+    return table, column
+
+
+def _table(schema):
+    return schema.get('table') or schema.get('table_name')
+
+
+def iter_columns(schema):
+    """(name, definition) for every column of a mapping- or list-style schema."""
+    columns = schema.get('columns') or ()
+    if isinstance(columns, Mapping):
+        return list(columns.items())
+    return [(column.get('name'), column) for column in columns if isinstance(column, Mapping)]
+
+
+def column_reference(definition):
+    """The explicit reference of a column definition, as (table, column), or None.
+
+    Mapping-style columns declare ``reference: table.column``; list-style
+    columns use ``generator: {type: reference, table: ..., column: ...}``.
+    """
+    if not isinstance(definition, Mapping):
+        return None
+    if definition.get('reference'):
+        return parse_reference(definition['reference'])
+    generator = definition.get('generator')
+    if isinstance(generator, Mapping) and generator.get('type') == 'reference':
+        return parse_reference(generator)
+    return None
+
+
+def key_columns(schema):
+    """The columns holding a dimension's own keys: primary_key if set, else its first *_id column."""
+    primary_key = schema.get('primary_key')
+    if primary_key:
+        return [primary_key] if isinstance(primary_key, str) else list(primary_key)
+    for name, definition in iter_columns(schema):
+        if name and name.endswith('_id') and column_reference(definition) is None:
+            return [name]
+    return []
+
+
+class KeyIndex:
+    """Keys actually written for each dimension table.column, shared with the tables that reference them.
+
+    A column is resolved to the dimension key it refers to through its
+    explicit reference if it has one, and otherwise by name through the
+    dimension that owns a key column of that name. Keys are held as compact
+    NumPy arrays, and sample() draws foreign keys for a whole batch at once,
+    uniformly or following a column's distribution (see distributions.py).
+    """
+
+    def __init__(self, owners=None):
+        # (table, column) -> array of the keys written for it
+        self.keys = {}
+        # column name -> (table, column) of the dimension key it refers to
+        self.owners = dict(owners or {})
+
+    @classmethod
+    def for_schemas(cls, schemas):
+        """An empty index whose owners are the key columns of the given dimension schemas."""
+        owners = {}
+        for schema in schemas:
+            if schema.get('type', 'fact') != 'dimension':
+                continue
+            for column in key_columns(schema):
+                if column in owners:
+                    logger.warning(f"Key column {column} of {_table(schema)} is already owned by "
+                                   f"{owners[column][0]}; references by name resolve to {owners[column][0]}")
+                    continue
+                owners[column] = (_table(schema), column)
+        return cls(owners)
+
+    @classmethod
+    def from_ranges(cls, ranges):
+        """An index of keys 1..n for each {"table.column": n}, e.g. for benchmarks."""
+        index = cls()
+        for reference, size in ranges.items():
+            table, column = parse_reference(reference)
+            index.owners.setdefault(column, (table, column))
+            index.add(table, column, np.arange(1, size + 1))
+        return index
+
+    def add(self, table, column, keys):
+        """Record the keys written for table.column."""
+        keys = np.asarray(keys)
+        if keys.dtype.kind in 'iu' and (keys.size == 0 or (keys.min() >= 0 and keys.max() < 2 ** 31)):
+            keys = keys.astype(np.int32)
+        self.keys[(table, column)] = keys
+        logger.debug(f"Indexed {len(keys)} keys for {table}.{column}")
+
+    def resolve(self, column, reference=None):
+        """The (table, column) whose keys a column draws from, or None if it is not a known foreign key."""
+        target = reference or self.owners.get(column)
+        if target is None or target not in self.keys:
+            if reference is not None:
+                logger.warning(f"No keys indexed for {reference[0]}.{reference[1]}, referenced by {column}")
+            return None
+        return target
+
+    def dependencies(self, schema):
+        """Tables whose keys a schema's non-key columns refer to."""
+        own = set(key_columns(schema)) if schema.get('type', 'fact') == 'dimension' else set()
+        tables = set()
+        for name, definition in iter_columns(schema):
+            if name in own:
+                continue
+            target = column_reference(definition) or self.owners.get(name)
+            if target is not None and target[0] != _table(schema):
+                tables.add(target[0])
+        return tables
+
+    def sample(self, target, size, rng, distribution=None):
+        """Draw size keys of target with rng, uniformly or by distribution over the keys in written order."""
+        keys = self.keys[target]
+        if len(keys) == 0:
+            raise ValueError(f"No keys to sample for {target[0]}.{target[1]}")
+        if distribution is not None:
+            positions = distribution.positions(rng, len(keys), size)
+        else:
+            positions = rng.integers(0, len(keys), size=size)
+        values = keys[positions]
+        return values.astype(np.int64) if values.dtype.kind in 'iu' else values
+
+    def sizes(self):
+        """{"table.column": number of keys} for logging and reports."""
+        return {f"{table}.{column}": len(keys) for (table, column), keys in self.keys.items()}
+
+
+def dimension_phases(schemas, key_index):
+    """Group dimension schemas into phases where each only references dimensions of earlier phases.
+
+    Reference cycles cannot be ordered; their tables go into one last phase
+    and fall back to generating their own key values.
+    """
+    remaining = {_table(schema): schema for schema in schemas}
+    phases = []
+    while remaining:
+        phase = [
+            schema for table, schema in remaining.items()
+            if not (key_index.dependencies(schema) & (set(remaining) - {table}))
+        ]
+        if not phase:
+            logger.warning(f"Reference cycle between dimensions {', '.join(sorted(remaining))}")
+            phase = list(remaining.values())
+        for schema in phase:
+            del remaining[_table(schema)]
+        phases.append(phase)
+    return phases
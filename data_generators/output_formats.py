@@ -0,0 +1,348 @@
+import gzip
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Rows serialized per chunk when streaming CSV and JSON output to an upload
+DEFAULT_CHUNK_ROWS = 20000
+# Rows per Parquet row group when streaming, as pyarrow's default; small row groups inflate files
+DEFAULT_ROW_GROUP_ROWS = 1024 * 1024
+PIPE_BUFFER_SIZE = 1024 * 1024
+# A non-seekable source (e.g. a Files API download) is copied to memory up to this size, then to disk
+SPOOL_MEMORY_BYTES = 64 * 1024 * 1024
+
+# Spark SQL types for the simple column types used in schema YAML files
+SPARK_TYPES = {
+    'int': 'BIGINT',
+    'float': 'DOUBLE',
+    'bool': 'BOOLEAN',
+    'string': 'STRING',
+    'datetime': 'TIMESTAMP',
+}
+
+
+def get_column_types(schema):
+    """Return {column: simple type} for schemas that declare columns as a mapping."""
+    columns = schema.get('columns')
+    if not isinstance(columns, Mapping):
+        return None
+    column_types = {}
+    for col, col_def in columns.items():
+        dtype = col_def.get('type', 'string') if isinstance(col_def, Mapping) else col_def
+        column_types[col] = str(dtype).lower()
+    return column_types
+
+
+def arrow_types(schema):
+    """Return {column: pyarrow type} for the simple column types of a schema, or None."""
+    import pyarrow as pa
+    column_types = get_column_types(schema)
+    if not column_types:
+        return None
+    types = {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'bool': pa.bool_(),
+        'string': pa.string(),
+        'datetime': pa.timestamp('us'),
+    }
+    return {col: types.get(dtype, pa.string()) for col, dtype in column_types.items()}
+
+
+@contextmanager
+def seekable_source(source, max_memory=SPOOL_MEMORY_BYTES):
+    """Yield source if it can seek, else a copy of it spooled to memory up to max_memory bytes and to disk beyond."""
+    seekable = getattr(source, 'seekable', None)
+    if seekable is not None and seekable():
+        yield source
+        return
+    with tempfile.SpooledTemporaryFile(max_size=max_memory) as spool:
+        shutil.copyfileobj(source, spool, PIPE_BUFFER_SIZE)
+        spool.seek(0)
+        yield spool
+
+
+def spark_schema_hints(schema):
+    """Build a Spark DDL schema hint string (e.g. "id BIGINT, ts TIMESTAMP") from a schema."""
+    column_types = get_column_types(schema)
+    if not column_types:
+        return None
+    return ', '.join(f"{col} {SPARK_TYPES.get(dtype, 'STRING')}" for col, dtype in column_types.items())
+
+
+class OutputFormat:
+    """How generated data is serialized to files and read back by Auto Loader."""
+
+    def __init__(self, name, label, extension, reader_format, pandas_writer, writer_kwargs=None,
+                 self_describing=False):
+        self.name = name
+        self.label = label
+        self.extension = extension
+        self.reader_format = reader_format
+        self.pandas_writer = pandas_writer
+        self.writer_kwargs = writer_kwargs or {}
+        # Self-describing formats carry their own column types (e.g. Parquet)
+        self.self_describing = self_describing
+
+    def prepare(self, df, schema):
+        """Cast columns to the schema's types so typed formats store them natively."""
+        if not self.self_describing:
+            return df
+        column_types = get_column_types(schema) or {}
+        datetime_columns = [col for col, dtype in column_types.items() if dtype == 'datetime' and col in df.columns]
+        if not datetime_columns:
+            return df
+        df = df.copy()
+        for col in datetime_columns:
+            # Microsecond precision maps to Parquet TIMESTAMP_MICROS, which Spark reads natively
+            df[col] = pd.to_datetime(df[col], errors='coerce').astype('datetime64[us]')
+        return df
+
+    def write(self, df, target, schema=None):
+        """Write a DataFrame to a path or binary file object."""
+        if schema is not None:
+            df = self.prepare(df, schema)
+        getattr(df, self.pandas_writer)(target, **self.writer_kwargs)
+
+    def write_chunks(self, df, sink, schema=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                     row_group_rows=DEFAULT_ROW_GROUP_ROWS):
+        """Serialize a DataFrame into a binary stream without ever seeking the sink.
+
+        The sink can be a pipe feeding an upload. CSV and JSON Lines are
+        serialized chunk_rows rows at a time. Parquet is converted and written
+        one row group of row_group_rows rows at a time; row groups are kept
+        large (like to_parquet's) since small ones make files much bigger.
+        """
+        if schema is not None:
+            df = self.prepare(df, schema)
+
+        if self.pandas_writer == 'to_parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            arrow_schema = pa.Schema.from_pandas(df, preserve_index=False)
+            with pq.ParquetWriter(sink, arrow_schema, compression=self.writer_kwargs.get('compression')) as writer:
+                for start in range(0, len(df), row_group_rows):
+                    chunk = pa.Table.from_pandas(df.iloc[start:start + row_group_rows], schema=arrow_schema,
+                                                 preserve_index=False)
+                    writer.write_table(chunk, row_group_size=row_group_rows)
+                    del chunk
+            return
+
+        use_gzip = self.writer_kwargs.get('compression', {}).get('method') == 'gzip'
+        target = gzip.GzipFile(fileobj=sink, mode='wb') if use_gzip else sink
+        try:
+            if self.pandas_writer == 'to_csv':
+                # pandas writes its chunks straight through, with no intermediate string per chunk
+                text = io.TextIOWrapper(target, encoding='utf-8', newline='', write_through=True)
+                df.to_csv(text, index=False, chunksize=chunk_rows)
+                text.flush()
+                text.detach()
+                return
+            for start in range(0, len(df), chunk_rows):
+                text = df.iloc[start:start + chunk_rows].to_json(orient='records', lines=True, date_format='iso')
+                if text and not text.endswith('\n'):
+                    text += '\n'
+                target.write(text.encode('utf-8'))
+        finally:
+            if use_gzip:
+                target.close()
+
+    def concat(self, sources, sink, schema=None):
+        """Merge files of this format into one, streaming from the open binary sources into sink.
+
+        CSV headers after the first file are dropped and gzip output is
+        re-compressed as one stream; Parquet row groups are copied batch by
+        batch under the first file's columns, typed by the table schema where
+        it declares them (see _merged_arrow_schema). Parquet sources that
+        cannot seek to their footer are spooled first.
+        """
+        if self.pandas_writer == 'to_parquet':
+            import pyarrow.parquet as pq
+            writer = None
+            try:
+                for source in sources:
+                    with seekable_source(source) as readable:
+                        parquet_file = pq.ParquetFile(readable)
+                        if writer is None:
+                            writer = pq.ParquetWriter(sink, self._merged_arrow_schema(parquet_file.schema_arrow, schema),
+                                                      compression=self.writer_kwargs.get('compression'))
+                        for batch in parquet_file.iter_batches():
+                            writer.write_batch(batch.cast(writer.schema))
+            finally:
+                if writer is not None:
+                    writer.close()
+            return
+
+        use_gzip = self.writer_kwargs.get('compression', {}).get('method') == 'gzip'
+        target = gzip.GzipFile(fileobj=sink, mode='wb') if use_gzip else sink
+        try:
+            for index, source in enumerate(sources):
+                reader = gzip.GzipFile(fileobj=source, mode='rb') if use_gzip else source
+                if self.pandas_writer == 'to_csv' and index > 0:
+                    reader.readline()
+                while True:
+                    block = reader.read(PIPE_BUFFER_SIZE)
+                    if not block:
+                        break
+                    target.write(block)
+        finally:
+            if use_gzip:
+                target.close()
+
+    @staticmethod
+    def _merged_arrow_schema(file_schema, schema=None):
+        """The first file's Arrow schema unified with the table's declared column types.
+
+        A column that was all null in the first file has Arrow type null and
+        takes its declared type, so later files that fill it can be cast.
+        """
+        import pyarrow as pa
+        declared = arrow_types(schema) if schema is not None else None
+        if not declared:
+            return file_schema
+        typed = pa.schema([pa.field(name, declared[name]) for name in file_schema.names if name in declared])
+        return pa.unify_schemas([file_schema, typed], promote_options='permissive')
+
+    def reader_options(self, schema):
+        """Return the Auto Loader/read_files options needed to read this format back."""
+        options = {'format': self.reader_format}
+        if self.reader_format == 'csv':
+            options['header'] = 'true'
+            options['multiLine'] = 'true'
+        if not self.self_describing:
+            hints = spark_schema_hints(schema)
+            if hints:
+                options['schemaHints'] = hints
+            else:
+                options['inferColumnTypes'] = 'true'
+        return options
+
+
+OUTPUT_FORMATS = {
+    fmt.name: fmt for fmt in [
+        OutputFormat('csv', 'CSV', '.csv', 'csv', 'to_csv',
+                     writer_kwargs={'index': False}),
+        OutputFormat('csv_gzip', 'CSV (gzip)', '.csv.gz', 'csv', 'to_csv',
+                     writer_kwargs={'index': False, 'compression': {'method': 'gzip'}}),
+        OutputFormat('parquet_snappy', 'Parquet (snappy)', '.parquet', 'parquet', 'to_parquet',
+                     writer_kwargs={'index': False, 'compression': 'snappy'}, self_describing=True),
+        OutputFormat('parquet_zstd', 'Parquet (zstd)', '.parquet', 'parquet', 'to_parquet',
+                     writer_kwargs={'index': False, 'compression': 'zstd'}, self_describing=True),
+        OutputFormat('jsonl', 'JSON Lines', '.json', 'json', 'to_json',
+                     writer_kwargs={'orient': 'records', 'lines': True, 'date_format': 'iso'}),
+    ]
+}
+DEFAULT_OUTPUT_FORMAT = 'csv'
+
+
+def get_output_format(name):
+    """Look up an output format by name."""
+    name = name or DEFAULT_OUTPUT_FORMAT
+    if name not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {name}. Choose from: {', '.join(OUTPUT_FORMATS)}")
+    return OUTPUT_FORMATS[name]
+
+
+class CountingPipeReader(io.RawIOBase):
+    """Raw reader over a pipe file descriptor that counts the bytes read.
+
+    abort() poisons the stream: once the writer has closed the pipe, reading
+    raises instead of returning end of file, so a consumer never takes a
+    stream cut short by a failed producer for a complete one.
+    """
+
+    def __init__(self, fd):
+        self.fd = fd
+        self.bytes_read = 0
+        self.error = None
+
+    def readable(self):
+        return True
+
+    def fileno(self):
+        return self.fd
+
+    def abort(self, error):
+        self.error = error
+
+    def readinto(self, buffer):
+        count = os.readv(self.fd, [buffer])
+        if count == 0 and self.error is not None:
+            raise OSError(f"Stream aborted by its producer: {self.error}")
+        self.bytes_read += count
+        return count
+
+    def close(self):
+        if not self.closed:
+            os.close(self.fd)
+        super().close()
+
+
+def pipe_stream(produce, consume, name='pipe-consumer'):
+    """Run produce(sink) on this thread while consume(source) reads the bytes it writes; returns the bytes read.
+
+    consume (e.g. a Files API upload) runs on a background thread reading an
+    OS pipe, so memory stays bounded by what produce holds rather than the
+    file size. produce stays on the calling thread so its allocations reuse
+    this thread's memory. If produce fails the stream is aborted, making
+    consume fail rather than finish on a truncated stream, and produce's
+    error is raised; otherwise an error in consume is raised.
+    """
+    read_fd, write_fd = os.pipe()
+    reader = CountingPipeReader(read_fd)
+    errors = []
+
+    def run():
+        source = io.BufferedReader(reader, PIPE_BUFFER_SIZE)
+        try:
+            consume(source)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            # Unblocks a producer still writing, which then sees a broken pipe
+            source.close()
+
+    consumer = threading.Thread(target=run, name=name, daemon=True)
+    consumer.start()
+    try:
+        with os.fdopen(write_fd, 'wb', buffering=PIPE_BUFFER_SIZE) as sink:
+            try:
+                produce(sink)
+            except BrokenPipeError:
+                raise
+            except BaseException as e:
+                reader.abort(e)
+                raise
+    except BrokenPipeError:
+        # The consumer stopped reading early: report the producer's or the consumer's own error
+        consumer.join()
+        if reader.error is not None:
+            raise reader.error from None
+        if errors:
+            logger.error(f"Error in {name}: {str(errors[0])}")
+            raise errors[0] from None
+        raise
+    finally:
+        consumer.join()
+    if errors:
+        logger.error(f"Error in {name}: {str(errors[0])}")
+        raise errors[0]
+    return reader.bytes_read
+
+
+def pipe_serialized(df, output_format, consume, schema=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Serialize df in output_format into consume(source) through pipe_stream; returns the bytes read."""
+    return pipe_stream(
+        lambda sink: output_format.write_chunks(df, sink, schema, chunk_rows),
+        consume,
+        name=f'upload-{output_format.name}'
+    )
@@ -0,0 +1,151 @@
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_SECONDS = float(os.environ.get('STREAMFORGE_INTERVAL_SECONDS', '15'))
+RATE_KEYS = ('rows_per_sec', 'files_per_min', 'bytes_per_sec')
+
+# A table that fell behind may catch up by at most this many intervals' worth per batch
+MAX_CATCH_UP_INTERVALS = 4
+
+
+def get_target_rate(schema):
+    """Return the {rows_per_sec, files_per_min, bytes_per_sec} targets set in generator_config.target_rate."""
+    target = (schema.get('generator_config') or {}).get('target_rate') or {}
+    unknown = set(target) - set(RATE_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown target_rate keys for {schema.get('table')}: {', '.join(sorted(unknown))}")
+    return {key: float(target[key]) for key in RATE_KEYS if target.get(key)}
+
+
+class TableRate:
+    """Targets and running totals for one paced table."""
+
+    __slots__ = ('target', 'rows', 'files', 'bytes', 'schedule_lag')
+
+    def __init__(self, target):
+        self.target = target
+        self.rows = 0
+        self.files = 0
+        self.bytes = 0
+        # Seconds the scheduler started the table's latest batch after it was due
+        self.schedule_lag = 0.0
+
+    @property
+    def bytes_per_row(self):
+        return self.bytes / self.rows if self.rows else None
+
+
+class RateController:
+    """Paces generation against per-table target rates.
+
+    Batches are due on a fixed grid kept by the TableScheduler. Before each
+    batch plan() turns a table's targets into the rows and files owed by the
+    batch's deadline: rows_per_sec directly, bytes_per_sec through the bytes
+    per row measured so far, and files_per_min as a number of files (a table
+    with nothing owed is skipped). Tables that fall behind catch up in later
+    batches; report() compares achieved rates against the targets, along
+    with how late the scheduler started each table's latest batch.
+    """
+
+    def __init__(self, interval_seconds=None, clock=time.monotonic):
+        self.interval_seconds = interval_seconds or DEFAULT_INTERVAL_SECONDS
+        self.clock = clock
+        self.tables = {}
+        self.started = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the schedule clock; the first iteration's deadline is one interval after it."""
+        self.started = self.clock()
+
+    def _elapsed(self):
+        return self.clock() - self.started
+
+    def plan(self, table, schema, default_rows, horizon=None, interval_seconds=None):
+        """Return (rows, files) for this iteration of a table; rows is 0 when it should be skipped.
+
+        Batches pass the seconds from start() to their deadline as horizon and
+        their table's cadence as interval_seconds: one cadence for the first
+        iteration, batch n + 1 cadences for scheduled batch n. Without them the
+        plan is for one interval_seconds.
+        """
+        with self._lock:
+            state = self.tables.get(table)
+            if state is None:
+                state = self.tables[table] = TableRate(get_target_rate(schema))
+            target = state.target
+            if horizon is None:
+                horizon = self.interval_seconds
+            interval = interval_seconds or self.interval_seconds
+
+            files = 1
+            if 'files_per_min' in target:
+                files = math.floor(target['files_per_min'] * horizon / 60) - state.files
+                if files <= 0:
+                    return 0, 0
+
+            rows = default_rows
+            if 'rows_per_sec' in target:
+                nominal = target['rows_per_sec'] * interval
+                rows = min(target['rows_per_sec'] * horizon - state.rows, nominal * MAX_CATCH_UP_INTERVALS)
+            elif 'bytes_per_sec' in target and state.bytes_per_row:
+                nominal = target['bytes_per_sec'] * interval / state.bytes_per_row
+                owed = (target['bytes_per_sec'] * horizon - state.bytes) / state.bytes_per_row
+                rows = min(owed, nominal * MAX_CATCH_UP_INTERVALS)
+            rows = max(int(rows), 0)
+            if rows == 0:
+                return 0, 0
+            return rows, min(files, rows)
+
+    def record(self, table, result):
+        """Add a SaveResult (or None for a skipped table) to a table's totals."""
+        if result is None:
+            return
+        with self._lock:
+            state = self.tables.setdefault(table, TableRate({}))
+            state.rows += result.rows
+            state.files += result.files
+            state.bytes += result.bytes
+
+    def record_schedule_lag(self, table, seconds):
+        """Note how late the scheduler started a table's latest batch."""
+        with self._lock:
+            self.tables.setdefault(table, TableRate({})).schedule_lag = seconds
+
+    def report(self):
+        """Achieved vs target rates per table, with lag in rows/files/bytes behind target.
+
+        schedule_lag_seconds is how late each table's latest batch started, and
+        at the top level the largest of those.
+        """
+        elapsed = max(self._elapsed(), 1e-9) if self.started is not None else None
+        report = {'interval_seconds': self.interval_seconds, 'schedule_lag_seconds': 0.0, 'tables': {}}
+        if elapsed is None:
+            return report
+        with self._lock:
+            report['schedule_lag_seconds'] = round(max(
+                [0.0] + [state.schedule_lag for state in self.tables.values()]
+            ), 2)
+            for table, state in self.tables.items():
+                achieved = {
+                    'rows_per_sec': state.rows / elapsed,
+                    'files_per_sec': state.files / elapsed,
+                    'files_per_min': state.files * 60 / elapsed,
+                    'bytes_per_sec': state.bytes / elapsed,
+                }
+                totals = {'rows_per_sec': state.rows, 'files_per_min': state.files, 'bytes_per_sec': state.bytes}
+                entry = {'achieved': {key: round(value, 2) for key, value in achieved.items()},
+                         'schedule_lag_seconds': round(state.schedule_lag, 2)}
+                if state.target:
+                    entry['target'] = state.target
+                    entry['lag'] = {}
+                    for key, rate in state.target.items():
+                        expected = rate * elapsed / (60 if key == 'files_per_min' else 1)
+                        entry['lag'][key] = round(max(0.0, expected - totals[key]), 2)
+                report['tables'][table] = entry
+        return report
@@ -0,0 +1,232 @@
+import logging
+import os
+import threading
+from collections import namedtuple
+from collections.abc import Mapping
+from types import MappingProxyType
+
+import yaml
+
+from .distributions import WEIGHTED, compile_distribution
+from .event_time import compile_event_time
+from .key_index import column_reference
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_TYPES = ('int', 'float', 'bool', 'string', 'datetime')
+# Range of int/float columns without min/max
+DEFAULT_INT_RANGE = (1, 9999)
+DEFAULT_FLOAT_RANGE = (0.0, 1000.0)
+TABLE_TYPES = ('dimension', 'fact', 'change_feed')
+REQUIRED_CHANGE_FEED_RULES = ('operation_distribution', 'updatable_fields', 'time_range',
+                              'time_between_changes', 'delete_null_fields')
+
+ColumnSpec = namedtuple(
+    'ColumnSpec',
+    ['name', 'dtype', 'format', 'null_probability', 'cardinality', 'weights', 'quality_rules', 'definition',
+     'distribution'],
+    defaults=(None,)
+)
+ColumnSpec.__doc__ = "Normalized, immutable definition of one schema column."
+
+
+class SchemaError(ValueError):
+    """Raised when a schema file is missing required keys or has invalid values."""
+
+
+def freeze(value):
+    """Recursively convert dicts to read-only mappings and lists to tuples."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Recursively copy read-only mappings and tuples back into plain dicts and lists."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+def weighted_value_count(definition, quality_rules=None):
+    """How many values a column's weighted distribution picks from, or None if only known at generation.
+
+    That is a choice format's choices, or the min..max of an int column that
+    sets either bound; foreign keys and value pools are sized at generation,
+    and floats and quality-ruled columns take any number of weights (one per
+    bucket of their range).
+    """
+    format_spec = definition.get('format')
+    if format_spec and '|' in format_spec:
+        return len(format_spec.split('|'))
+    if (str(definition.get('type', 'string')).lower() == 'int' and quality_rules is None
+            and column_reference(definition) is None and ('min' in definition or 'max' in definition)):
+        low = int(definition.get('min', DEFAULT_INT_RANGE[0]))
+        high = int(definition.get('max', DEFAULT_INT_RANGE[1]))
+        return high - low + 1
+    return None
+
+
+def compile_columns(schema):
+    """Normalize a mapping-style 'columns' section into ColumnSpecs (None for list-style columns)."""
+    columns = schema.get('columns')
+    if not isinstance(columns, Mapping):
+        return None
+    rules = schema.get('data_quality_rules') or {}
+    specs = []
+    for col, col_def in columns.items():
+        if isinstance(col_def, Mapping):
+            try:
+                distribution = compile_distribution(col_def.get('distribution'), col_def.get('skew'))
+            except (TypeError, ValueError) as e:
+                raise SchemaError(f"column '{col}': {e}")
+            if distribution is not None and distribution.kind == WEIGHTED:
+                count = weighted_value_count(col_def, rules.get(col))
+                if count is not None and count != len(distribution.weights):
+                    raise SchemaError(f"column '{col}': weighted distribution has {len(distribution.weights)} "
+                                      f"weights for {count} values")
+            specs.append(ColumnSpec(
+                name=col,
+                dtype=str(col_def.get('type', 'string')).lower(),
+                format=col_def.get('format'),
+                null_probability=col_def.get('null_probability', 0.0),
+                cardinality=col_def.get('cardinality'),
+                weights=col_def.get('weights'),
+                quality_rules=rules.get(col),
+                definition=col_def,
+                distribution=distribution
+            ))
+        else:
+            specs.append(ColumnSpec(col, str(col_def).lower(), None, 0.0, None, None, rules.get(col), col_def))
+    return tuple(specs)
+
+
+class CompiledSchema(Mapping):
+    """A validated, read-only table schema plus its normalized column specs.
+
+    Behaves like the schema dict loaded from YAML (``schema['columns']``,
+    ``schema.get('num_rows')``), but nested dicts are read-only and lists are
+    tuples, so one instance can be shared by every generator that uses it.
+    """
+
+    def __init__(self, path, data, mtime=None):
+        self.path = path
+        self.mtime = mtime
+        self._raw = thaw(data)
+        self._data = freeze(data)
+        self.industry = os.path.basename(os.path.dirname(path)) if path else None
+        self.table = data.get('table') or data.get('table_name')
+        self.table_type = data.get('type', 'fact')
+        try:
+            self.columns = compile_columns(self._data)
+        except SchemaError as e:
+            raise SchemaError(f"{path or self.table or 'schema'}: {e}") from None
+        try:
+            # The clock of fact tables generated in event-time mode (generator_config.event_time)
+            self.event_time = compile_event_time(self._data, self.columns) if self.table_type == 'fact' else None
+        except (TypeError, ValueError) as e:
+            raise SchemaError(f"{path or self.table or 'schema'}: {e}") from None
+        self._validate()
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"CompiledSchema({self.industry}/{self.table}, type={self.table_type})"
+
+    def __reduce__(self):
+        # MappingProxyType does not pickle; rebuild from the raw data in worker processes
+        return (CompiledSchema, (self.path, self._raw, self.mtime))
+
+    def to_dict(self):
+        """Return a mutable deep copy of the underlying schema data."""
+        return thaw(self._raw)
+
+    def with_overrides(self, **overrides):
+        """Return a new CompiledSchema with top-level keys replaced (e.g. num_rows)."""
+        data = self.to_dict()
+        data.update(thaw(overrides))
+        return CompiledSchema(self.path, data, self.mtime)
+
+    def _validate(self):
+        where = self.path or self.table or 'schema'
+        if not self.table:
+            raise SchemaError(f"{where}: missing 'table' (or 'table_name')")
+        if 'columns' not in self._data:
+            raise SchemaError(f"{where}: missing 'columns'")
+        if self.table_type not in TABLE_TYPES:
+            raise SchemaError(f"{where}: unknown table type '{self.table_type}'")
+
+        num_rows = self._data.get('num_rows')
+        if num_rows is not None and (not isinstance(num_rows, int) or num_rows < 0):
+            raise SchemaError(f"{where}: num_rows must be a non-negative integer")
+
+        for spec in self.columns or ():
+            if spec.dtype not in SUPPORTED_TYPES:
+                raise SchemaError(f"{where}: column '{spec.name}' has unsupported type '{spec.dtype}'")
+            if not 0 <= spec.null_probability <= 1:
+                raise SchemaError(f"{where}: column '{spec.name}' null_probability must be between 0 and 1")
+            definition = spec.definition if isinstance(spec.definition, Mapping) else {}
+            if 'min' in definition and 'max' in definition and definition['min'] > definition['max']:
+                raise SchemaError(f"{where}: column '{spec.name}' has min greater than max")
+            rules = spec.quality_rules
+            if rules is not None and ('min_value' in rules) != ('max_value' in rules):
+                raise SchemaError(f"{where}: data_quality_rules for '{spec.name}' need both min_value and max_value")
+
+        if self.table_type == 'change_feed':
+            rules = self._data.get('change_feed_rules') or {}
+            missing = [key for key in REQUIRED_CHANGE_FEED_RULES if key not in rules]
+            if missing:
+                raise SchemaError(f"{where}: change_feed_rules missing {', '.join(missing)}")
+
+
+class SchemaRegistry:
+    """Loads, validates and caches compiled schemas, reloading files whose mtime changed."""
+
+    def __init__(self):
+        self._schemas = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the compiled schema for a YAML file, re-parsing only if it changed."""
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._schemas.get(path)
+            if cached is not None and cached.mtime == mtime:
+                return cached
+            with open(path) as f:
+                data = yaml.safe_load(f)
+            if not isinstance(data, Mapping):
+                raise SchemaError(f"{path}: expected a mapping at the top level")
+            compiled = CompiledSchema(path, data, mtime)
+            self._schemas[path] = compiled
+            logger.info(f"{'Reloaded' if cached else 'Compiled'} schema: {path}")
+            return compiled
+
+    def load_industry(self, schema_base_path, industry):
+        """Return the compiled schemas for every YAML file in an industry directory."""
+        industry_path = os.path.join(schema_base_path, industry)
+        return [
+            self.get(os.path.join(industry_path, file))
+            for file in sorted(os.listdir(industry_path))
+            if file.endswith((".yml", ".yaml"))
+        ]
+
+    def clear(self):
+        """Forget all cached schemas."""
+        with self._lock:
+            self._schemas.clear()
+
+
+schema_registry = SchemaRegistry()
@@ -0,0 +1,85 @@
+import zlib
+
+import numpy as np
+
+
+def _table_key(table):
+    """Stable 32-bit key for a table name (built-in hash() is randomized per process)."""
+    return zlib.crc32(str(table).encode('utf-8'))
+
+
+def resolve_seed(run_seed, schema):
+    """Pick the seed for a table: generator_config.seed overrides the run-level seed."""
+    schema_seed = (schema.get('generator_config') or {}).get('seed')
+    seed = schema_seed if schema_seed is not None else run_seed
+    return None if seed is None else int(seed)
+
+
+def derive_seed_sequence(seed, table, iteration=0, partition=0):
+    """Derive an independent SeedSequence for one table, iteration and partition.
+
+    The stream depends only on these inputs, never on the order in which tables
+    are generated, so serial, parallel and sharded runs produce identical data.
+    Without a seed the sequence is drawn from OS entropy.
+    """
+    if seed is None:
+        return np.random.SeedSequence()
+    return np.random.SeedSequence(entropy=seed, spawn_key=(_table_key(table), int(iteration), int(partition)))
+
+
+_UINT64_MASK = 0xFFFFFFFFFFFFFFFF
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def _mix64(x):
+    """SplitMix64 finalizer over a uint64 array (wraps modulo 2**64)."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class KeyedRandom:
+    """Counter-based random draws keyed by (key, version) instead of by position.
+
+    Row i's draws depend only on the seed, the stream name, keys[i] and
+    versions[i], so a row version can be regenerated later, alone or in any
+    batch, without storing its values. Implements the subset of
+    numpy.random.Generator used by ColumnarEngine; every call must draw exactly
+    one value (or one row of values) per key.
+    """
+
+    def __init__(self, seed, stream, keys, versions):
+        keys = np.asarray(keys).astype(np.uint64)
+        versions = np.asarray(versions).astype(np.uint64)
+        base = np.uint64((int(seed) ^ (_table_key(stream) << 32)) & _UINT64_MASK)
+        self._row_hash = _mix64(_mix64(keys ^ base) ^ (versions * np.uint64(_GOLDEN_GAMMA)))
+        self._calls = 0
+
+    def __len__(self):
+        return len(self._row_hash)
+
+    def _bits(self, size):
+        shape = tuple(int(n) for n in np.atleast_1d(size))
+        if shape[0] != len(self._row_hash):
+            raise ValueError(f"KeyedRandom draws need one row per key ({len(self._row_hash)}), got {shape[0]}")
+        self._calls += 1
+        hashed = self._row_hash ^ np.uint64((self._calls * _GOLDEN_GAMMA) & _UINT64_MASK)
+        if len(shape) == 2:
+            hashed = hashed[:, None] + np.arange(1, shape[1] + 1, dtype=np.uint64) * np.uint64(_GOLDEN_GAMMA)
+        return _mix64(hashed)
+
+    def random(self, size):
+        return (self._bits(size) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+    def uniform(self, low, high, size):
+        return low + (high - low) * self.random(size)
+
+    def integers(self, low, high, size):
+        return low + np.minimum((self.random(size) * (high - low)).astype(np.int64), high - low - 1)
+
+    def choice(self, a, size, p=None):
+        if p is None:
+            return self.integers(0, a, size)
+        return np.minimum(np.searchsorted(np.cumsum(p), self.random(size), side='right'), a - 1)
@@ -0,0 +1,58 @@
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+STATE_DIR_ENV = 'STREAMFORGE_STATE_DIR'
+
+
+class StateStore:
+    """JSON-backed store for generator state that must survive across iterations.
+
+    Generators are recreated on every iteration, so anything that has to carry
+    over (high-watermarks, sequence numbers) is persisted here, one file per
+    table under ``<state_dir>/<output base path>/<industry>/``. State always
+    lives on the local filesystem, even when data is written to a UC volume.
+    """
+
+    def __init__(self, output_base_path, state_dir=None):
+        self.state_dir = state_dir or os.environ.get(STATE_DIR_ENV) or os.path.join(
+            tempfile.gettempdir(), 'streamforge_state'
+        )
+        # Keep state for different output locations apart
+        self.root = os.path.join(self.state_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', str(output_base_path)).strip('_'))
+
+    def _path(self, industry, table):
+        return os.path.join(self.root, industry, f"{table}.json")
+
+    def load(self, industry, table):
+        """Return the saved state for a table, or an empty dict."""
+        path = self._path(industry, table)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable generator state {path}: {str(e)}")
+            return {}
+
+    def save(self, industry, table, state):
+        """Atomically persist the state for a table."""
+        path = self._path(industry, table)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, path)
+
+    def clear(self, industry):
+        """Drop all saved state for an industry."""
+        path = os.path.join(self.root, industry)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+            logger.info(f"Cleared generator state: {path}")
@@ -0,0 +1,95 @@
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from .generator_factory import create_generator
+
+logger = logging.getLogger(__name__)
+
+
+def generate_table(table, generator_args):
+    """Process pool entry point: generate one table.
+
+    Returns (df, pending_state, None) for a table that fits in one chunk, to be
+    saved by the parent. Larger tables are saved here part by part, so they
+    never cross the process boundary whole, and (None, None, save_result) is
+    returned.
+    """
+    generator = create_generator(**generator_args)
+    chunks = generator.generate_chunks()
+    first = next(chunks, None)
+    second = next(chunks, None)
+    if second is None:
+        return first, generator._pending_state, None
+    path = generator.save_chunks(itertools.chain([first, second], chunks), table)
+    return None, None, generator.save_result(path)
+
+
+class TableRunner:
+    """Generates tables in a process pool and overlaps their uploads in a thread pool.
+
+    Generation is CPU-bound (NumPy/Faker work), so it runs in worker processes;
+    saving is I/O-bound and runs on threads in this process, where the shared
+    workspace client lives. Tables larger than one chunk are the exception:
+    their workers save them part by part. Each run() waits for all of its
+    tables, which lets callers order dependent phases (dimensions before facts).
+    """
+
+    def __init__(self, generation_workers, upload_workers=4):
+        self.generation_workers = generation_workers
+        self.upload_workers = upload_workers
+        # spawn avoids forking a multi-threaded web server process
+        self.generation_pool = ProcessPoolExecutor(
+            max_workers=generation_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        self.upload_pool = ThreadPoolExecutor(max_workers=upload_workers, thread_name_prefix='upload')
+
+    def _save(self, table, generator_args, df, pending_state):
+        generator = create_generator(**generator_args)
+        generator._pending_state = pending_state
+        return generator.save_result(generator.save_data(df, table))
+
+    def run(self, jobs, skip_empty=False):
+        """Generate and save each (table, generator_args) job.
+
+        Returns {table: SaveResult}, with None for tables skipped because they
+        produced no rows and skip_empty is set.
+        """
+        results = {}
+        generation_futures = {
+            self.generation_pool.submit(generate_table, table, generator_args): (table, generator_args)
+            for table, generator_args in jobs
+        }
+        upload_futures = {}
+        try:
+            for future in as_completed(generation_futures):
+                table, generator_args = generation_futures[future]
+                df, pending_state, saved = future.result()
+                if df is None:
+                    logger.info(f"Generated and saved table {table} in parts")
+                    results[table] = saved
+                    continue
+                logger.info(f"Generated {len(df)} rows for table: {table}")
+                if skip_empty and df.empty:
+                    logger.info(f"No new data for table {table} - skipping save")
+                    results[table] = None
+                    continue
+                upload_futures[self.upload_pool.submit(self._save, table, generator_args, df, pending_state)] = table
+            for future in as_completed(upload_futures):
+                results[upload_futures[future]] = future.result()
+        except Exception:
+            for future in list(generation_futures) + list(upload_futures):
+                future.cancel()
+            raise
+        return results
+
+    def shutdown(self, terminate=False):
+        """Stop both pools, abandoning queued work; terminate also kills tables still generating."""
+        if terminate:
+            # ProcessPoolExecutor has no public way to stop busy workers before Python 3.14
+            for process in list((getattr(self.generation_pool, '_processes', None) or {}).values()):
+                process.terminate()
+        self.generation_pool.shutdown(wait=False, cancel_futures=True)
+        self.upload_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,97 @@
+import heapq
+import itertools
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+
+def get_cadence(schema, default_seconds):
+    """Seconds between batches of a table: generator_config.cadence, else default_seconds."""
+    cadence = (schema.get('generator_config') or {}).get('cadence')
+    return float(cadence) if cadence else float(default_seconds)
+
+
+class TableScheduler:
+    """Runs every table on its own cadence from a priority queue of next-due times.
+
+    Batches run on a shared thread pool, so a slow table only delays its own
+    next batch, never the others. A table is queued again only once its batch
+    has finished, on a fixed grid (previous due time + cadence); if it is
+    already late it runs as soon as a worker is free and the overrun is
+    reported as lag.
+    """
+
+    def __init__(self, run_batch, workers=4, clock=time.monotonic):
+        # run_batch(table, batch_number) generates and saves one batch
+        self.run_batch = run_batch
+        self.workers = workers
+        self.clock = clock
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='table-batch')
+        self._queue = []
+        self._order = itertools.count()
+        self.cadences = {}
+        self.batches = {}
+        self.lag = {}
+
+    def add(self, table, cadence, first_batch=1, first_due=None):
+        """Schedule a table; its first batch is due one cadence from now unless first_due is given."""
+        self.cadences[table] = cadence
+        self.batches[table] = first_batch
+        self.lag[table] = 0.0
+        due = first_due if first_due is not None else self.clock() + cadence
+        heapq.heappush(self._queue, (due, next(self._order), table))
+
+    def _submit_due(self, running):
+        """Start every queued table whose due time has passed."""
+        now = self.clock()
+        while self._queue and self._queue[0][0] <= now:
+            due, _, table = heapq.heappop(self._queue)
+            self.lag[table] = now - due
+            batch = self.batches[table]
+            logger.debug(f"Running batch {batch} of {table} ({self.lag[table]:.2f}s late)")
+            running[self.pool.submit(self.run_batch, table, batch)] = (table, due)
+
+    def _finish(self, future, running):
+        """Re-queue a finished table on its grid, skipping any slots it overran."""
+        table, due = running.pop(future)
+        future.result()
+        self.batches[table] += 1
+        cadence = self.cadences[table]
+        next_due = due + cadence
+        now = self.clock()
+        if next_due < now:
+            missed = int((now - next_due) // cadence)
+            logger.warning(f"Table {table} overran its {cadence}s cadence; running next batch immediately")
+            next_due += missed * cadence
+        heapq.heappush(self._queue, (next_due, next(self._order), table))
+
+    def run(self, should_continue=lambda: True, poll_seconds=0.5):
+        """Run batches until should_continue() returns False or a batch raises."""
+        running = {}
+        try:
+            while should_continue():
+                self._submit_due(running)
+                timeout = poll_seconds
+                if self._queue:
+                    timeout = min(timeout, max(0.0, self._queue[0][0] - self.clock()))
+                if running:
+                    done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._finish(future, running)
+                else:
+                    time.sleep(timeout)
+        finally:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def report(self):
+        """Cadence, batches run so far (counting the first iteration) and last start lag per table."""
+        return {
+            table: {
+                'cadence_seconds': self.cadences[table],
+                'batches': self.batches[table],
+                'lag_seconds': round(self.lag[table], 2),
+            }
+            for table in self.cadences
+        }
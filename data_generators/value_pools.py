@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+from faker import Faker
+
+from .seeding import derive_seed_sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.environ.get('STREAMFORGE_VALUE_POOL_SIZE', '5000'))
+POOL_CACHE_DIR_ENV = 'STREAMFORGE_VALUE_POOL_CACHE'
+DEFAULT_LOCALE = 'en_US'
+
+
+def _phone(fake):
+    return f"({fake.random_number(digits=3)}) {fake.random_number(digits=3)}-{fake.random_number(digits=4)}"
+
+
+# Faker-backed value providers, keyed by the names used in faker_provider_for()
+PROVIDERS = {
+    'name': lambda fake: fake.name(),
+    'email': lambda fake: fake.email(),
+    'address': lambda fake: fake.address(),
+    'city': lambda fake: fake.city(),
+    'state': lambda fake: fake.state(),
+    'zipcode': lambda fake: fake.zipcode(),
+    'phone': _phone,
+    'word': lambda fake: fake.word().title(),
+}
+
+
+def faker_provider_for(col):
+    """Pick the Faker provider for a string column without a format, based on its name."""
+    col_lower = col.lower()
+    if 'name' in col_lower:
+        return 'name'
+    if 'email' in col_lower:
+        return 'email'
+    if 'address' in col_lower:
+        return 'address'
+    if 'city' in col_lower:
+        return 'city'
+    if 'state' in col_lower:
+        return 'state'
+    if 'zip' in col_lower:
+        return 'zipcode'
+    if ('contact' in col_lower or 'phone' in col_lower) and 'number' in col_lower:
+        return 'phone'
+    return 'word'
+
+
+class ValuePool:
+    """A fixed array of pre-generated values that columns sample from by index."""
+
+    def __init__(self, provider, values):
+        self.provider = provider
+        self.values = np.array(values, dtype=object)
+
+    def __len__(self):
+        return len(self.values)
+
+    def sample(self, rng, size, cardinality=None, distribution=None):
+        """Draw size values; cardinality limits sampling to the first N distinct values.
+
+        A distribution skews the draws towards the first values; without one they are uniform.
+        """
+        limit = min(cardinality or len(self.values), len(self.values))
+        if distribution is not None:
+            return self.values[distribution.positions(rng, limit, size)]
+        return self.values[rng.integers(0, limit, size=size)]
+
+    def pick(self, random, cardinality=None):
+        """Draw a single value using a random.Random instance."""
+        limit = min(cardinality or len(self.values), len(self.values))
+        return self.values[random.randrange(limit)]
+
+
+class ValuePoolCache:
+    """Process-wide cache of value pools, keyed by provider, size, locale and seed.
+
+    Pools are generated once per process from their own seeded Faker instance,
+    so they do not depend on which table asked first. If a cache directory is
+    configured (STREAMFORGE_VALUE_POOL_CACHE) pools are also stored there as
+    JSON and reused across processes and runs.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _cache_path(self, provider, size, locale, seed):
+        cache_dir = self.cache_dir or os.environ.get(POOL_CACHE_DIR_ENV)
+        if not cache_dir:
+            return None
+        return os.path.join(cache_dir, f"{provider}_{locale}_{seed if seed is not None else 'random'}_{size}.json")
+
+    def _build(self, provider, size, locale, seed):
+        fake = Faker(locale)
+        if seed is not None:
+            fake.seed_instance(int(derive_seed_sequence(seed, f"value_pool:{provider}").generate_state(1)[0]))
+        generate = PROVIDERS[provider]
+        values = []
+        seen = set()
+        # Some providers (e.g. state) have fewer distinct values than the pool size
+        for _ in range(size * 3):
+            value = generate(fake)
+            if value not in seen:
+                seen.add(value)
+                values.append(value)
+                if len(values) >= size:
+                    break
+        return values
+
+    def get(self, provider, size=None, locale=DEFAULT_LOCALE, seed=None):
+        """Return the pool for a provider, building (or loading) it on first use."""
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown value pool provider: {provider}")
+        size = size or DEFAULT_POOL_SIZE
+        key = (provider, size, locale, seed)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is not None:
+                return pool
+
+            cache_path = self._cache_path(provider, size, locale, seed)
+            values = None
+            if cache_path and os.path.exists(cache_path):
+                with open(cache_path) as f:
+                    values = json.load(f)
+            if values is None:
+                values = self._build(provider, size, locale, seed)
+                logger.info(f"Built value pool '{provider}' with {len(values)} distinct values")
+                if cache_path:
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                    with open(cache_path, 'w') as f:
+                        json.dump(values, f)
+
+            pool = ValuePool(provider, values)
+            self._pools[key] = pool
+            return pool
+
+
+value_pool_cache = ValuePoolCache()
+
+
+def get_value_pool(provider, size=None, locale=DEFAULT_LOCALE, seed=None):
+    """Return a shared value pool from the process-wide cache."""
+    return value_pool_cache.get(provider, size=size, locale=locale, seed=seed)
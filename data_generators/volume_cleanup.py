@@ -0,0 +1,193 @@
+import logging
+import os
+import posixpath
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLEANUP_WORKERS = int(os.environ.get('STREAMFORGE_CLEANUP_WORKERS', '16'))
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_SECONDS = 0.5
+# Seconds between progress log lines
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+# files and directories count what was deleted; failed lists the paths that could not be
+CleanupResult = namedtuple('CleanupResult', ['files', 'directories', 'seconds', 'files_per_sec', 'failed'])
+# Same fields as the SDK's files.DirectoryEntry
+LocalEntry = namedtuple('LocalEntry', ['path', 'name', 'is_directory', 'file_size', 'last_modified'])
+
+
+def _is_not_found(error):
+    return "not found" in str(error).lower()
+
+
+def _ancestors(path, root):
+    """The directories from path's parent up to root."""
+    while len(path) > len(root):
+        path = posixpath.dirname(path)
+        yield path
+
+
+class CleanupError(Exception):
+    """Some paths could not be deleted; result reports what was and failed lists the rest."""
+
+    def __init__(self, directory, result):
+        self.result = result
+        self.failed = result.failed
+        shown = ', '.join(self.failed[:5]) + (', ...' if len(self.failed) > 5 else '')
+        super().__init__(f"Could not delete {len(self.failed)} paths under {directory}: {shown}")
+
+
+class LocalFilesAPI:
+    """The parts of the Files API that VolumeCleaner uses, backed by a local directory.
+
+    Lets the cleanup engine be exercised without a workspace; missing paths
+    raise errors whose message says "not found", like the SDK's NotFound.
+    """
+
+    def list_directory_contents(self, directory_path):
+        try:
+            items = list(os.scandir(directory_path))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Directory {directory_path} not found")
+        for item in items:
+            stat = item.stat()
+            yield LocalEntry(item.path, item.name, item.is_dir(), stat.st_size, int(stat.st_mtime * 1000))
+
+    def delete(self, file_path):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File {file_path} not found")
+
+    def delete_directory(self, directory_path):
+        try:
+            os.rmdir(directory_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Directory {directory_path} not found")
+
+
+class VolumeCleaner:
+    """Deletes a UC volume directory tree with concurrent, retried Files API calls.
+
+    The tree is listed once, level by level with the listings of each level
+    running concurrently. Files are then deleted on a bounded thread pool, and
+    directories are removed bottom-up, deepest level first. Transient
+    failures are retried with exponential backoff; a path that is already
+    gone counts as deleted. A path that still fails does not stop the others:
+    the directories above it are left in place and clean() raises a
+    CleanupError listing every failed path once the rest is deleted.
+    Progress and throughput are logged as it runs.
+    """
+
+    def __init__(self, files_api, workers=None, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_seconds=DEFAULT_BACKOFF_SECONDS, on_progress=None):
+        # files_api is workspace.files, or a LocalFilesAPI in tests
+        self.files_api = files_api
+        self.workers = workers or DEFAULT_CLEANUP_WORKERS
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        # Called as on_progress(files_deleted, files_total) after each deleted file
+        self.on_progress = on_progress
+
+    def _call(self, operation, path):
+        """Run one Files API call with retries; returns None if the path no longer exists."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return operation(path)
+            except Exception as e:
+                if _is_not_found(e):
+                    return None
+                if attempt == self.max_retries:
+                    logger.error(f"Giving up on {path} after {attempt + 1} attempts: {str(e)}")
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"Retrying {path} in {delay:.2f}s: {str(e)}")
+                time.sleep(delay)
+
+    def _delete(self, operation, path):
+        """Run one delete with retries; returns path if it still failed, else None."""
+        try:
+            self._call(operation, path)
+        except Exception:
+            return path
+        return None
+
+    def _list(self, directory):
+        return self._call(lambda path: list(self.files_api.list_directory_contents(path)), directory)
+
+    def list_tree(self, directory, pool):
+        """Return (files, directories) under directory, or None if it does not exist."""
+        root = self._list(directory)
+        if root is None:
+            return None
+        files, directories = [], [directory]
+        listings = [root]
+        while listings:
+            level = []
+            for entries in listings:
+                for entry in entries or ():
+                    if entry.is_directory:
+                        level.append(entry.path.rstrip('/'))
+                    else:
+                        files.append(entry.path)
+            directories.extend(level)
+            listings = list(pool.map(self._list, level))
+        return files, directories
+
+    def clean(self, directory):
+        """Delete directory and everything under it; returns a CleanupResult, or None if it did not exist.
+
+        Raises CleanupError, after deleting everything else, if any path could not be deleted.
+        """
+        directory = directory.rstrip('/')
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='volume-cleanup') as pool:
+            tree = self.list_tree(directory, pool)
+            if tree is None:
+                return None
+            files, directories = tree
+            logger.info(f"Cleaning {directory}: {len(files)} files in {len(directories)} directories "
+                        f"with {self.workers} workers")
+
+            failed = []
+            last_report = started
+            for done, failure in enumerate(pool.map(lambda path: self._delete(self.files_api.delete, path), files), 1):
+                if failure is not None:
+                    failed.append(failure)
+                if self.on_progress:
+                    self.on_progress(done, len(files))
+                now = time.monotonic()
+                if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                    last_report = now
+                    logger.info(f"Deleted {done}/{len(files)} files ({done / (now - started):.0f} files/s)")
+
+            failed_files = len(failed)
+            # A directory can only go once everything below it is gone, so the
+            # directories above a path that could not be deleted are kept
+            blocked = {parent for path in failed for parent in _ancestors(path, directory)}
+            by_depth = {}
+            for path in directories:
+                by_depth.setdefault(path.count('/'), []).append(path)
+            deleted_directories = 0
+            for depth in sorted(by_depth, reverse=True):
+                level = [path for path in by_depth[depth] if path not in blocked]
+                for failure in pool.map(lambda path: self._delete(self.files_api.delete_directory, path), level):
+                    if failure is None:
+                        deleted_directories += 1
+                    else:
+                        failed.append(failure)
+                        blocked.update(_ancestors(failure, directory))
+
+        seconds = time.monotonic() - started
+        deleted_files = len(files) - failed_files
+        result = CleanupResult(deleted_files, deleted_directories, round(seconds, 2),
+                               round(deleted_files / max(seconds, 1e-9), 1), failed)
+        logger.info(f"Cleaned up {directory}: {result.files} files and {result.directories} directories "
+                    f"in {result.seconds}s ({result.files_per_sec} files/s)")
+        if failed:
+            raise CleanupError(directory, result)
+        return result
@@ -1,79 +1,129 @@
-from datetime import datetime, timedelta
-import random
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Any
 import pandas as pd
-from faker import Faker
 import logging
 
 from .base_generator import BaseGenerator
+from .key_index import column_reference, iter_columns
 
 logger = logging.getLogger(__name__)
 
+WEATHER_COLUMNS = [
+    "site_id", "date", "temperature_celsius", "humidity_percentage",
+    "wind_speed_kmh", "precipitation_mm", "atmospheric_pressure", "weather_condition"
+]
+WEATHER_CONDITIONS = [
+    "Clear", "Partly Cloudy", "Cloudy", "Rain", "Light Rain",
+    "Heavy Rain", "Thunderstorm", "Fog", "Mist"
+]
+# Sites used when the run has no keys for the referenced site dimension
+DEFAULT_NUM_SITES = 20
+
 class WeatherGenerator(BaseGenerator):
     """Generator for weather-related data with temperature, humidity, and other weather metrics."""
     
-    def __init__(self, schema_path, output_base_path, is_local=True):
-        super().__init__(schema_path, output_base_path, is_local=is_local)
-        self.fake = Faker()
+    def __init__(self, schema, output_base_path, key_index=None, is_local=True, output_format=None,
+                 seed=None, iteration=0):
+        super().__init__(schema, output_base_path, is_local=is_local, output_format=output_format,
+                         seed=seed, iteration=iteration)
+        self.key_index = key_index
+        
+        config = self.schema.get('generator_config', {})
+        start_date_str = config.get('start_date')
+        if start_date_str:
+            self.start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+        else:
+            self.start_date = date(1970, 1, 1)
+        end_date_str = config.get('end_date')
+        if end_date_str and end_date_str.lower() != 'now':
+            self.end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+        else:
+            self.end_date = self._now().date()
+        
+        # Incremental mode backfills once, then only emits days past the persisted watermark.
+        # With simulated_days_per_iteration > 0 the watermark advances that many days per
+        # iteration instead of following the wall clock.
+        self.incremental = config.get('incremental', False)
+        self.simulated_days_per_iteration = int(config.get('simulated_days_per_iteration', 0))
+    
+    def _get_date_window(self):
+        """Return the first and last date to generate in this iteration."""
+        if not self.incremental:
+            return self.start_date, self.end_date
+        
+        watermark = self._load_state().get('watermark')
+        if watermark is None:
+            logger.info("No weather watermark found - generating full backfill")
+            return self.start_date, self.end_date
+        
+        watermark = date.fromisoformat(watermark)
+        if self.simulated_days_per_iteration > 0:
+            return watermark + timedelta(days=1), watermark + timedelta(days=self.simulated_days_per_iteration)
+        return watermark + timedelta(days=1), self.end_date
+    
+    def _get_site_ids(self):
+        """The keys written by the dimension the site_id column references."""
+        reference = dict(iter_columns(self.schema)).get('site_id')
+        target = self.key_index.resolve('site_id', column_reference(reference)) if self.key_index else None
+        if target is None:
+            logger.warning(f"No site keys indexed; using {DEFAULT_NUM_SITES} sites")
+            return list(range(1, DEFAULT_NUM_SITES + 1))
+        return self.key_index.keys[target].tolist()
+
+    def _generate_day(self, current_date, site_ids):
+        """Generate one weather record per site for a single day."""
+        # Adjust temperature ranges based on month to make it more realistic
+        month = current_date.month
+        if month in [12, 1, 2]:  # Winter
+            temp_min, temp_max = -20, 10
+        elif month in [3, 4, 5]:  # Spring
+            temp_min, temp_max = 0, 25
+        elif month in [6, 7, 8]:  # Summer
+            temp_min, temp_max = 15, 40
+        else:  # Fall
+            temp_min, temp_max = 5, 30
+        
+        records = []
+        for site_id in site_ids:
+            # Base temperature and humidity with seasonal variation
+            base_temp = self.random.uniform(temp_min, temp_max)
+            # Humidity tends to be higher in warmer months
+            base_humidity = self.random.uniform(
+                40 if month in [6, 7, 8] else 20,  # Higher minimum in summer
+                90 if month in [6, 7, 8] else 70    # Higher maximum in summer
+            )
+            
+            records.append({
+                "site_id": site_id,
+                "date": current_date,
+                "temperature_celsius": round(base_temp + self.random.uniform(-2, 2), 1),
+                "humidity_percentage": round(min(100, max(0, base_humidity + self.random.uniform(-5, 5))), 1),
+                "wind_speed_kmh": round(self.random.uniform(0, 50), 1),
+                "precipitation_mm": round(self.random.uniform(0, 25), 1),
+                "atmospheric_pressure": round(self.random.uniform(980, 1020), 1),
+                "weather_condition": self.random.choice(WEATHER_CONDITIONS)
+            })
+        return records
         
     def generate_data(self):
         """Generate weather records for each site."""
         records = []
         
-        # Set date range to cover historical data
-        end_date = datetime.now().date()
-        start_date = datetime(1970, 1, 1).date()  # Start from 1970 to cover all possible emission dates
+        start_date, end_date = self._get_date_window()
+        if start_date > end_date:
+            logger.info(f"Weather data is up to date through {end_date} - nothing to generate")
+            return pd.DataFrame(columns=WEATHER_COLUMNS)
         logger.info(f"Generating weather data from {start_date} to {end_date}")
         
-        # Get site IDs from dimension references or generate a reasonable range
-        site_ids = []
-        try:
-            # Try to get site IDs from dimension references
-            site_ids = [int(id) for id in range(1, 21)]  # Match site_info num_rows: 20
-        except Exception as e:
-            logger.warning(f"Could not get site IDs from references: {str(e)}")
-            # Fallback to a reasonable range
-            site_ids = list(range(1, 21))
+        # One record per referenced site, so weather grows with the site dimension
+        site_ids = self._get_site_ids()
         
         logger.info(f"Generating weather data for {len(site_ids)} sites")
         
         # Generate weather data for each site and date
         current_date = start_date
         while current_date <= end_date:
-            # Adjust temperature ranges based on month to make it more realistic
-            month = current_date.month
-            if month in [12, 1, 2]:  # Winter
-                temp_min, temp_max = -20, 10
-            elif month in [3, 4, 5]:  # Spring
-                temp_min, temp_max = 0, 25
-            elif month in [6, 7, 8]:  # Summer
-                temp_min, temp_max = 15, 40
-            else:  # Fall
-                temp_min, temp_max = 5, 30
-            
-            for site_id in site_ids:
-                # Base temperature and humidity with seasonal variation
-                base_temp = random.uniform(temp_min, temp_max)
-                # Humidity tends to be higher in warmer months
-                base_humidity = random.uniform(
-                    40 if month in [6, 7, 8] else 20,  # Higher minimum in summer
-                    90 if month in [6, 7, 8] else 70    # Higher maximum in summer
-                )
-                
-                record = {
-                    "site_id": site_id,
-                    "date": current_date,
-                    "temperature_celsius": round(base_temp + random.uniform(-2, 2), 1),
-                    "humidity_percentage": round(min(100, max(0, base_humidity + random.uniform(-5, 5))), 1),
-                    "wind_speed_kmh": round(random.uniform(0, 50), 1),
-                    "precipitation_mm": round(random.uniform(0, 25), 1),
-                    "atmospheric_pressure": round(random.uniform(980, 1020), 1),
-                    "weather_condition": random.choice([
-                        "Clear", "Partly Cloudy", "Cloudy", "Rain", "Light Rain",
-                        "Heavy Rain", "Thunderstorm", "Fog", "Mist"
-                    ])
-                }
-                records.append(record)
+            records.extend(self._generate_day(current_date, site_ids))
             
             # Increment by one day
             current_date += timedelta(days=1)
@@ -82,9 +132,12 @@ class WeatherGenerator(BaseGenerator):
             if current_date.day == 1 and current_date.month == 1:
                 logger.info(f"Generated weather data up to: {current_date}")
         
+        if self.incremental:
+            self._pending_state = {'watermark': end_date.isoformat()}
+        
         logger.info(f"Completed generating {len(records)} weather records")
-        return pd.DataFrame(records)
-
+        return pd.DataFrame(records, columns=WEATHER_COLUMNS)
+    
     def get_reference_values(self, field_name: str) -> List[str]:
         """Get reference values from dimension tables."""
         # This could be enhanced to read from actual dimension tables
@@ -0,0 +1,91 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _find_http_session(client):
+    """Best-effort lookup of the requests.Session behind a WorkspaceClient."""
+    api_client = getattr(client, 'api_client', None)
+    for holder in (api_client, getattr(api_client, '_api_client', None)):
+        session = getattr(holder, '_session', None)
+        if session is not None:
+            return session
+    return None
+
+
+class WorkspaceClientPool:
+    """Process-wide, thread-safe holder for a shared Databricks WorkspaceClient.
+
+    Building a WorkspaceClient resolves authentication and opens a new HTTP
+    session, so every generator shares one client (and its urllib3 connection
+    pools) instead of creating its own per file. Counters record how often the
+    client and its HTTP connections are reused.
+    """
+
+    def __init__(self, **config):
+        self._config = config
+        self._lock = threading.Lock()
+        self._client = None
+        self._clients_created = 0
+        self._client_requests = 0
+
+    def get_client(self):
+        """Return the shared client, creating it on first use."""
+        with self._lock:
+            self._client_requests += 1
+            if self._client is None:
+                from databricks.sdk import WorkspaceClient
+                self._client = WorkspaceClient(**self._config)
+                self._clients_created += 1
+                logger.info("Created shared Databricks WorkspaceClient")
+            return self._client
+
+    def configure(self, **config):
+        """Replace the client configuration (e.g. max_connections_per_pool) and drop the current client."""
+        with self._lock:
+            self._config = config
+            self._client = None
+
+    def reset(self):
+        """Drop the shared client so the next call re-authenticates."""
+        with self._lock:
+            self._client = None
+
+    def _http_counters(self):
+        """Sum urllib3 connection pool counters for the shared client's session."""
+        session = _find_http_session(self._client) if self._client is not None else None
+        connections, requests = 0, 0
+        if session is None:
+            return connections, requests
+        for adapter in session.adapters.values():
+            pools = getattr(getattr(adapter, 'poolmanager', None), 'pools', None)
+            if pools is None:
+                continue
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    connections += getattr(pool, 'num_connections', 0)
+                    requests += getattr(pool, 'num_requests', 0)
+        return connections, requests
+
+    def stats(self):
+        """Return client and HTTP connection reuse counters."""
+        with self._lock:
+            connections, requests = self._http_counters()
+            return {
+                'clients_created': self._clients_created,
+                'client_requests': self._client_requests,
+                'client_reuses': self._client_requests - self._clients_created,
+                'http_connections_opened': connections,
+                'http_requests': requests,
+                'http_connection_reuses': max(0, requests - connections),
+            }
+
+
+workspace_client_pool = WorkspaceClientPool()
+
+
+def get_workspace_client():
+    """Return the process-wide shared WorkspaceClient."""
+    return workspace_client_pool.get_client()
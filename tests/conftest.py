@@ -0,0 +1,12 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    """Keeps generator state (watermarks, key state) of every test in its own tmp_path."""
+    monkeypatch.setenv('STREAMFORGE_STATE_DIR', str(tmp_path / 'state'))
@@ -0,0 +1,67 @@
+import pandas as pd
+
+from data_generators import ChangeFeedGenerator, CompiledSchema
+
+CHANGES = {
+    'table': 'plan_changes',
+    'type': 'change_feed',
+    'num_rows': 200,
+    'change_feed_rules': {
+        'operation_distribution': {'INSERT': 1, 'UPDATE': 2, 'DELETE': 0.5},
+        'updatable_fields': ['plan_code'],
+        'update_field_probability': 0.0,
+        'time_range': {'start_date': '2024-01-01', 'end_date': '2024-01-20'},
+        'time_between_changes': {'min': 1, 'max': 5},
+        'delete_null_fields': [],
+        'mutation_rate': 0.5,
+        'reinsert_probability': 1.0,
+        'dlt_config': {'keys': ['customer_id'], 'sequence_by': 'change_timestamp'},
+    },
+    'columns': {
+        'customer_id': 'int',
+        'region': {'type': 'string', 'format': 'NORTH|SOUTH'},
+        'plan_code': 'int',
+        'operation': {'type': 'string', 'format': 'INSERT|UPDATE|DELETE'},
+        'change_timestamp': 'datetime',
+    },
+}
+
+
+def generate_feed(tmp_path, iterations, **time_range):
+    rules = dict(CHANGES['change_feed_rules'], time_range={**CHANGES['change_feed_rules']['time_range'], **time_range})
+    schema = CompiledSchema(str(tmp_path / 'schema' / 'Shop' / 'plan_changes.yml'), dict(CHANGES, change_feed_rules=rules))
+    frames = []
+    for iteration in range(iterations):
+        generator = ChangeFeedGenerator(schema, str(tmp_path / 'out'), seed=7, iteration=iteration)
+        frames.append(generator.generate_data().assign(iteration=iteration))
+        generator._commit_state()
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_reinsert_does_not_carry_values_from_before_delete(tmp_path):
+    feed = generate_feed(tmp_path, 4)
+    inserts = feed[feed['operation'] == 'INSERT']
+    first = inserts[inserts['iteration'] == 0].set_index('customer_id')['plan_code']
+    reinserts = inserts[inserts['iteration'] > 0]
+    assert len(reinserts) > 10
+    # Fields never change in an UPDATE here, so a re-INSERT is the only source of new values
+    assert (reinserts['plan_code'].values != first.loc[reinserts['customer_id']].values).all()
+    for _, rows in feed[feed['operation'] == 'UPDATE'].groupby('customer_id'):
+        key_inserts = inserts[inserts['customer_id'] == rows['customer_id'].iloc[0]]
+        for _, row in rows.iterrows():
+            latest = key_inserts[key_inserts['change_timestamp'] < row['change_timestamp']].iloc[-1]
+            assert row['plan_code'] == latest['plan_code']
+
+
+def test_rolling_time_range_runs_past_end_date(tmp_path):
+    feed = generate_feed(tmp_path, 5)
+    assert feed['change_timestamp'].max() > '2024-01-20T00:00:00'
+
+
+def test_fixed_time_range_stops_at_end_date(tmp_path):
+    feed = generate_feed(tmp_path, 5, rolling=False)
+    assert feed['change_timestamp'].max() <= '2024-01-20T00:00:00'
+    assert (feed['iteration'] > 0).any()
+    for _, rows in feed.groupby('customer_id'):
+        assert rows['change_timestamp'].is_monotonic_increasing
+        assert rows['change_timestamp'].is_unique
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from data_generators import CompiledSchema, KeyIndex, SchemaError
+from data_generators.column_engine import ColumnarEngine
+
+
+def compile_schema(columns, **extra):
+    return CompiledSchema('/schemas/Test/events.yml', {'table': 'events', 'columns': columns, **extra})
+
+
+def generate(columns, num_rows=5000, key_index=None, **extra):
+    engine = ColumnarEngine(compile_schema(columns, **extra), key_index=key_index, rng=np.random.default_rng(3))
+    return engine.generate(num_rows)
+
+
+@pytest.mark.parametrize('distribution', [None, {'type': 'zipf', 's': 1.2}])
+def test_int_and_float_columns_stay_within_min_and_max(distribution):
+    columns = {
+        'quantity': {'type': 'int', 'min': 5, 'max': 8},
+        'price': {'type': 'float', 'min': 2.5, 'max': 3.0},
+    }
+    if distribution:
+        for definition in columns.values():
+            definition['distribution'] = distribution
+    df = generate(columns)
+    assert df['quantity'].between(5, 8).all()
+    assert set(df['quantity']) == {5, 6, 7, 8}
+    assert df['price'].between(2.5, 3.0).all()
+
+
+def test_weighted_int_column_needs_one_weight_per_value():
+    with pytest.raises(SchemaError, match='3 weights for 4 values'):
+        compile_schema({'quantity': {'type': 'int', 'min': 5, 'max': 8,
+                                     'distribution': {'type': 'weighted', 'weights': [1, 2, 3]}}})
+
+
+def test_weighted_choice_column_needs_one_weight_per_choice():
+    with pytest.raises(SchemaError, match='2 weights for 3 values'):
+        compile_schema({'status': {'type': 'string', 'format': 'A|B|C',
+                                   'distribution': {'type': 'weighted', 'weights': [1, 2]}}})
+
+
+def test_min_greater_than_max_is_rejected():
+    with pytest.raises(SchemaError, match='min greater than max'):
+        compile_schema({'quantity': {'type': 'int', 'min': 9, 'max': 1}})
+
+
+def test_null_probability_applies_to_every_kind_of_column():
+    columns = {
+        'quantity': {'type': 'int', 'null_probability': 0.3},
+        'status': {'type': 'string', 'format': 'A|B|C', 'null_probability': 0.3},
+        'reading': {'type': 'float', 'null_probability': 0.3},
+    }
+    df = generate(columns, data_quality_rules={'reading': {'min_value': 1, 'max_value': 2}})
+    for column in columns:
+        assert df[column].isna().mean() == pytest.approx(0.3, abs=0.03)
+
+
+def test_anomalies_fall_just_outside_the_quality_range():
+    df = generate({'reading': 'float'},
+                  data_quality_rules={'reading': {'min_value': 10, 'max_value': 20, 'anomaly_percentage': 0.2}})
+    values = df['reading']
+    below = values.between(9.7, 9.9)
+    above = values.between(20.1, 20.3)
+    assert (values.between(10, 20) | below | above).all()
+    assert (below | above).mean() == pytest.approx(0.2, abs=0.03)
+    assert below.any() and above.any()
+
+
+@pytest.mark.parametrize('definition', ['int', {'type': 'int', 'distribution': {'type': 'zipf', 's': 1.2}}])
+def test_foreign_keys_come_from_the_dimension_key_range(definition):
+    df = generate({'store_id': definition}, key_index=KeyIndex.from_ranges({'stores.store_id': 5}))
+    assert set(df['store_id']) == {1, 2, 3, 4, 5}
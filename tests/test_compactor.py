@@ -0,0 +1,86 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data_generators.compactor import Compactor
+from data_generators.output_formats import OUTPUT_FORMATS, get_output_format
+
+SCHEMA = {'table': 'events', 'columns': {'id': 'int', 'note': 'string', 'ts': 'datetime'}}
+
+
+class NonSeekableStream(io.RawIOBase):
+    """A forward-only stream, like a Files API download."""
+
+    def __init__(self, data):
+        self._source = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._source.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def serialize(output_format, df):
+    sink = io.BytesIO()
+    output_format.write(df, sink, SCHEMA)
+    return sink.getvalue()
+
+
+def frame(start, notes):
+    return pd.DataFrame({
+        'id': range(start, start + len(notes)),
+        'note': notes,
+        'ts': ['2024-01-01T00:00:00'] * len(notes),
+    })
+
+
+@pytest.mark.parametrize('name', list(OUTPUT_FORMATS))
+def test_concat_reads_non_seekable_sources(name):
+    output_format = get_output_format(name)
+    frames = [frame(0, ['a', 'b']), frame(2, ['c'])]
+    sources = [io.BufferedReader(NonSeekableStream(serialize(output_format, df))) for df in frames]
+    sink = io.BytesIO()
+    output_format.concat(iter(sources), sink, SCHEMA)
+    merged = read(output_format, sink.getvalue())
+    assert merged['id'].tolist() == [0, 1, 2]
+    assert merged['note'].tolist() == ['a', 'b', 'c']
+
+
+def test_parquet_concat_types_columns_that_are_null_in_the_first_file():
+    output_format = get_output_format('parquet_snappy')
+    sources = [io.BytesIO(serialize(output_format, df)) for df in (frame(0, [None, None]), frame(2, ['x']))]
+    sink = io.BytesIO()
+    output_format.concat(iter(sources), sink, SCHEMA)
+    merged = pq.read_table(io.BytesIO(sink.getvalue()))
+    assert merged.schema.field('note').type == pa.string()
+    assert merged.column('note').to_pylist() == [None, None, 'x']
+
+
+def test_compactor_merges_old_files_and_removes_originals(tmp_path):
+    output_format = get_output_format('parquet_zstd')
+    table_dir = tmp_path / 'Retail' / 'events'
+    table_dir.mkdir(parents=True)
+    for index in range(3):
+        output_format.write(frame(index, [None if index == 0 else 'n']), str(table_dir / f'data_{index}.parquet'), SCHEMA)
+    compactor = Compactor(str(tmp_path), 'Retail', 'parquet_zstd', min_age_seconds=0, min_files=2,
+                          clock=lambda: 1e12, schemas={'events': SCHEMA})
+    result = compactor.compact_table('events')
+    assert (result.files_in, result.files_out) == (3, 1)
+    assert not list(table_dir.iterdir())
+    compacted = list((tmp_path / 'Retail' / '_compacted' / 'events').iterdir())
+    assert pd.read_parquet(compacted[0])['id'].tolist() == [0, 1, 2]
+
+
+def read(output_format, data):
+    if output_format.reader_format == 'parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    compression = 'gzip' if output_format.name.endswith('gzip') else None
+    if output_format.reader_format == 'csv':
+        return pd.read_csv(io.BytesIO(data), compression=compression, keep_default_na=False)
+    return pd.read_json(io.BytesIO(data), lines=True, compression=compression)
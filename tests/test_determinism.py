@@ -0,0 +1,91 @@
+import hashlib
+import os
+
+import pandas as pd
+import pytest
+import yaml
+
+from data_generators import CompiledSchema, FactGenerator, GenerationEngine, KeyIndex
+
+SALES = {
+    'table': 'sales',
+    'type': 'fact',
+    'num_rows': 250,
+    'generator_config': {'partition_rows': 100, 'chunk_rows': 40,
+                         'event_time': {'start': '2024-01-01T00:00:00', 'seconds_per_batch': 60,
+                                        'late_fraction': 0.1}},
+    'columns': {
+        'sale_id': 'int',
+        'store_id': 'int',
+        'amount': {'type': 'float', 'null_probability': 0.2},
+        'channel': {'type': 'string', 'format': 'WEB|STORE|APP'},
+        'sold_at': 'datetime',
+    },
+}
+STORES = {'table': 'stores', 'type': 'dimension', 'num_rows': 5, 'columns': {'store_id': 'int', 'city': 'string'}}
+KEY_INDEX = KeyIndex.from_ranges({'stores.store_id': 5})
+
+
+def fact_generator(tmp_path, **config):
+    data = dict(SALES, generator_config={**SALES['generator_config'], **config})
+    schema = CompiledSchema(str(tmp_path / 'schema' / 'Shop' / 'sales.yml'), data)
+    return FactGenerator(schema, str(tmp_path / 'out'), KEY_INDEX, seed=11, iteration=3)
+
+
+def as_csv(frames):
+    return pd.concat(list(frames), ignore_index=True).to_csv(index=False)
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 40, 100, 1000])
+def test_chunk_size_does_not_change_output(tmp_path, chunk_rows):
+    expected = fact_generator(tmp_path).generate_data().to_csv(index=False)
+    chunks = list(fact_generator(tmp_path, chunk_rows=chunk_rows).generate_chunks())
+    assert all(len(chunk) <= chunk_rows for chunk in chunks)
+    assert as_csv(chunks) == expected
+
+
+def test_partitions_generate_independently(tmp_path):
+    expected = fact_generator(tmp_path).generate_data().to_csv(index=False)
+    # Each partition from its own generator, in reverse order
+    partitions = {
+        partition: fact_generator(tmp_path).generate_partition(partition)
+        for partition in reversed(range(fact_generator(tmp_path).num_partitions()))
+    }
+    assert len(partitions) == 3
+    assert as_csv(partitions[partition] for partition in sorted(partitions)) == expected
+
+
+@pytest.mark.parametrize('chunk_rows, partition_rows', [(15000, 15000), (1000, 10000), (500000, 100000)])
+def test_partitions_are_capped_by_chunk_size(tmp_path, chunk_rows, partition_rows):
+    data = dict(SALES, num_rows=50000, generator_config={'chunk_rows': chunk_rows})
+    schema = CompiledSchema(str(tmp_path / 'schema' / 'Shop' / 'sales.yml'), data)
+    generator = FactGenerator(schema, str(tmp_path / 'out'), KEY_INDEX, seed=11)
+    assert generator._partition_rows() == partition_rows
+    chunks = list(generator.generate_chunks())
+    assert [len(chunk) for chunk in chunks[:-1]] == [chunk_rows] * (len(chunks) - 1)
+    assert sum(len(chunk) for chunk in chunks) == 50000
+
+
+def generate_industry(schema_dir, output_path, workers):
+    engine = GenerationEngine('Shop', str(output_path), schema_base_path=str(schema_dir), seed=5,
+                              generation_workers=workers)
+    try:
+        engine.generate_iteration()
+    finally:
+        engine.shutdown_table_runner()
+    digests = {}
+    for table in ('stores', 'sales'):
+        directory = os.path.join(output_path, 'Shop', table)
+        data = b''.join(open(os.path.join(directory, name), 'rb').read() for name in sorted(os.listdir(directory)))
+        digests[table] = hashlib.sha256(data).hexdigest()
+    return digests
+
+
+def test_parallel_generation_matches_serial(tmp_path):
+    schema_dir = tmp_path / 'schema' / 'Shop'
+    schema_dir.mkdir(parents=True)
+    for schema in (STORES, SALES):
+        (schema_dir / f"{schema['table']}.yml").write_text(yaml.safe_dump(schema))
+    serial = generate_industry(tmp_path / 'schema', tmp_path / 'serial', workers=1)
+    parallel = generate_industry(tmp_path / 'schema', tmp_path / 'parallel', workers=2)
+    assert serial == parallel
@@ -0,0 +1,85 @@
+import random
+import re
+
+import numpy as np
+import pytest
+
+from data_generators.format_templates import CHOICE, LITERAL, PATTERN, FormatTemplate, compile_format
+
+
+def legacy_format(spec, random):
+    """The per-row formatter the templates replaced, for comparison."""
+    if '|' in spec:
+        return random.choice(spec.split('|'))
+    elif '#' in spec:
+        result = spec
+        while '#' in result:
+            result = result.replace('#', str(random.randint(0, 9)), 1)
+        return result
+    elif '?' in spec:
+        result = spec
+        while '?' in result:
+            result = result.replace('?', random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ'), 1)
+        return result
+    return spec
+
+
+def shape(value):
+    """A value with its digits and uppercase letters masked, to compare formats."""
+    return re.sub('[A-Z]', 'A', re.sub('[0-9]', '9', value))
+
+
+@pytest.mark.parametrize('spec, kind', [
+    ('RES|COM|IND', CHOICE), ('ACC-####-####', PATTERN), ('PAY-??', PATTERN),
+    ('LOT-#?', PATTERN), ('FIXED', LITERAL),
+])
+def test_templates_render_like_the_per_row_formatter(spec, kind):
+    template = compile_format(spec)
+    assert template.kind == kind
+    legacy = [legacy_format(spec, random.Random(seed)) for seed in range(2000)]
+    rendered = list(template.render(np.random.default_rng(0), 2000))
+    draws = random.Random(0)
+    single = [template.render_one(draws) for _ in range(2000)]
+    for values in (rendered, single):
+        assert all(isinstance(value, str) for value in values)
+        if kind == CHOICE:
+            assert set(values) == set(legacy)
+        else:
+            assert {shape(value) for value in values} == {shape(value) for value in legacy}
+            assert all(len(value) == len(spec) for value in values)
+
+
+def test_patterns_use_every_digit_and_letter():
+    digits = compile_format('#').render(np.random.default_rng(1), 2000)
+    letters = compile_format('??').render(np.random.default_rng(1), 2000)
+    assert set(digits) == set('0123456789')
+    assert set(''.join(letters)) == set('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+    # Only '#' is a placeholder once the spec has one
+    assert all(value[-1] == '?' for value in compile_format('LOT-#?').render(np.random.default_rng(1), 100))
+
+
+def test_weighted_choices_follow_their_weights():
+    template = compile_format('A|B|C', [6, 3, 1])
+    values = template.render(np.random.default_rng(2), 20000)
+    shares = {choice: np.mean(values == choice) for choice in 'ABC'}
+    assert shares == pytest.approx({'A': 0.6, 'B': 0.3, 'C': 0.1}, abs=0.02)
+    draws = random.Random(2)
+    singles = [template.render_one(draws) for _ in range(20000)]
+    assert singles.count('A') / 20000 == pytest.approx(0.6, abs=0.02)
+
+
+def test_weights_must_match_the_choices():
+    with pytest.raises(ValueError, match='3 choices but 2 weights'):
+        FormatTemplate('A|B|C', [1, 2])
+
+
+def test_templates_are_compiled_once_per_spec_and_weights():
+    assert compile_format('ACC-####') is compile_format('ACC-####')
+    assert compile_format('A|B', [1, 2]) is compile_format('A|B', (1, 2))
+    assert compile_format('A|B', [1, 2]) is not compile_format('A|B')
+
+
+def test_same_seed_renders_the_same_values():
+    template = compile_format('ACC-####')
+    first = template.render(np.random.default_rng(9), 50)
+    assert list(first) == list(template.render(np.random.default_rng(9), 50))
@@ -0,0 +1,10 @@
+from data_generators import GenerationWorker
+
+
+def test_failed_start_is_reported(tmp_path):
+    worker = GenerationWorker(industry='Shop', output_path=str(tmp_path), unknown_option=1)
+    worker.start()
+    snapshot = worker.snapshot()
+    assert snapshot['running'] is False
+    assert 'unknown_option' in snapshot['error']
+    assert not worker.is_alive()
@@ -0,0 +1,28 @@
+import itertools
+import logging
+
+from data_generators import CompiledSchema, FactGenerator, KeyIndex
+
+EVENTS = {
+    'table': 'events',
+    'type': 'fact',
+    'num_rows': 50,
+    'columns': {'event_id': 'int', 'status': {'type': 'string', 'format': 'OPEN|CLOSED'}},
+}
+
+
+def test_rate_log_counts_only_this_call(tmp_path, caplog):
+    schema = CompiledSchema(str(tmp_path / 'schema' / 'Shop' / 'events.yml'), EVENTS)
+    generator = FactGenerator(schema, str(tmp_path / 'out'), KeyIndex.from_ranges({}), seed=1)
+    df = generator.generate_data()
+    generator.save_micro_batches(df, 'events', files_per_sec=1000, rows_per_file=10)
+    written = generator.write_stats['bytes']
+
+    # One clock tick per call: the second save takes 3 ticks for its 2 files
+    caplog.set_level(logging.INFO, logger='data_generators.base_generator')
+    generator.save_micro_batches(df.iloc[:20], 'events', files_per_sec=1000, rows_per_file=10,
+                                 clock=itertools.count().__next__)
+    message = caplog.records[-1].getMessage()
+    assert generator.write_stats['files'] == 7
+    assert message.startswith('Wrote 2 micro-batch files for table events (0.7 files/s, ')
+    assert f"{(generator.write_stats['bytes'] - written) / 3:.0f} bytes/s" in message
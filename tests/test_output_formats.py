@@ -0,0 +1,100 @@
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from data_generators import CompiledSchema, FactGenerator, KeyIndex
+from data_generators.output_formats import OUTPUT_FORMATS, get_output_format, pipe_stream
+
+SCHEMA = CompiledSchema(None, {
+    'table': 'events',
+    'num_rows': 2500,
+    'columns': {
+        'event_id': 'int',
+        'amount': {'type': 'float', 'null_probability': 0.1},
+        'status': {'type': 'string', 'format': 'OPEN|CLOSED'},
+        'flag': 'bool',
+        'ts': 'datetime',
+    },
+})
+
+
+class FakeFilesAPI:
+    """Stands in for WorkspaceClient.files; an upload is committed only once its stream is read to the end."""
+
+    def __init__(self):
+        self.uploaded = {}
+
+    def upload(self, file_path, contents, overwrite=False):
+        data = bytearray()
+        while True:
+            block = contents.read(64 * 1024)
+            if not block:
+                break
+            data += block
+        self.uploaded[file_path] = bytes(data)
+
+
+class FakeWorkspaceClient:
+    def __init__(self):
+        self.files = FakeFilesAPI()
+
+
+def read(output_format, data):
+    compression = 'gzip' if output_format.name.endswith('gzip') else None
+    if output_format.reader_format == 'parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    if output_format.reader_format == 'csv':
+        return pd.read_csv(io.BytesIO(data), compression=compression)
+    return pd.read_json(io.BytesIO(data), lines=True, compression=compression)
+
+
+@pytest.mark.parametrize('name', list(OUTPUT_FORMATS))
+def test_streamed_upload_round_trips(name, tmp_path):
+    workspace = FakeWorkspaceClient()
+    generator = FactGenerator(SCHEMA, '/Volumes/test/out', KeyIndex(), is_local=False, output_format=name, seed=1)
+    generator._get_workspace_client = lambda: workspace
+    df = generator.generate_data()
+    output_format = get_output_format(name)
+    path = f'/Volumes/test/out/events{output_format.extension}'
+
+    uploaded = generator._save_to_databricks(df, path)
+
+    assert uploaded == len(workspace.files.uploaded[path])
+    local_path = tmp_path / f'events{output_format.extension}'
+    output_format.write(df, str(local_path), SCHEMA)
+    pd.testing.assert_frame_equal(read(output_format, workspace.files.uploaded[path]),
+                                  read(output_format, local_path.read_bytes()))
+
+
+def test_parquet_row_groups_are_independent_of_the_chunk_size():
+    df = pd.DataFrame({'id': range(25)})
+    output_format = get_output_format('parquet_snappy')
+    default, small = io.BytesIO(), io.BytesIO()
+    output_format.write_chunks(df, default, chunk_rows=5)
+    output_format.write_chunks(df, small, row_group_rows=10)
+    assert pq.ParquetFile(io.BytesIO(default.getvalue())).num_row_groups == 1
+    assert pq.ParquetFile(io.BytesIO(small.getvalue())).num_row_groups == 3
+
+
+def test_producer_error_fails_the_upload():
+    files = FakeFilesAPI()
+
+    def produce(sink):
+        sink.write(b'x' * (3 * 1024 * 1024))
+        raise ValueError('serialization failed')
+
+    with pytest.raises(ValueError, match='serialization failed'):
+        pipe_stream(produce, lambda contents: files.upload('/Volumes/test/out/file.csv', contents))
+    # The truncated stream was never committed
+    assert files.uploaded == {}
+
+
+def test_consumer_error_is_raised_without_hanging_the_producer():
+    def consume(contents):
+        contents.read(1024)
+        raise RuntimeError('upload rejected')
+
+    with pytest.raises(RuntimeError, match='upload rejected'):
+        pipe_stream(lambda sink: sink.write(b'y' * (8 * 1024 * 1024)), consume)
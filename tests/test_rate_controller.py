@@ -0,0 +1,63 @@
+import yaml
+
+from data_generators import GenerationEngine, RateController, TableScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_report_includes_the_schedulers_lag():
+    clock = FakeClock()
+    controller = RateController(interval_seconds=5, clock=clock)
+    controller.start()
+    scheduler = TableScheduler(lambda table, batch: None, workers=1, clock=clock)
+    scheduler.add('sales', 5, first_due=clock.now)
+    scheduler.add('returns', 5, first_due=clock.now + 1)
+    clock.now += 3.5
+    running = {}
+    scheduler._submit_due(running)
+    for future in list(running):
+        future.result()
+    for table in scheduler.lag:
+        controller.record_schedule_lag(table, scheduler.lag[table])
+
+    report = controller.report()
+    assert report['tables']['sales']['schedule_lag_seconds'] == 3.5
+    assert report['tables']['returns']['schedule_lag_seconds'] == 2.5
+    assert report['schedule_lag_seconds'] == 3.5
+    scheduler.pool.shutdown()
+
+
+def test_plan_paces_rows_to_the_target_rate():
+    clock = FakeClock()
+    controller = RateController(interval_seconds=10, clock=clock)
+    controller.start()
+    schema = {'table': 'sales', 'generator_config': {'target_rate': {'rows_per_sec': 100}}}
+    assert controller.plan('sales', schema, default_rows=5, horizon=10) == (1000, 1)
+
+
+def test_first_iteration_covers_one_cadence_of_each_table(tmp_path):
+    schema_dir = tmp_path / 'schema' / 'Shop'
+    schema_dir.mkdir(parents=True)
+    readings = {
+        'table': 'readings', 'type': 'fact', 'num_rows': 10,
+        'generator_config': {'cadence': 60, 'target_rate': {'rows_per_sec': 5}},
+        'columns': {'reading_id': 'int', 'value': 'float'},
+    }
+    (schema_dir / 'readings.yml').write_text(yaml.safe_dump(readings))
+    clock = FakeClock()
+    controller = RateController(interval_seconds=10, clock=clock)
+    controller.start()
+    engine = GenerationEngine('Shop', str(tmp_path / 'out'), schema_base_path=str(tmp_path / 'schema'), seed=1)
+
+    results = engine.generate_iteration(controller)
+
+    assert results['readings'].rows == 300
+    # Scheduled batch 1 is due two cadences in and owes exactly one more cadence of rows
+    schema = engine.load_schemas()[0]
+    assert controller.plan('readings', schema, 10, horizon=120, interval_seconds=60) == (300, 1)
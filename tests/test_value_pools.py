@@ -0,0 +1,70 @@
+import random
+
+import numpy as np
+import pytest
+
+from data_generators.value_pools import POOL_CACHE_DIR_ENV, ValuePoolCache, faker_provider_for
+
+
+@pytest.fixture(autouse=True)
+def no_pool_cache_dir(monkeypatch):
+    monkeypatch.delenv(POOL_CACHE_DIR_ENV, raising=False)
+
+
+def test_same_seed_builds_the_same_pool():
+    first = ValuePoolCache().get('name', size=200, seed=42)
+    second = ValuePoolCache().get('name', size=200, seed=42)
+    other = ValuePoolCache().get('name', size=200, seed=43)
+    assert list(first.values) == list(second.values)
+    assert list(first.values) != list(other.values)
+    assert len(set(first.values)) == len(first) == 200
+
+
+def test_pools_are_cached_by_provider_size_locale_and_seed():
+    cache = ValuePoolCache()
+    pool = cache.get('city', size=50, seed=1)
+    assert cache.get('city', size=50, seed=1) is pool
+    assert cache.get('city', size=60, seed=1) is not pool
+    assert cache.get('city', size=50, seed=2) is not pool
+    assert cache.get('city', size=50, locale='de_DE', seed=1) is not pool
+    assert cache.get('word', size=50, seed=1) is not pool
+
+
+def test_cache_directory_reuses_pools_across_processes(tmp_path):
+    pool = ValuePoolCache(cache_dir=str(tmp_path)).get('email', size=30, seed=5)
+    assert (tmp_path / 'email_en_US_5_30.json').exists()
+    # A fresh cache (another process) loads the stored values instead of rebuilding them
+    (tmp_path / 'email_en_US_5_30.json').write_text('["a@example.com", "b@example.com"]')
+    assert list(ValuePoolCache(cache_dir=str(tmp_path)).get('email', size=30, seed=5).values) == [
+        'a@example.com', 'b@example.com']
+    assert len(pool) == 30
+
+
+def test_cardinality_limits_draws_to_the_first_values():
+    pool = ValuePoolCache().get('word', size=100, seed=7)
+    drawn = pool.sample(np.random.default_rng(0), 5000, cardinality=10)
+    assert set(drawn) == set(pool.values[:10])
+    draws = random.Random(0)
+    picked = {pool.pick(draws, cardinality=3) for _ in range(500)}
+    assert picked == set(pool.values[:3])
+    # A cardinality above the pool size samples the whole pool
+    assert set(pool.sample(np.random.default_rng(0), 20000, cardinality=10 ** 6)) == set(pool.values)
+
+
+def test_providers_with_few_distinct_values_stop_short():
+    pool = ValuePoolCache().get('state', size=500, seed=3)
+    assert len(pool) < 500
+    assert len(set(pool.values)) == len(pool)
+
+
+@pytest.mark.parametrize('column, provider', [
+    ('customer_name', 'name'), ('contact_email', 'email'), ('service_address', 'address'),
+    ('zip_code', 'zipcode'), ('contact_number', 'phone'), ('notes', 'word'),
+])
+def test_columns_map_to_providers_by_name(column, provider):
+    assert faker_provider_for(column) == provider
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError, match='Unknown value pool provider'):
+        ValuePoolCache().get('colour')
@@ -0,0 +1,96 @@
+import os
+import threading
+
+import pytest
+
+from data_generators import CleanupError, LocalFilesAPI, VolumeCleaner
+
+
+class RecordingFilesAPI(LocalFilesAPI):
+    """LocalFilesAPI that records deletes and fails chosen paths a number of times (None: always)."""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _fail(self, operation, path):
+        with self.lock:
+            self.calls.append((operation, path))
+            remaining = self.failures.get(path, 0)
+            if remaining is None:
+                raise PermissionError(f"Permission denied: {path}")
+            if remaining:
+                self.failures[path] = remaining - 1
+                raise OSError(f"Too many requests: {path}")
+
+    def delete(self, file_path):
+        self._fail('delete', file_path)
+        super().delete(file_path)
+
+    def delete_directory(self, directory_path):
+        self._fail('delete_directory', directory_path)
+        super().delete_directory(directory_path)
+
+
+def make_tree(root):
+    """root with files at every level of a nested tree; returns the file paths."""
+    paths = ['a.csv', 'x/b.csv', 'x/y/c.csv', 'x/y/z/d.csv', 'x/y/z/e.csv', 'w/f.csv']
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+        open(os.path.join(root, path), 'w').close()
+    os.makedirs(os.path.join(root, 'empty', 'deeper'))
+    return [os.path.join(root, path) for path in paths]
+
+
+def test_nested_directories_are_deleted_after_their_contents(tmp_path):
+    root = str(tmp_path / 'out')
+    files = make_tree(root)
+    api = RecordingFilesAPI()
+
+    result = VolumeCleaner(api, workers=4, backoff_seconds=0).clean(root)
+
+    assert not os.path.exists(root)
+    assert (result.files, result.directories, result.failed) == (len(files), 7, [])
+    order = [path for _, path in api.calls]
+    for index, (operation, path) in enumerate(api.calls):
+        if operation == 'delete_directory':
+            # Nothing below a directory is deleted after it
+            assert not any(other.startswith(path + '/') for other in order[index + 1:])
+    assert api.calls[-1] == ('delete_directory', root)
+
+
+def test_transient_failures_are_retried(tmp_path):
+    root = str(tmp_path / 'out')
+    files = make_tree(root)
+    api = RecordingFilesAPI({files[2]: 2, os.path.join(root, 'x', 'y'): 1})
+
+    result = VolumeCleaner(api, workers=4, max_retries=3, backoff_seconds=0).clean(root)
+
+    assert not os.path.exists(root)
+    assert result.failed == []
+    assert api.calls.count(('delete', files[2])) == 3
+    assert api.calls.count(('delete_directory', os.path.join(root, 'x', 'y'))) == 2
+
+
+def test_failed_paths_are_reported_after_the_rest_is_deleted(tmp_path):
+    root = str(tmp_path / 'out')
+    files = make_tree(root)
+    stuck = os.path.join(root, 'x', 'y', 'z', 'd.csv')
+    api = RecordingFilesAPI({stuck: None})
+
+    with pytest.raises(CleanupError, match='Could not delete 1 paths') as error:
+        VolumeCleaner(api, workers=4, max_retries=2, backoff_seconds=0).clean(root)
+
+    assert error.value.failed == [stuck]
+    assert api.calls.count(('delete', stuck)) == 3
+    assert error.value.result.files == len(files) - 1
+    # Only the failed file and the directories above it are left
+    remaining = sorted(os.path.join(directory, name) for directory, dirs, names in os.walk(root) for name in names)
+    assert remaining == [stuck]
+    assert sorted(os.listdir(root)) == ['x']
+    assert not any(operation == 'delete_directory' and stuck.startswith(path + '/') for operation, path in api.calls)
+
+
+def test_missing_directory_is_not_an_error(tmp_path):
+    assert VolumeCleaner(LocalFilesAPI()).clean(str(tmp_path / 'missing')) is None
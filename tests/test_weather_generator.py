@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+from data_generators import CompiledSchema, KeyIndex, WeatherGenerator
+
+WEATHER = {
+    'table': 'daily_weather',
+    'type': 'fact',
+    'generator_class': 'WeatherGenerator',
+    'generator_config': {'start_date': '2024-01-01', 'end_date': '2024-01-10', 'incremental': True},
+    'columns': [
+        {'name': 'site_id', 'data_type': 'string',
+         'generator': {'type': 'reference', 'table': 'site_info', 'column': 'site_id'}},
+        {'name': 'date', 'data_type': 'date', 'generator': {'type': 'date'}},
+    ],
+}
+KEY_INDEX = KeyIndex.from_ranges({'site_info.site_id': 3})
+
+
+def run_iterations(tmp_path, configs):
+    """Generate and commit one iteration per generator_config override; returns each run's dates."""
+    runs = []
+    for iteration, config in enumerate(configs):
+        data = dict(WEATHER, generator_config={**WEATHER['generator_config'], **config})
+        schema = CompiledSchema(str(tmp_path / 'schema' / 'Shop' / 'daily_weather.yml'), data)
+        generator = WeatherGenerator(schema, str(tmp_path / 'out'), KEY_INDEX, seed=3, iteration=iteration)
+        df = generator.generate_data()
+        generator._commit_state()
+        assert (df.groupby('date')['site_id'].nunique() == 3).all()
+        runs.append(sorted(set(df['date'])))
+    return runs
+
+
+def days(first, count):
+    return [first + timedelta(days=offset) for offset in range(count)]
+
+
+def test_backfill_then_only_days_past_the_watermark(tmp_path):
+    runs = run_iterations(tmp_path, [{}, {}, {'end_date': '2024-01-14'}])
+    assert runs[0] == days(date(2024, 1, 1), 10)
+    # Nothing new until the end date moves on
+    assert runs[1] == []
+    assert runs[2] == days(date(2024, 1, 11), 4)
+
+
+def test_simulated_days_advance_the_watermark_without_repeats(tmp_path):
+    runs = run_iterations(tmp_path, [{'simulated_days_per_iteration': 3}] * 3)
+    assert runs[0] == days(date(2024, 1, 1), 10)
+    assert runs[1] == days(date(2024, 1, 11), 3)
+    assert runs[2] == days(date(2024, 1, 14), 3)
+    every_date = [day for run in runs for day in run]
+    assert len(every_date) == len(set(every_date))